@@ -2,3 +2,26 @@ post_stub:
 	@for p in miscutil/*.pyi.patch; do if test -f "$$p"; then \
 		patch -p1 < $$p; \
 	fi; done
+
+# Entry points whose startup time `make importtime` reports.
+IMPORTTIME_MODULES=miscutil miscutil.number miscutil.reflection \
+	miscutil.subprocess miscutil.yamljson miscutil.files miscutil.docker \
+	miscutil.profiling
+# Entry points which must not import any of IMPORTTIME_HEAVY.
+IMPORTTIME_LIGHT=miscutil miscutil.number miscutil.reflection \
+	miscutil.subprocess
+IMPORTTIME_HEAVY=numpy yaml asyncio concurrent.futures unittest statistics
+
+importtime:
+	@for m in ${IMPORTTIME_MODULES}; do \
+		python3 -X importtime -c "import $$m" 2>&1 >/dev/null | \
+		awk -F'|' -v m="$$m" \
+		  '{ sub(/^ +/, "", $$3) } $$3 == m { printf "%-24s %8d us\n", m, $$2 }'; \
+	done
+	@for m in ${IMPORTTIME_LIGHT}; do \
+		python3 -c "import sys, $$m; heavy = [h for h in '${IMPORTTIME_HEAVY}'.split() if h in sys.modules]; sys.exit('$$m imports ' + ', '.join(heavy) if heavy else 0)" || exit 1; \
+	done
+
+# Throughput of serial map and pimap on threads and processes.
+bench_parallel:
+	@python3 -c "from miscutil.parallel import benchmark; from miscutil.yamljson import print_as_yaml_str; print_as_yaml_str(benchmark())"
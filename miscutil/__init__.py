@@ -3,19 +3,54 @@ from typing import Any
 from typing import Callable
 from typing import Generic
 from typing import Iterable
+from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Reversible
+from typing import Sequence
+from typing import Sized
+from typing import Tuple
 from typing import TypeVar
 
-from functools import reduce
+from collections import deque
+from importlib import import_module
+from itertools import count as _count
+from itertools import islice
 from itertools import tee
 from pathlib import Path
+from weakref import WeakSet
 
 __version__ = '0.11.0'
 
+# Submodules are imported on first access as attributes of this package
+# so that `import miscutil` stays free of numpy and PyYAML.
+SUBMODULES = frozenset([
+    'accumulator', 'colour', 'diskcache', 'docker', 'files', 'nanstats',
+    'number', 'parallel', 'profiling', 'reflection', 'subprocess',
+    'testing', 'yamlbackend', 'yamljson'])
+
+
+def __getattr__(name: str) -> Any:
+    if name in SUBMODULES:
+        return import_module('.' + name, __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(
+        __name__, name))
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | SUBMODULES)
+
 
 TTT = TypeVar('TTT')
 TTT2 = TypeVar('TTT2')
 
+try:
+    from itertools import batched as _batched  # type: ignore
+except ImportError:  # before python 3.12
+    _batched = None  # type: ignore
+
+_ABSENT = object()
+
 
 def none_or(value: Optional[TTT],
             convert: Callable[[TTT], TTT2],
@@ -45,24 +80,135 @@ class Entype(Generic[TTT]):  # pylint: disable=too-few-public-methods
         return elem
 
 
+class _ReplayBuffer(Generic[TTT]):
+    """Chunked buffer shared by the cursors of a DupableIterable.
+
+    Every chunk but the last one holds exactly CHUNK_SIZE elements, so that
+    a cursor position is just (chunk number, offset).  Leading chunks are
+    dropped once no anchor (live DupableIterable) and no live cursor needs
+    them any more.
+    """
+    CHUNK_SIZE = 256
+
+    __slots__ = ['_source', 'chunks', 'head_chunk_no', 'exhausted',
+                 'anchors', 'cursors']
+
+    def __init__(self, es: Iterable[TTT]):
+        self._source: Optional[Iterator[TTT]] = iter(es)
+        self.chunks: deque = deque([[]])
+        self.head_chunk_no = 0
+        self.exhausted = False
+        self.anchors = 0
+        self.cursors: WeakSet = WeakSet()
+
+    def chunk_at(self, chunk_no: int) -> List[TTT]:
+        """get chunk of given number."""
+        return self.chunks[chunk_no - self.head_chunk_no]
+
+    def fetch(self) -> bool:
+        """pull one more element from the source into the buffer."""
+        if self.exhausted:
+            return False
+        try:
+            elem = next(self._source)  # type: ignore
+        except StopIteration:
+            self.exhausted = True
+            self._source = None
+            return False
+        tail = self.chunks[-1]
+        if len(tail) >= self.CHUNK_SIZE:
+            tail = []
+            self.chunks.append(tail)
+        tail.append(elem)
+        return True
+
+    def fetched_count(self) -> int:
+        """count elements pulled from the source so far."""
+        return ((self.head_chunk_no + len(self.chunks) - 1) * self.CHUNK_SIZE
+                + len(self.chunks[-1]))
+
+    def release(self) -> None:
+        """drop leading chunks all cursors have passed."""
+        if self.anchors > 0:
+            return
+        floor = min((cursor.position for cursor in self.cursors),
+                    default=self.fetched_count())
+        while (len(self.chunks) > 1 and
+               (self.head_chunk_no + 1) * self.CHUNK_SIZE <= floor):
+            self.chunks.popleft()
+            self.head_chunk_no += 1
+
+
+class _ReplayCursor(Iterator[TTT]):
+    """Independent iterator over a _ReplayBuffer."""
+    __slots__ = ['_buffer', '_chunk', '_chunk_no', '_offset', '__weakref__']
+
+    def __init__(self, buffer: _ReplayBuffer[TTT]):
+        self._buffer = buffer
+        self._chunk_no = buffer.head_chunk_no
+        self._chunk = buffer.chunk_at(self._chunk_no)
+        self._offset = 0
+        buffer.cursors.add(self)
+
+    @property
+    def position(self) -> int:
+        """get absolute index of the next element."""
+        return self._chunk_no * _ReplayBuffer.CHUNK_SIZE + self._offset
+
+    def __iter__(self) -> Iterator[TTT]:
+        return self
+
+    def __next__(self) -> TTT:
+        chunk = self._chunk
+        offset = self._offset
+        if offset < len(chunk):
+            self._offset = offset + 1
+            return chunk[offset]
+        return self._next_slow()
+
+    def _next_slow(self) -> TTT:
+        buffer = self._buffer
+        if self._offset >= _ReplayBuffer.CHUNK_SIZE:
+            if (self._chunk_no - buffer.head_chunk_no + 1 >= len(buffer.chunks)
+                    and not buffer.fetch()):
+                raise StopIteration
+            self._chunk_no += 1
+            self._chunk = buffer.chunk_at(self._chunk_no)
+            self._offset = 0
+            buffer.release()
+        elif not buffer.fetch():
+            raise StopIteration
+        return next(self)
+
+
 class DupableIterable(Iterable[TTT]):
-    """Duplicatable class of Iterable."""
+    """Duplicatable class of Iterable.
+
+    All duplicates share one replay buffer, each with its own cursor.
+    """
     def __init__(self, es: Iterable[TTT]):
-        self._iter: Iterable[TTT] = es
+        self._buffer: _ReplayBuffer[TTT] = (
+            es._buffer if isinstance(es, DupableIterable) else
+            _ReplayBuffer(es))
+        self._buffer.anchors += 1
+
+    def __del__(self):
+        buffer = getattr(self, '_buffer', None)
+        if buffer is not None:
+            buffer.anchors -= 1
+            buffer.release()
 
     def dup(self) -> Iterable[TTT]:
         """duplicate this Iterable."""
-        to_return, self._iter = tee(self._iter)
-        return to_return
+        return _ReplayCursor(self._buffer)
 
     def __iter__(self):
         return self.dup()
 
     def __len__(self):
-        count = 0
-        for _ in self:
-            count += 1
-        return count
+        if not self._buffer.exhausted:
+            to_end(self)
+        return self._buffer.fetched_count()
 
 
 def nth_of(ordinal_number: int,
@@ -83,9 +229,7 @@ def nth(ordinal_number: int,
     """
 
     if ordinal_number < 0:
-        elems_dup = DupableIterable(elems)
-        _length = len(elems_dup)
-        return nth(_length - ordinal_number, elems_dup, default_value)
+        return _nth_from_last(-ordinal_number, elems, default_value)
 
     idx = 0
     for elem in elems:
@@ -98,50 +242,69 @@ def nth(ordinal_number: int,
     return None
 
 
+def _nth_from_last(ordinal_from_last: int,
+                   elems: Iterable[TTT],
+                   default_value: Optional[TTT] = None) -> Optional[TTT]:
+    """末尾から ordinal_from_last 番目の要素を返す．
+
+    末尾は 1 番．Sequence なら添字で，長さが分かり逆順に辿れるなら
+    reversed で直接取り出す．それ以外は直近 ordinal_from_last 個だけを
+    保持して 1 回だけ走査する．
+    """
+    if isinstance(elems, Sequence):
+        if ordinal_from_last > len(elems):
+            return default_value
+        return elems[-ordinal_from_last]
+    if isinstance(elems, Sized) and isinstance(elems, Reversible):
+        if ordinal_from_last > len(elems):
+            return default_value
+        return next(islice(reversed(elems), ordinal_from_last - 1, None),
+                    default_value)
+    window: deque = deque(elems, maxlen=ordinal_from_last)
+    if len(window) < ordinal_from_last:
+        return default_value
+    return window[0]
+
+
 def head(count: int, elems: Iterable[TTT]) -> Iterable[TTT]:
     """get first `count` elements."""
-    idx = 0
-    for elem in elems:
-        if idx >= count:
-            break
-        idx += 1
-        yield elem
+    return islice(elems, max(count, 0))
 
 
 def length(elems: Iterable[TTT]) -> int:
     """count elements in iterable."""
-    return reduce(lambda result, elem: result + 1, DupableIterable(elems), 0)
+    if isinstance(elems, Sized):
+        return len(elems)
+    counter = _count()
+    deque(zip(elems, counter), maxlen=0)
+    return next(counter)
 
 
 def missing(elems: Iterable[TTT]) -> bool:
     """elems が 0 個なら True を返す．"""
 
-    return nth(0, elems) is None
+    return next(iter(elems), _ABSENT) is _ABSENT
 
 
 def existing(elems: Iterable[TTT]) -> bool:
     """elems が 1 個以上なら True を返す．"""
 
-    return nth(0, elems) is not None
+    return next(iter(elems), _ABSENT) is not _ABSENT
 
 
 def ijoin(*args: TTT) -> Iterable[TTT]:
     """名前なしパラメタ列から generator を作る．"""
-    yield from args
+    return iter(args)
 
 
 def to_end(elems: Iterable[TTT]) -> None:
     """enumerate elements to the end."""
-    for _ in elems:
-        pass
+    deque(elems, maxlen=0)
 
 
 def count_up() -> Iterable[int]:
     """count up eternaly."""
-    num: int = 0
-    while True:
-        yield num
-        num += 1
+    return _count()
 
 
 def disj(boolfunc: Callable[[TTT], bool], elems: Iterable[TTT]) -> bool:
@@ -151,10 +314,7 @@ def disj(boolfunc: Callable[[TTT], bool], elems: Iterable[TTT]) -> bool:
       boolfunc: object->bool - 要素を真偽値に変換する関数．
       elems - 要素の並び．
     """
-    for elem in elems:
-        if boolfunc(elem):
-            return True
-    return False
+    return any(map(boolfunc, elems))
 
 
 def conj(boolfunc: Callable[[TTT], bool],
@@ -166,12 +326,84 @@ def conj(boolfunc: Callable[[TTT], bool],
       boolfunc: object->bool - 要素を真偽値に変換する関数．
       elems - 要素の並び．
     """
-    exists = False
-    for elem in elems:
-        if not boolfunc(elem):
-            return False
-        exists = True
-    return imply(lambda: should_exist, lambda: exists)
+    if not should_exist:
+        return all(map(boolfunc, elems))
+    iterator = iter(elems)
+    for first in iterator:
+        return bool(boolfunc(first)) and all(map(boolfunc, iterator))
+    return False
+
+
+class Pipeline(Iterable[TTT]):
+    """Lazy pipeline of iterator operations.
+
+    Operators chain itertools on the source and read only as many elements
+    as the consumer needs, so that unbounded streams work.  Like an
+    iterator, a pipeline over an iterator is consumed once.
+
+        Pipeline(records).filter(is_valid).map(to_row).chunked(1000)
+    """
+    __slots__ = ['elems']
+
+    def __init__(self, elems: Iterable[TTT]):
+        self.elems = elems
+
+    def __iter__(self) -> Iterator[TTT]:
+        return iter(self.elems)
+
+    def map(self, func: Callable[[TTT], TTT2]) -> "Pipeline[TTT2]":
+        """apply func to each element."""
+        return Pipeline(map(func, self.elems))
+
+    def filter(self,
+               pred: Optional[Callable[[TTT], Any]] = None) -> "Pipeline[TTT]":
+        """keep elements satisfying pred, or true ones without pred."""
+        return Pipeline(filter(pred, self.elems))
+
+    def take(self, count: int) -> "Pipeline[TTT]":
+        """keep first count elements."""
+        return Pipeline(head(count, self.elems))
+
+    def batched(self, size: int) -> "Pipeline[Tuple[TTT, ...]]":
+        """group elements into tuples of size; the last may be shorter."""
+        if size < 1:
+            raise ValueError('size must be at least one')
+        if _batched is not None:
+            return Pipeline(_batched(self.elems, size))
+        iterator = iter(self.elems)
+        return Pipeline(iter(lambda: tuple(islice(iterator, size)), ()))
+
+    def chunked(self, size: int) -> "Pipeline[List[TTT]]":
+        """group elements into lists of size; the last may be shorter."""
+        if size < 1:
+            raise ValueError('size must be at least one')
+        iterator = iter(self.elems)
+        return Pipeline(iter(lambda: list(islice(iterator, size)), []))
+
+    def window(self, size: int) -> "Pipeline[Tuple[TTT, ...]]":
+        """slide window of size by one element; none if fewer elements."""
+        if size < 1:
+            raise ValueError('size must be at least one')
+        iterators = tee(self.elems, size)
+        for offset, iterator in enumerate(iterators):
+            next(islice(iterator, offset, offset), None)
+        return Pipeline(zip(*iterators))
+
+    def any(self, pred: Optional[Callable[[TTT], Any]] = None) -> bool:
+        """check if any element satisfies pred, or is true without pred."""
+        return any(self.elems if pred is None else map(pred, self.elems))
+
+    def all(self, pred: Optional[Callable[[TTT], Any]] = None) -> bool:
+        """check if all elements satisfy pred, or are true without pred."""
+        return all(self.elems if pred is None else map(pred, self.elems))
+
+    def count(self) -> int:
+        """count elements."""
+        return length(self.elems)
+
+    def to_list(self) -> List[TTT]:
+        """collect elements."""
+        return list(self.elems)
 
 
 def imply(cond1: Callable[[], bool], cond2: Callable[[], bool]) -> bool:
@@ -1,7 +1,9 @@
 from pathlib import Path
-from typing import Any, Callable, Iterable, Optional, TypeVar
+from typing import Any, Callable, FrozenSet, Iterable, Iterator, List, Optional, Tuple, TypeVar
 from typing import Generic
 
+SUBMODULES: FrozenSet[str]
+
 TTT = TypeVar('TTT')
 TTT2 = TypeVar('TTT2')
 
@@ -15,6 +17,7 @@ class Entype(Generic[TTT]):
 
 class DupableIterable(Iterable[TTT]):
     def __init__(self, es: Iterable[TTT]) -> None: ...
+    def __del__(self) -> None: ...
     def dup(self) -> Iterable[TTT]: ...
     def __iter__(self) -> Any: ...
     def __len__(self): ...
@@ -30,5 +33,21 @@ def to_end(elems: Iterable[TTT]) -> None: ...
 def count_up() -> Iterable[int]: ...
 def disj(boolfunc: Callable[[TTT], bool], elems: Iterable[TTT]) -> bool: ...
 def conj(boolfunc: Callable[[TTT], bool], elems: Iterable[TTT], should_exist: bool=...) -> bool: ...
+
+class Pipeline(Iterable[TTT]):
+    elems: Iterable[TTT] = ...
+    def __init__(self, elems: Iterable[TTT]) -> None: ...
+    def __iter__(self) -> Iterator[TTT]: ...
+    def map(self, func: Callable[[TTT], TTT2]) -> Pipeline[TTT2]: ...
+    def filter(self, pred: Optional[Callable[[TTT], Any]]=...) -> Pipeline[TTT]: ...
+    def take(self, count: int) -> Pipeline[TTT]: ...
+    def batched(self, size: int) -> Pipeline[Tuple[TTT, ...]]: ...
+    def chunked(self, size: int) -> Pipeline[List[TTT]]: ...
+    def window(self, size: int) -> Pipeline[Tuple[TTT, ...]]: ...
+    def any(self, pred: Optional[Callable[[TTT], Any]]=...) -> bool: ...
+    def all(self, pred: Optional[Callable[[TTT], Any]]=...) -> bool: ...
+    def count(self) -> int: ...
+    def to_list(self) -> List[TTT]: ...
+
 def imply(cond1: Callable[[], bool], cond2: Callable[[], bool]) -> bool: ...
 def module_top() -> Path: ...
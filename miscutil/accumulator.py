@@ -0,0 +1,241 @@
+"""Mergeable online accumulators for unbounded numeric streams.
+
+Every accumulator skips NaN, accepts one value by `update`, a batch of
+values (ndarray or any iterable) by `update_many` and a partial result of
+another worker by `merge`.
+"""
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+
+from math import isnan
+from math import pi
+
+import numpy as np  # type: ignore
+
+from miscutil.number import NAN
+
+
+def _non_nan_array(values: Iterable[float]) -> np.ndarray:
+    """get flat float array without NaN."""
+    arr = (values if isinstance(values, np.ndarray) else
+           np.fromiter(values, dtype=float))
+    arr = arr.astype(float, copy=False).ravel()
+    return arr[~np.isnan(arr)]
+
+
+class MeanVariance:
+    """Count, mean and variance by Welford's method."""
+    __slots__ = ['count', 'mean', 'm2']
+
+    def __init__(self):
+        self.count = 0
+        self.mean = NAN
+        self.m2 = 0.0
+
+    def update(self, value: float) -> "MeanVariance":
+        """add a value."""
+        if isnan(value):
+            return self
+        self.count += 1
+        if self.count == 1:
+            self.mean = float(value)
+            return self
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        return self
+
+    def update_many(self, values: Iterable[float]) -> "MeanVariance":
+        """add values at once."""
+        arr = _non_nan_array(values)
+        if arr.size == 0:
+            return self
+        mean = float(arr.mean())
+        return self._combine(arr.size, mean, float(((arr - mean) ** 2).sum()))
+
+    def merge(self, other: "MeanVariance") -> "MeanVariance":
+        """merge partial result of other accumulator."""
+        if other.count == 0:
+            return self
+        return self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, count: int, mean: float, m2: float) -> "MeanVariance":
+        """combine moments by Chan's parallel algorithm."""
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return self
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        return self
+
+    @property
+    def variance(self) -> float:
+        """get sample variance, which statistics.variance returns."""
+        return self.m2 / (self.count - 1) if self.count > 1 else NAN
+
+    @property
+    def pvariance(self) -> float:
+        """get population variance."""
+        return self.m2 / self.count if self.count > 0 else NAN
+
+    @property
+    def stdev(self) -> float:
+        """get sample standard deviation."""
+        return self.variance ** 0.5
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'count': self.count, 'mean': self.mean,
+                'variance': self.variance}
+
+
+class MinMax:
+    """Minimum and maximum skipping NaN."""
+    __slots__ = ['count', 'min', 'max']
+
+    def __init__(self):
+        self.count = 0
+        self.min = NAN
+        self.max = NAN
+
+    def update(self, value: float) -> "MinMax":
+        """add a value."""
+        if isnan(value):
+            return self
+        if self.count == 0 or value < self.min:
+            self.min = float(value)
+        if self.count == 0 or value > self.max:
+            self.max = float(value)
+        self.count += 1
+        return self
+
+    def update_many(self, values: Iterable[float]) -> "MinMax":
+        """add values at once."""
+        arr = _non_nan_array(values)
+        if arr.size == 0:
+            return self
+        return self._combine(arr.size, float(arr.min()), float(arr.max()))
+
+    def merge(self, other: "MinMax") -> "MinMax":
+        """merge partial result of other accumulator."""
+        if other.count == 0:
+            return self
+        return self._combine(other.count, other.min, other.max)
+
+    def _combine(self, count: int, min_: float, max_: float) -> "MinMax":
+        if self.count == 0:
+            self.count, self.min, self.max = count, min_, max_
+            return self
+        self.count += count
+        self.min = min(self.min, min_)
+        self.max = max(self.max, max_)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'count': self.count, 'min': self.min, 'max': self.max}
+
+
+class TDigest:
+    """Approximate quantiles by merging t-digest.
+
+    Incoming values are buffered and folded into at most about
+    `compression / 2` centroids, whose sizes are bounded by the arcsine
+    scale function so that the tails keep fine resolution.
+    """
+    __slots__ = ['compression', 'buffer_size', 'means', 'weights',
+                 '_buffer', 'extrema']
+
+    def __init__(self, compression: float = 200.0, buffer_size: int = 1000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer: List[float] = []
+        self.extrema = MinMax()
+
+    @property
+    def count(self) -> int:
+        """get number of values added."""
+        return self.extrema.count
+
+    def update(self, value: float) -> "TDigest":
+        """add a value."""
+        if isnan(value):
+            return self
+        self.extrema.update(value)
+        self._buffer.append(value)
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+        return self
+
+    def update_many(self, values: Iterable[float]) -> "TDigest":
+        """add values at once."""
+        arr = _non_nan_array(values)
+        if arr.size == 0:
+            return self
+        self.extrema.update_many(arr)
+        self._compress(arr, np.ones(arr.size))
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """merge partial result of other accumulator."""
+        other._flush()  # pylint: disable=protected-access
+        if other.count == 0:
+            return self
+        self.extrema.merge(other.extrema)
+        self._compress(other.means, other.weights)
+        return self
+
+    def _flush(self) -> None:
+        if self._buffer:
+            arr = np.array(self._buffer, dtype=float)
+            self._buffer = []
+            self._compress(arr, np.ones(arr.size))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """fold centroids and new points into bounded centroids."""
+        means = np.concatenate((self.means, means))
+        weights = np.concatenate((self.weights, weights))
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        q_left = (cumulative - weights) / total
+        # k-scale k(q) = delta / (2 pi) * asin(2q - 1) shifted to start at 0.
+        cluster = np.floor(
+            self.compression / (2 * pi)
+            * (np.arcsin(2 * q_left - 1) + pi / 2)).astype(np.int64)
+        starts = np.flatnonzero(np.diff(cluster, prepend=-1))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float) -> float:
+        """get approximate q-quantile (0 <= q <= 1); nan if empty."""
+        self._flush()
+        if self.count == 0 or not 0.0 <= q <= 1.0:
+            return NAN
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(
+            q * self.count,
+            np.concatenate(([0.0], centers, [float(self.count)])),
+            np.concatenate(([self.extrema.min], self.means,
+                            [self.extrema.max]))))
+
+    def percentile(self, percent: float) -> float:
+        """get approximate percentile (0 <= percent <= 100)."""
+        return self.quantile(percent / 100.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'count': self.count,
+                'min': self.extrema.min,
+                'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95),
+                'max': self.extrema.max}
@@ -0,0 +1,44 @@
+from miscutil.number import NAN as NAN
+from typing import Any, Dict, Iterable
+
+class MeanVariance:
+    count: int = ...
+    mean: float = ...
+    m2: float = ...
+    def __init__(self) -> None: ...
+    def update(self, value: float) -> MeanVariance: ...
+    def update_many(self, values: Iterable[float]) -> MeanVariance: ...
+    def merge(self, other: MeanVariance) -> MeanVariance: ...
+    @property
+    def variance(self) -> float: ...
+    @property
+    def pvariance(self) -> float: ...
+    @property
+    def stdev(self) -> float: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+class MinMax:
+    count: int = ...
+    min: float = ...
+    max: float = ...
+    def __init__(self) -> None: ...
+    def update(self, value: float) -> MinMax: ...
+    def update_many(self, values: Iterable[float]) -> MinMax: ...
+    def merge(self, other: MinMax) -> MinMax: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+class TDigest:
+    compression: float = ...
+    buffer_size: int = ...
+    means: Any = ...
+    weights: Any = ...
+    extrema: MinMax = ...
+    def __init__(self, compression: float=..., buffer_size: int=...) -> None: ...
+    @property
+    def count(self) -> int: ...
+    def update(self, value: float) -> TDigest: ...
+    def update_many(self, values: Iterable[float]) -> TDigest: ...
+    def merge(self, other: TDigest) -> TDigest: ...
+    def quantile(self, q: float) -> float: ...
+    def percentile(self, percent: float) -> float: ...
+    def to_dict(self) -> Dict[str, Any]: ...
@@ -1,10 +1,347 @@
-"""Utilities for colourization."""
+"""Utilities for colourization.
+
+Ramps are interpolated in HSL (as colour.Color.range_to does), sRGB or
+CIE Lab on NumPy arrays and resulting '#rrggbb' strings are cached.
+"""
+from typing import Dict
 from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from functools import lru_cache
+import re
+
+import numpy as np  # type: ignore
+
+FLOAT_ERROR = 0.0000005
+RAMP_CACHE_SIZE = 256
+COLOR_SPACES = ('hsl', 'rgb', 'lab')
+
+_HEX_COLOR = re.compile('#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+_HEX_BYTES = ['{:02x}'.format(byte) for byte in range(256)]
+
+COLOR_NAME_TO_RGB: Dict[str, Tuple[int, int, int]] = {
+    'aliceblue': (240, 248, 255),
+    'antiquewhite': (250, 235, 215),
+    'aqua': (0, 255, 255),
+    'aquamarine': (127, 255, 212),
+    'azure': (240, 255, 255),
+    'beige': (245, 245, 220),
+    'bisque': (255, 228, 196),
+    'black': (0, 0, 0),
+    'blanchedalmond': (255, 235, 205),
+    'blue': (0, 0, 255),
+    'blueviolet': (138, 43, 226),
+    'brown': (165, 42, 42),
+    'burlywood': (222, 184, 135),
+    'cadetblue': (95, 158, 160),
+    'chartreuse': (127, 255, 0),
+    'chocolate': (210, 105, 30),
+    'coral': (255, 127, 80),
+    'cornflowerblue': (100, 149, 237),
+    'cornsilk': (255, 248, 220),
+    'crimson': (220, 20, 60),
+    'cyan': (0, 255, 255),
+    'darkblue': (0, 0, 139),
+    'darkcyan': (0, 139, 139),
+    'darkgoldenrod': (184, 134, 11),
+    'darkgray': (169, 169, 169),
+    'darkgreen': (0, 100, 0),
+    'darkgrey': (169, 169, 169),
+    'darkkhaki': (189, 183, 107),
+    'darkmagenta': (139, 0, 139),
+    'darkolivegreen': (85, 107, 47),
+    'darkorange': (255, 140, 0),
+    'darkorchid': (153, 50, 204),
+    'darkred': (139, 0, 0),
+    'darksalmon': (233, 150, 122),
+    'darkseagreen': (143, 188, 143),
+    'darkslateblue': (72, 61, 139),
+    'darkslategray': (47, 79, 79),
+    'darkslategrey': (47, 79, 79),
+    'darkturquoise': (0, 206, 209),
+    'darkviolet': (148, 0, 211),
+    'deeppink': (255, 20, 147),
+    'deepskyblue': (0, 191, 255),
+    'dimgray': (105, 105, 105),
+    'dimgrey': (105, 105, 105),
+    'dodgerblue': (30, 144, 255),
+    'firebrick': (178, 34, 34),
+    'floralwhite': (255, 250, 240),
+    'forestgreen': (34, 139, 34),
+    'fuchsia': (255, 0, 255),
+    'gainsboro': (220, 220, 220),
+    'ghostwhite': (248, 248, 255),
+    'gold': (255, 215, 0),
+    'goldenrod': (218, 165, 32),
+    'gray': (128, 128, 128),
+    'green': (0, 128, 0),
+    'greenyellow': (173, 255, 47),
+    'grey': (128, 128, 128),
+    'honeydew': (240, 255, 240),
+    'hotpink': (255, 105, 180),
+    'indianred': (205, 92, 92),
+    'indigo': (75, 0, 130),
+    'ivory': (255, 255, 240),
+    'khaki': (240, 230, 140),
+    'lavender': (230, 230, 250),
+    'lavenderblush': (255, 240, 245),
+    'lawngreen': (124, 252, 0),
+    'lemonchiffon': (255, 250, 205),
+    'lightblue': (173, 216, 230),
+    'lightcoral': (240, 128, 128),
+    'lightcyan': (224, 255, 255),
+    'lightgoldenrod': (238, 221, 130),
+    'lightgoldenrodyellow': (250, 250, 210),
+    'lightgray': (211, 211, 211),
+    'lightgreen': (144, 238, 144),
+    'lightgrey': (211, 211, 211),
+    'lightpink': (255, 182, 193),
+    'lightsalmon': (255, 160, 122),
+    'lightseagreen': (32, 178, 170),
+    'lightskyblue': (135, 206, 250),
+    'lightslateblue': (132, 112, 255),
+    'lightslategray': (119, 136, 153),
+    'lightslategrey': (119, 136, 153),
+    'lightsteelblue': (176, 196, 222),
+    'lightyellow': (255, 255, 224),
+    'lime': (0, 255, 0),
+    'limegreen': (50, 205, 50),
+    'linen': (250, 240, 230),
+    'magenta': (255, 0, 255),
+    'maroon': (128, 0, 0),
+    'mediumaquamarine': (102, 205, 170),
+    'mediumblue': (0, 0, 205),
+    'mediumorchid': (186, 85, 211),
+    'mediumpurple': (147, 112, 219),
+    'mediumseagreen': (60, 179, 113),
+    'mediumslateblue': (123, 104, 238),
+    'mediumspringgreen': (0, 250, 154),
+    'mediumturquoise': (72, 209, 204),
+    'mediumvioletred': (199, 21, 133),
+    'midnightblue': (25, 25, 112),
+    'mintcream': (245, 255, 250),
+    'mistyrose': (255, 228, 225),
+    'moccasin': (255, 228, 181),
+    'navajowhite': (255, 222, 173),
+    'navy': (0, 0, 128),
+    'navyblue': (0, 0, 128),
+    'oldlace': (253, 245, 230),
+    'olive': (128, 128, 0),
+    'olivedrab': (107, 142, 35),
+    'orange': (255, 165, 0),
+    'orangered': (255, 69, 0),
+    'orchid': (218, 112, 214),
+    'palegoldenrod': (238, 232, 170),
+    'palegreen': (152, 251, 152),
+    'paleturquoise': (175, 238, 238),
+    'palevioletred': (219, 112, 147),
+    'papayawhip': (255, 239, 213),
+    'peachpuff': (255, 218, 185),
+    'peru': (205, 133, 63),
+    'pink': (255, 192, 203),
+    'plum': (221, 160, 221),
+    'powderblue': (176, 224, 230),
+    'purple': (128, 0, 128),
+    'red': (255, 0, 0),
+    'rosybrown': (188, 143, 143),
+    'royalblue': (65, 105, 225),
+    'saddlebrown': (139, 69, 19),
+    'salmon': (250, 128, 114),
+    'sandybrown': (244, 164, 96),
+    'seagreen': (46, 139, 87),
+    'seashell': (255, 245, 238),
+    'sienna': (160, 82, 45),
+    'silver': (192, 192, 192),
+    'skyblue': (135, 206, 235),
+    'slateblue': (106, 90, 205),
+    'slategray': (112, 128, 144),
+    'slategrey': (112, 128, 144),
+    'snow': (255, 250, 250),
+    'springgreen': (0, 255, 127),
+    'steelblue': (70, 130, 180),
+    'tan': (210, 180, 140),
+    'thistle': (216, 191, 216),
+    'tomato': (255, 99, 71),
+    'turquoise': (64, 224, 208),
+    'violet': (238, 130, 238),
+    'violetred': (208, 32, 144),
+    'wheat': (245, 222, 179),
+    'white': (255, 255, 255),
+    'whitesmoke': (245, 245, 245),
+    'yellow': (255, 255, 0),
+    'yellowgreen': (154, 205, 50),
+}
+
+
+def parse_color(color: str) -> Tuple[float, float, float]:
+    """get RGB in [0, 1] of '#rgb', '#rrggbb' or web color name."""
+    if color.startswith('#'):
+        match = _HEX_COLOR.match(color)
+        if match is None:
+            raise ValueError(
+                '{!r} is not in web format. Need 3 or 6 hex digit.'.format(
+                    color))
+        digits = match.group(1)
+        if len(digits) == 3:
+            digits = ''.join(digit * 2 for digit in digits)
+        rgb = [int(digits[index:index + 2], 16) for index in (0, 2, 4)]
+    else:
+        try:
+            rgb = list(COLOR_NAME_TO_RGB[color.lower()])
+        except KeyError:
+            raise ValueError('{!r} is not a recognized color.'.format(
+                color.lower())) from None
+    red, green, blue = [float(value) / 255 for value in rgb]
+    return red, green, blue
+
+
+def _rgb_to_hsl(rgb: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    """convert RGB to HSL in the same arithmetic as colour.rgb2hsl."""
+    red, green, blue = rgb
+    vmin = min(red, green, blue)
+    vmax = max(red, green, blue)
+    diff = vmax - vmin
+    vsum = vmin + vmax
+    lightness = vsum / 2
+    if diff < FLOAT_ERROR:
+        return 0.0, 0.0, lightness
+    saturation = diff / vsum if lightness < 0.5 else diff / (2.0 - vsum)
+    d_red = (((vmax - red) / 6) + (diff / 2)) / diff
+    d_green = (((vmax - green) / 6) + (diff / 2)) / diff
+    d_blue = (((vmax - blue) / 6) + (diff / 2)) / diff
+    if red == vmax:
+        hue = d_blue - d_green
+    elif green == vmax:
+        hue = (1.0 / 3) + d_red - d_blue
+    else:
+        hue = (2.0 / 3) + d_green - d_red
+    if hue < 0:
+        hue += 1
+    if hue > 1:
+        hue -= 1
+    return hue, saturation, lightness
+
+
+def _hue_to_rgb(v_1: np.ndarray, v_2: np.ndarray,
+                hue: np.ndarray) -> np.ndarray:
+    hue = hue.copy()
+    while (hue < 0).any():
+        hue[hue < 0] += 1
+    while (hue > 1).any():
+        hue[hue > 1] -= 1
+    return np.select(
+        [6 * hue < 1, 2 * hue < 1, 3 * hue < 2],
+        [v_1 + (v_2 - v_1) * 6 * hue,
+         v_2,
+         v_1 + (v_2 - v_1) * ((2.0 / 3) - hue) * 6],
+        v_1)
+
+
+def _hsl_to_rgb(hsl: np.ndarray) -> np.ndarray:
+    """convert rows of HSL to RGB as colour.hsl2rgb does."""
+    hue, saturation, lightness = hsl.T
+    v_2 = np.where(lightness < 0.5, lightness * (1.0 + saturation),
+                   (lightness + saturation) - (saturation * lightness))
+    v_1 = 2.0 * lightness - v_2
+    rgb = np.stack([_hue_to_rgb(v_1, v_2, hue + (1.0 / 3)),
+                    _hue_to_rgb(v_1, v_2, hue),
+                    _hue_to_rgb(v_1, v_2, hue - (1.0 / 3))], axis=1)
+    gray = saturation == 0
+    rgb[gray] = lightness[gray, np.newaxis]
+    return rgb
+
+
+# sRGB primaries with D65 white point.
+_RGB_TO_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                        [0.2126729, 0.7151522, 0.0721750],
+                        [0.0193339, 0.1191920, 0.9503041]])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+_WHITE_XYZ = _RGB_TO_XYZ.sum(axis=1)
+_LAB_DELTA = 6.0 / 29
+
+
+def _rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """convert rows of sRGB to CIE Lab."""
+    linear = np.where(rgb <= 0.04045, rgb / 12.92,
+                      ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _RGB_TO_XYZ.T / _WHITE_XYZ
+    fxyz = np.where(xyz > _LAB_DELTA ** 3, np.cbrt(xyz),
+                    xyz / (3 * _LAB_DELTA ** 2) + 4.0 / 29)
+    return np.stack([116 * fxyz[:, 1] - 16,
+                     500 * (fxyz[:, 0] - fxyz[:, 1]),
+                     200 * (fxyz[:, 1] - fxyz[:, 2])], axis=1)
+
+
+def _lab_to_rgb(lab: np.ndarray) -> np.ndarray:
+    """convert rows of CIE Lab to sRGB clipped into [0, 1]."""
+    f_y = (lab[:, 0] + 16) / 116
+    fxyz = np.stack([f_y + lab[:, 1] / 500, f_y, f_y - lab[:, 2] / 200],
+                    axis=1)
+    xyz = np.where(fxyz > _LAB_DELTA, fxyz ** 3,
+                   3 * _LAB_DELTA ** 2 * (fxyz - 4.0 / 29)) * _WHITE_XYZ
+    linear = np.clip(xyz @ _XYZ_TO_RGB.T, 0.0, 1.0)
+    return np.where(linear <= 0.0031308, 12.92 * linear,
+                    1.055 * linear ** (1 / 2.4) - 0.055)
+
+
+def _interpolate(points: np.ndarray, count: int) -> np.ndarray:
+    """interpolate count rows over stops evenly.
+
+    Each row is begin + (end - begin) / (count - 1) * step of its segment
+    so that two stops give exactly colour.color_scale.
+    """
+    last = count - 1
+    if last == 0 or len(points) == 1:
+        return np.repeat(points[:1], count, axis=0)
+    position = np.arange(count) * (len(points) - 1)
+    segment = np.minimum(position // last, len(points) - 2)
+    begin = points[segment]
+    return begin + ((points[segment + 1] - begin) / last
+                    * (position - segment * last)[:, np.newaxis])
+
+
+def _to_hex(rgb: np.ndarray) -> List[str]:
+    """get '#rrggbb' rounded as colour.rgb2hex does."""
+    return ['#' + _HEX_BYTES[red] + _HEX_BYTES[green] + _HEX_BYTES[blue]
+            for red, green, blue in (rgb * 255 + 0.5 - FLOAT_ERROR)
+            .astype(int).tolist()]
+
+
+@lru_cache(maxsize=RAMP_CACHE_SIZE)
+def _ramp(stops: Tuple[str, ...], count: int, space: str) -> Tuple[str, ...]:
+    rgbs = [parse_color(stop) for stop in stops]
+    if space == 'hsl':
+        return tuple(_to_hex(_hsl_to_rgb(_interpolate(
+            np.array([_rgb_to_hsl(rgb) for rgb in rgbs]), count))))
+    if space == 'rgb':
+        return tuple(_to_hex(_interpolate(np.array(rgbs), count)))
+    return tuple(_to_hex(_lab_to_rgb(_interpolate(
+        _rgb_to_lab(np.array(rgbs)), count))))
+
+
+def color_ramp(stops: Sequence[str],
+               count: int,
+               space: str = 'hsl') -> List[str]:
+    """get count colors passing stops at even intervals.
 
-from colour import Color  # type: ignore
+    space is one of COLOR_SPACES to interpolate in; 'hsl' does not wrap
+    hue around.
+    """
+    if count < 1:
+        raise ValueError(
+            'Unsupported negative number of colors (nb={!r}).'.format(
+                count - 1))
+    if not stops:
+        raise ValueError('no color stops')
+    if space not in COLOR_SPACES:
+        raise ValueError('unknown color space: {}'.format(space))
+    return list(_ramp(tuple(stops), count, space))
 
 
-def color_range(start_color: str, goal_color: str, count: int) -> List[str]:
+def color_range(start_color: str,
+                goal_color: str,
+                count: int,
+                space: str = 'hsl') -> List[str]:
     """get color range."""
-    return [col.get_hex_l()
-            for col in Color(start_color).range_to(Color(goal_color), count)]
+    return color_ramp((start_color, goal_color), count, space)
@@ -1,3 +1,10 @@
-from typing import List
+from typing import Dict, List, Sequence, Tuple
 
-def color_range(start_color: str, goal_color: str, count: int) -> List[str]: ...
+FLOAT_ERROR: float
+RAMP_CACHE_SIZE: int
+COLOR_SPACES: Tuple[str, ...]
+COLOR_NAME_TO_RGB: Dict[str, Tuple[int, int, int]]
+
+def parse_color(color: str) -> Tuple[float, float, float]: ...
+def color_ramp(stops: Sequence[str], count: int, space: str=...) -> List[str]: ...
+def color_range(start_color: str, goal_color: str, count: int, space: str=...) -> List[str]: ...
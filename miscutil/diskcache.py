@@ -0,0 +1,232 @@
+"""On-disk memoization cache built on pickledump and pickleload."""
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+from typing import Union
+
+from contextlib import contextmanager
+from functools import wraps
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # not POSIX
+    fcntl = None  # type: ignore
+
+from miscutil.files import pickledump
+from miscutil.files import pickleload
+
+TTT = TypeVar('TTT')
+
+LOCK_STRIPES = 256
+KEY_PICKLE_PROTOCOL = 4
+
+
+def _canonical(obj: Any) -> Any:
+    """get form of obj pickled alike whatever hash seed or insertion order.
+
+    Elements of sets and items of dicts, recursively through lists and
+    tuples, are sorted by their pickled canonical forms.  Other objects
+    are pickled as they are, so sets inside them still make keys unstable.
+    """
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple(_canonical(elem) for elem in obj))
+    if isinstance(obj, (set, frozenset)):
+        return (type(obj), _sorted_canonicals(obj))
+    if isinstance(obj, dict):
+        return (type(obj), _sorted_canonicals(obj.items()))
+    return obj
+
+
+def _sorted_canonicals(elems: Iterable[Any]) -> Tuple[Any, ...]:
+    return tuple(sorted(
+        (_canonical(elem) for elem in elems),
+        key=lambda form: pickle.dumps(form, protocol=KEY_PICKLE_PROTOCOL)))
+
+
+class DiskCache:
+    """Content-addressed store of pickled results.
+
+    Entries are evicted in least recently used order once they exceed
+    max_bytes in total.  An entry stored more than max_age_in_sec ago is a
+    miss, however often it is read, and is evicted.  The modification time
+    of an entry is when it was stored, and hits set its access time.
+    Processes sharing the directory are serialized by file locks.
+    """
+    def __init__(self,
+                 directory: Union[str, Path],
+                 max_bytes: Optional[int] = None,
+                 max_age_in_sec: Optional[float] = None,
+                 suffix: str = '.pkl'):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_in_sec = max_age_in_sec
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_of(name: str,
+               args: Tuple[Any, ...],
+               kwargs: Dict[str, Any],
+               version: Optional[str] = None) -> str:
+        """get stable hash of qualified name, arguments and version salt.
+
+        Equal sets and dicts among the arguments give the same key across
+        processes; see _canonical.
+        """
+        return hashlib.sha256(pickle.dumps(
+            (name, _canonical(args), _canonical(kwargs), version),
+            protocol=KEY_PICKLE_PROTOCOL)).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / (key + self.suffix)
+
+    @contextmanager
+    def _locked(self, name: str) -> Iterator[None]:
+        """hold exclusive file lock of given name."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.directory / '.{}.lock'.format(name), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _key_lock(self, key: str) -> Any:
+        return self._locked('key{:02x}'.format(
+            int(key[:4], 16) % LOCK_STRIPES))
+
+    def load(self, key: str) -> Tuple[bool, Any]:
+        """load entry; (False, None) if it is missing, expired or broken."""
+        path = self._entry_path(key)
+        try:
+            stat = path.stat()
+            if (self.max_age_in_sec is not None and
+                    stat.st_mtime < time.time() - self.max_age_in_sec):
+                return False, None
+            value = pickleload(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        try:
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except OSError:
+            pass
+        return True, value
+
+    def store(self, key: str, value: Any) -> None:
+        """store entry atomically, then evict entries if needed."""
+        path = self._entry_path(key)
+        handle, tmp_path = tempfile.mkstemp(
+            dir=self.directory, prefix='.tmp-', suffix=self.suffix)
+        os.close(handle)
+        try:
+            pickledump(value, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if self.max_bytes is not None or self.max_age_in_sec is not None:
+            self.evict()
+
+    def get_or_compute(self, key: str, compute: Callable[[], TTT]) -> TTT:
+        """get cached value of key or compute and store it."""
+        found, value = self.load(key)
+        if found:
+            self.hits += 1
+            return value
+        with self._key_lock(key):
+            # Another process may have stored it while we waited.
+            found, value = self.load(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            value = compute()
+            self.store(key, value)
+            return value
+
+    def evict(self) -> int:
+        """evict old and least recently used entries; returns the count."""
+        with self._locked('store'):
+            entries = []
+            for path in self.directory.glob('*' + self.suffix):
+                if path.name.startswith('.'):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_mtime,
+                                stat.st_size, path))
+            entries.sort()
+            total = sum(entry[2] for entry in entries)
+            deadline = (None if self.max_age_in_sec is None else
+                        time.time() - self.max_age_in_sec)
+            count = 0
+            for _, mtime, size, path in entries:
+                if not ((deadline is not None and mtime < deadline) or
+                        (self.max_bytes is not None and
+                         total > self.max_bytes)):
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                count += 1
+        self.evictions += count
+        return count
+
+    def clear(self) -> None:
+        """remove all entries."""
+        with self._locked('store'):
+            for path in self.directory.glob('*' + self.suffix):
+                if not path.name.startswith('.'):
+                    path.unlink()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'directory': str(self.directory),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+
+def disk_memoize(
+        cache: Union[DiskCache, str, Path],
+        version: Optional[str] = None) -> Callable[[Callable[..., TTT]],
+                                                   Callable[..., TTT]]:
+    """memoize function results in DiskCache.
+
+    Entries are keyed by module and qualified name of the function, its
+    arguments and version, which should be changed when the function
+    changes its results.
+    """
+    store = cache if isinstance(cache, DiskCache) else DiskCache(cache)
+
+    def _decorate(func: Callable[..., TTT]) -> Callable[..., TTT]:
+        name = '{}.{}'.format(func.__module__, func.__qualname__)
+
+        @wraps(func)
+        def _memoized(*args: Any, **kwargs: Any) -> TTT:
+            return store.get_or_compute(
+                store.key_of(name, args, kwargs, version),
+                lambda: func(*args, **kwargs))
+        _memoized.cache = store  # type: ignore
+        return _memoized
+    return _decorate
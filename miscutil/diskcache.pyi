@@ -0,0 +1,27 @@
+from miscutil.files import pickledump as pickledump, pickleload as pickleload
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+TTT = TypeVar('TTT')
+LOCK_STRIPES: int
+KEY_PICKLE_PROTOCOL: int
+
+class DiskCache:
+    directory: Path = ...
+    max_bytes: Optional[int] = ...
+    max_age_in_sec: Optional[float] = ...
+    suffix: str = ...
+    hits: int = ...
+    misses: int = ...
+    evictions: int = ...
+    def __init__(self, directory: Union[str, Path], max_bytes: Optional[int]=..., max_age_in_sec: Optional[float]=..., suffix: str=...) -> None: ...
+    @staticmethod
+    def key_of(name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any], version: Optional[str]=...) -> str: ...
+    def load(self, key: str) -> Tuple[bool, Any]: ...
+    def store(self, key: str, value: Any) -> None: ...
+    def get_or_compute(self, key: str, compute: Callable[[], TTT]) -> TTT: ...
+    def evict(self) -> int: ...
+    def clear(self) -> None: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+def disk_memoize(cache: Union[DiskCache, str, Path], version: Optional[str]=...) -> Callable[[Callable[..., TTT]], Callable[..., TTT]]: ...
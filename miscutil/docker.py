@@ -1,16 +1,90 @@
 """Utilities for docker."""
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import NamedTuple
 from typing import Optional
+from typing import Pattern
+from typing import Set
+from typing import Tuple
 
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from functools import lru_cache
+from itertools import islice
+import os
+import queue
+import re
+import signal
+import subprocess
+import threading
+from time import monotonic
 from time import sleep
 
-from miscutil import conj
 from miscutil.subprocess import CommandResult
-from miscutil import disj
 from miscutil import ijoin
 from miscutil.subprocess import run_command
 
 
+class ReadinessMatcher:
+    """Precompiled check of a line containing all mandatory words."""
+    __slots__ = ['words', 'pattern']
+
+    def __init__(self, mandatory_words: List[str]):
+        self.words = tuple(mandatory_words)
+        self.pattern: Pattern[str] = re.compile(
+            '^' + ''.join('(?=.*{})'.format(re.escape(word))
+                          for word in self.words),
+            re.MULTILINE)
+
+    def matches(self, text: str) -> bool:
+        """check if any line of text contains all the words."""
+        # Words missing anywhere in text rule out every line at once.
+        if not all(word in text for word in self.words):
+            return False
+        return self.pattern.search(text) is not None
+
+    def matches_line(self, line: str) -> bool:
+        """check if line contains all the words."""
+        return all(word in line for word in self.words)
+
+
+@lru_cache(maxsize=64)
+def _matcher_of(mandatory_words: Tuple[str, ...]) -> ReadinessMatcher:
+    return ReadinessMatcher(list(mandatory_words))
+
+
+def _backoff_intervals(
+        initial_in_sec: float,
+        factor: float,
+        max_interval_in_sec: Optional[float]) -> Iterator[float]:
+    """generate intervals growing by factor up to max_interval_in_sec."""
+    interval = initial_in_sec
+    while True:
+        yield interval
+        interval *= factor
+        if max_interval_in_sec is not None:
+            interval = min(interval, max_interval_in_sec)
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """get seconds left until deadline on monotonic clock."""
+    return None if deadline is None else max(0.0, deadline - monotonic())
+
+
+def _put_lines(pipe, lines: "queue.Queue[Optional[str]]") -> None:
+    """put decoded lines of pipe to queue and None on EOF."""
+    try:
+        for line in iter(pipe.readline, b''):
+            lines.put(line.decode('utf8', 'replace'))
+    finally:
+        lines.put(None)
+
+
 class DockerCompose:
     """docker-compose invoker."""
     def __init__(self, on_directory: Optional[str] = None):
@@ -32,38 +106,116 @@ class DockerCompose:
             result: CommandResult,
             mandatory_words: List[str]) -> bool:
         """check if docker container is running normally."""
-        return disj(lambda line: conj(lambda word: word in line,
-                                      mandatory_words),
-                    result.stdout.split('\n'))
+        return _matcher_of(tuple(mandatory_words)).matches(result.stdout)
+
+    def _follow_until_ready(
+            self,
+            follow_args: List[str],
+            matcher: ReadinessMatcher,
+            deadline: Optional[float],
+            print_progress: bool) -> bool:
+        """follow output of docker-compose until a line matches.
+
+        False if the output ends or the deadline passes beforehand.
+        """
+        if print_progress:
+            print('dcs{}'.format(tuple(follow_args)))
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        with subprocess.Popen(list(ijoin('docker-compose', *follow_args)),
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT,
+                              cwd=self.on_directory,
+                              start_new_session=True) as process:
+            pump = threading.Thread(target=_put_lines,
+                                    args=(process.stdout, lines),
+                                    daemon=True)
+            pump.start()
+            try:
+                while True:
+                    try:
+                        line = lines.get(timeout=_remaining(deadline))
+                    except queue.Empty:
+                        return False
+                    if line is None:
+                        return False
+                    if matcher.matches_line(line):
+                        return True
+            finally:
+                # Kill the whole group so that no child keeps the pipe open.
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                pump.join()
 
-    def up_in_background(  # pylint: disable=too-many-arguments
+    def up_in_background(  # pylint: disable=too-many-arguments,too-many-locals
             self,
             cmd_args: List[str],
             mandatory_words: List[str],
-            max_count: int = 10,
+            max_count: Optional[int] = 10,
             check_interval_in_sec: float = 0.25,
-            print_progress: bool = False) -> CommandResult:
-        """Boot up service."""
+            print_progress: bool = False,
+            backoff_factor: float = 1.0,
+            max_interval_in_sec: Optional[float] = None,
+            deadline_in_sec: Optional[float] = None,
+            follow_args: Optional[List[str]] = None,
+            follow_words: Optional[List[str]] = None) -> CommandResult:
+        """Boot up service.
+
+        Readiness is checked by output of cmd_args containing all of
+        mandatory_words in a line, at most max_count times more after
+        intervals starting at check_interval_in_sec and multiplied by
+        backoff_factor up to max_interval_in_sec, within deadline_in_sec.
+        With follow_args, e.g. ['logs', '-f'] or ['events'], their output
+        is followed until a line contains all of follow_words
+        (mandatory_words by default) before the checks, within
+        deadline_in_sec or else the total of max_count intervals, one of
+        which is required then.
+        normal_end of the result is False unless the service gets ready.
+        """
+        if (follow_args is not None and deadline_in_sec is None and
+                max_count is None):
+            raise ValueError(
+                'follow_args requires deadline_in_sec or max_count')
         # Check if the docker container is already running.
         result = self.run_command(*cmd_args)
         if self._running_normally(result, mandatory_words):
             return result
 
+        deadline = (None if deadline_in_sec is None else
+                    monotonic() + deadline_in_sec)
         result = self.run_command('up', '-d', print_progress=print_progress)
         if not result.normal_end:
             return result
+        if follow_args is not None:
+            follow_deadline = deadline
+            if follow_deadline is None:
+                follow_deadline = monotonic() + sum(islice(
+                    _backoff_intervals(check_interval_in_sec, backoff_factor,
+                                       max_interval_in_sec),
+                    max_count))
+            self._follow_until_ready(
+                follow_args,
+                _matcher_of(tuple(mandatory_words if follow_words is None
+                                  else follow_words)),
+                follow_deadline, print_progress)
         result = self.run_command(*cmd_args)
-        timeout = max_count
-        while timeout > 0 and not self._running_normally(result,
-                                                         mandatory_words):
+        intervals = _backoff_intervals(
+            check_interval_in_sec, backoff_factor, max_interval_in_sec)
+        count = 0
+        while not self._running_normally(result, mandatory_words):
+            remaining = _remaining(deadline)
+            if ((max_count is not None and count >= max_count) or
+                    remaining == 0.0):
+                result.normal_end = False
+                break
+            count += 1
             if print_progress:
                 print('waiting container is ready ({}/{})...'.format(
-                    1 + max_count - timeout, max_count))
-            sleep(check_interval_in_sec)
-            timeout -= 1
+                    count, max_count))
+            interval = next(intervals)
+            sleep(interval if remaining is None else min(interval, remaining))
             result = self.run_command(*cmd_args)
-        if timeout <= 0:
-            result.normal_end = False
         if print_progress:
             print('{}'.format(result))
         return result
@@ -71,3 +223,132 @@ class DockerCompose:
     def down(self, print_progress: bool = False) -> CommandResult:
         """Shut down service."""
         return self.run_command('down', print_progress=print_progress)
+
+
+class ComposeProject(NamedTuple):
+    """Project of DockerComposeGroup.
+
+    cmd_args and mandatory_words are those of up_in_background, to which
+    up_options are also passed.  The project is brought up after all the
+    projects named in depends_on get ready.
+    """
+    name: str
+    on_directory: str
+    cmd_args: List[str]
+    mandatory_words: List[str]
+    depends_on: Tuple[str, ...] = ()
+    up_options: Optional[Dict[str, Any]] = None
+
+
+def _check_dependencies(projects: Dict[str, ComposeProject]) -> None:
+    """raise ValueError on unknown or cyclic dependencies."""
+    for project in projects.values():
+        for name in project.depends_on:
+            if name not in projects:
+                raise ValueError('{} depends on unknown project {}'.format(
+                    project.name, name))
+    waiting = {name: set(project.depends_on)
+               for name, project in projects.items()}
+    while waiting:
+        ready = [name for name, deps in waiting.items() if not deps]
+        if not ready:
+            raise ValueError('cyclic dependencies among {}'.format(
+                sorted(waiting)))
+        for name in ready:
+            del waiting[name]
+        for deps in waiting.values():
+            deps.difference_update(ready)
+
+
+class DockerComposeGroup:
+    """Projects of docker-compose brought up concurrently.
+
+    Independent projects are brought up at once by up_in_background and
+    the others as soon as their dependencies get ready; projects depending
+    on one failing to get ready are left in skipped.  started lists the
+    projects brought up so far, even if bringing them up raised.  As a
+    context manager, all the projects are brought up on entry and the
+    started ones are shut down in parallel on exit.
+    """
+    def __init__(self,
+                 projects: Iterable[ComposeProject],
+                 max_workers: Optional[int] = None,
+                 print_progress: bool = False):
+        self.projects = {project.name: project for project in projects}
+        _check_dependencies(self.projects)
+        self.max_workers = max_workers or max(1, len(self.projects))
+        self.print_progress = print_progress
+        self.results: Dict[str, CommandResult] = {}
+        self.skipped: List[str] = []
+        self.started: List[str] = []
+
+    def _up_one(self, project: ComposeProject) -> CommandResult:
+        return DockerCompose(project.on_directory).up_in_background(
+            project.cmd_args, project.mandatory_words,
+            print_progress=self.print_progress,
+            **(project.up_options or {}))
+
+    def _down_one(self, project: ComposeProject) -> CommandResult:
+        return DockerCompose(project.on_directory).down(
+            print_progress=self.print_progress)
+
+    def up(self) -> Iterator[Tuple[str, CommandResult]]:
+        """bring up projects yielding name and result as each one ends."""
+        waiting: Dict[str, Set[str]] = {
+            name: set(project.depends_on)
+            for name, project in self.projects.items()}
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            while True:
+                for name in [name for name, deps in waiting.items()
+                             if not deps]:
+                    del waiting[name]
+                    self.started.append(name)
+                    running[executor.submit(
+                        self._up_one, self.projects[name])] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = self.results[name] = future.result()
+                    if result.normal_end:
+                        for deps in waiting.values():
+                            deps.discard(name)
+                    if self.print_progress:
+                        print('{}: {}'.format(
+                            name, 'ready' if result.normal_end else 'failed'))
+                    yield name, result
+        self.skipped = sorted(waiting)
+
+    @property
+    def ready(self) -> bool:
+        """check if all the projects got ready."""
+        return (len(self.results) == len(self.projects) and
+                all(result.normal_end for result in self.results.values()))
+
+    def down(self) -> Dict[str, CommandResult]:
+        """shut down the started projects in parallel."""
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            downs = dict(zip(self.started, executor.map(
+                self._down_one,
+                [self.projects[name] for name in self.started])))
+        if self.print_progress:
+            for name, result in downs.items():
+                print('{}: down{}'.format(
+                    name, '' if result.normal_end else ' failed'))
+        self.results = {}
+        self.started = []
+        return downs
+
+    def __enter__(self) -> "DockerComposeGroup":
+        try:
+            for _ in self.up():
+                pass
+        except BaseException:
+            self.down()
+            raise
+        return self
+
+    def __exit__(self, status, ex_str, traceback_info) -> None:
+        self.down()
@@ -1,10 +1,40 @@
-from miscutil import conj as conj, disj as disj, ijoin as ijoin
+from miscutil import ijoin as ijoin
 from miscutil.subprocess import CommandResult as CommandResult, run_command as run_command
-from typing import Any, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+class ReadinessMatcher:
+    words: Tuple[str, ...] = ...
+    pattern: Pattern[str] = ...
+    def __init__(self, mandatory_words: List[str]) -> None: ...
+    def matches(self, text: str) -> bool: ...
+    def matches_line(self, line: str) -> bool: ...
 
 class DockerCompose:
     on_directory: Any = ...
     def __init__(self, on_directory: Optional[str]=...) -> None: ...
     def run_command(self, *args: str, print_progress: bool=...) -> CommandResult: ...
-    def up_in_background(self, cmd_args: List[str], mandatory_words: List[str], max_count: int=..., check_interval_in_sec: float=..., print_progress: bool=...) -> CommandResult: ...
+    def up_in_background(self, cmd_args: List[str], mandatory_words: List[str], max_count: Optional[int]=..., check_interval_in_sec: float=..., print_progress: bool=..., backoff_factor: float=..., max_interval_in_sec: Optional[float]=..., deadline_in_sec: Optional[float]=..., follow_args: Optional[List[str]]=..., follow_words: Optional[List[str]]=...) -> CommandResult: ...
     def down(self, print_progress: bool=...) -> CommandResult: ...
+
+class ComposeProject(NamedTuple):
+    name: str
+    on_directory: str
+    cmd_args: List[str]
+    mandatory_words: List[str]
+    depends_on: Tuple[str, ...] = ...
+    up_options: Optional[Dict[str, Any]] = ...
+
+class DockerComposeGroup:
+    projects: Dict[str, ComposeProject] = ...
+    max_workers: int = ...
+    print_progress: bool = ...
+    results: Dict[str, CommandResult] = ...
+    skipped: List[str] = ...
+    started: List[str] = ...
+    def __init__(self, projects: Iterable[ComposeProject], max_workers: Optional[int]=..., print_progress: bool=...) -> None: ...
+    def up(self) -> Iterator[Tuple[str, CommandResult]]: ...
+    @property
+    def ready(self) -> bool: ...
+    def down(self) -> Dict[str, CommandResult]: ...
+    def __enter__(self) -> DockerComposeGroup: ...
+    def __exit__(self, status: Any, ex_str: Any, traceback_info: Any) -> None: ...
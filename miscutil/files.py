@@ -1,38 +1,358 @@
 """File related uttilities."""
 from typing import Any
 from typing import Callable
+from typing import Deque
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
 from typing import Union
 
+import bz2
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from contextlib import redirect_stderr
 from contextlib import redirect_stdout
 import gzip
+import io
 from io import StringIO
+import lzma
+import mmap
+import os
+from os import cpu_count
 from os import devnull
+from os import fstat
 from pathlib import Path
 import pickle
+import struct
 import sys
+import threading
+import zlib
 
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame  # type: ignore
+except ImportError:
+    lz4 = None
 
-def pickledump(obj: Any, filename: Union[str, Path]) -> None:
-    """dump object to pickle file."""
+PICKLE_BLOCK_SIZE = 4 << 20
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+BUFFER_FILE_SUFFIX = '.buffers'
+BUFFER_ALIGNMENT = 64
+FD_READER_TIMEOUT_IN_SEC = 1.0
+
+
+class _Codec(NamedTuple):
+    """Compression codec of pickle files."""
+    compress: Callable[[bytes, Optional[int]], bytes]
+    open_to_read: Callable[[Any], Any]
+
+
+# gzip members written by pickledump carry their own size in extra field
+# subfield 'MU', so that pickleload can find and inflate them in parallel.
+_GZIP_SUBFIELD = b'MU'
+_GZIP_HEADER = struct.Struct('<4sIBBH2sHI')
+_GZIP_TRAILER = struct.Struct('<II')
+
+
+def _gzip_compress(data: Any, level: Optional[int]) -> bytes:
+    """compress data into a gzip member having its size in extra field."""
+    compressor = zlib.compressobj(9 if level is None else level,
+                                  zlib.DEFLATED, -zlib.MAX_WBITS)
+    body = compressor.compress(data) + compressor.flush()
+    member_size = _GZIP_HEADER.size + len(body) + _GZIP_TRAILER.size
+    return b''.join((
+        _GZIP_HEADER.pack(b'\x1f\x8b\x08\x04', 0, 0, 255, 8,
+                          _GZIP_SUBFIELD, 4, member_size),
+        body,
+        _GZIP_TRAILER.pack(zlib.crc32(data), len(data) & 0xffffffff)))
+
+
+def _gzip_member_size(header: bytes) -> Optional[int]:
+    """get member size from header written by _gzip_compress."""
+    if len(header) < _GZIP_HEADER.size:
+        return None
+    magic, _, _, _, xlen, subfield, slen, member_size = (
+        _GZIP_HEADER.unpack_from(header))
+    if (magic != b'\x1f\x8b\x08\x04' or xlen != 8 or
+            subfield != _GZIP_SUBFIELD or slen != 4):
+        return None
+    return member_size
+
+
+def _gzip_decompress(member: bytes) -> bytes:
+    """inflate gzip member written by _gzip_compress."""
+    try:
+        data = zlib.decompress(
+            member[_GZIP_HEADER.size:-_GZIP_TRAILER.size], -zlib.MAX_WBITS)
+    except zlib.error as ex:
+        raise OSError('invalid gzip member: {}'.format(ex)) from ex
+    crc, size = _GZIP_TRAILER.unpack_from(member, len(member)
+                                          - _GZIP_TRAILER.size)
+    if crc != zlib.crc32(data) or size != len(data) & 0xffffffff:
+        raise OSError('CRC check failed in gzip member')
+    return data
+
+
+def _zstd_compress(data: bytes, level: Optional[int]) -> bytes:
+    return zstandard.ZstdCompressor(
+        level=3 if level is None else level).compress(data)
+
+
+def _zstd_open(filestream: Any) -> Any:
+    return zstandard.ZstdDecompressor().stream_reader(
+        filestream, read_across_frames=True)
+
+
+def _lz4_compress(data: bytes, level: Optional[int]) -> bytes:
+    return lz4.frame.compress(data, compression_level=(
+        0 if level is None else level))
+
+
+def _codec_of(filename: str) -> Optional[_Codec]:
+    """get codec from suffix of filename; None for plain pickle."""
+    suffix = Path(filename).suffix
+    if suffix == '.gz':
+        return _Codec(_gzip_compress,
+                      lambda filestream: gzip.GzipFile(fileobj=filestream))
+    if suffix == '.bz2':
+        return _Codec(lambda data, level: bz2.compress(
+            data, 9 if level is None else level), bz2.BZ2File)
+    if suffix == '.xz':
+        return _Codec(lambda data, level: lzma.compress(
+            data, preset=level), lzma.LZMAFile)
+    if suffix == '.zst':
+        if zstandard is None:
+            raise ImportError('zstandard is required for {}'.format(filename))
+        return _Codec(_zstd_compress, _zstd_open)
+    if suffix == '.lz4':
+        if lz4 is None:
+            raise ImportError('lz4 is required for {}'.format(filename))
+        return _Codec(_lz4_compress, lz4.frame.LZ4FrameFile)
+    return None
+
+
+class _BlockCompressingWriter(io.RawIOBase):
+    """Writer compressing every block independently on a thread pool.
+
+    Compressed blocks are written in order as concatenated members (or
+    streams or frames), which every codec here reads as one stream.
+    """
+    def __init__(self,
+                 filestream: Any,
+                 compress: Callable[[bytes], bytes],
+                 threads: int):
+        super().__init__()
+        self._filestream = filestream
+        self._compress = compress
+        self._threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Deque[Future] = deque()
+        self._block = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        view = memoryview(data).cast('B')
+        size = len(view)
+        if self._block:
+            room = PICKLE_BLOCK_SIZE - len(self._block)
+            self._block += view[:room]
+            view = view[room:]
+            if len(self._block) < PICKLE_BLOCK_SIZE:
+                return size
+            self._submit(bytes(self._block))
+            self._block = bytearray()
+        # Whole blocks of large buffers such as ndarrays are compressed
+        # without copying.
+        while len(view) >= PICKLE_BLOCK_SIZE:
+            self._submit(view[:PICKLE_BLOCK_SIZE])
+            view = view[PICKLE_BLOCK_SIZE:]
+        self._block += view
+        return size
+
+    def _submit(self, block: Any) -> None:
+        if self._threads <= 1:
+            self._filestream.write(self._compress(block))
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._threads)
+        self._pending.append(self._executor.submit(self._compress, block))
+        while len(self._pending) > 2 * self._threads:
+            self._filestream.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._block:
+                self._submit(bytes(self._block))
+                self._block = bytearray()
+            while self._pending:
+                self._filestream.write(self._pending.popleft().result())
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            super().close()
+
+
+def _gzip_blocks(filestream: Any, threads: int) -> Iterator[bytes]:
+    """inflate gzip members written by pickledump, in parallel."""
+    def _members() -> Iterator[bytes]:
+        while True:
+            header = filestream.read(_GZIP_HEADER.size)
+            if not header:
+                return
+            member_size = _gzip_member_size(header)
+            if member_size is None:
+                raise OSError('unexpected gzip member')
+            member = header + filestream.read(member_size - len(header))
+            if len(member) < member_size:
+                raise EOFError('Compressed file ended before the '
+                               'end-of-stream marker was reached')
+            yield member
+
+    if threads <= 1:
+        yield from map(_gzip_decompress, _members())
+        return
+    with ThreadPoolExecutor(threads) as executor:
+        pending: Deque[Future] = deque()
+        for member in _members():
+            pending.append(executor.submit(_gzip_decompress, member))
+            if len(pending) > 2 * threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _BlockReader(io.RawIOBase):
+    """Reader over an iterator of decompressed blocks."""
+    def __init__(self, blocks: Iterator[bytes]):
+        super().__init__()
+        self._blocks = blocks
+        self._block = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._block:
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._block = memoryview(block)
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+    def close(self) -> None:
+        close_blocks = getattr(self._blocks, 'close', None)
+        if close_blocks is not None:
+            close_blocks()
+        super().close()
+
+
+def pickledump(obj: Any,
+               filename: Union[str, Path],
+               compresslevel: Optional[int] = None,
+               protocol: int = PICKLE_PROTOCOL,
+               threads: Optional[int] = None) -> None:
+    """dump object to pickle file.
+
+    Codec is chosen by suffix: .gz, .bz2, .xz, and .zst or .lz4 if
+    zstandard or lz4 is installed.  Blocks of PICKLE_BLOCK_SIZE bytes are
+    compressed in parallel on `threads` threads (cpu count by default).
+    """
     filename_ = str(filename)
-    if filename_.endswith(".gz"):
-        with gzip.open(filename_, 'wb') as filestream:
-            pickle.dump(obj, filestream)
+    codec = _codec_of(filename_)
+    if codec is None:
+        with open(filename_, 'wb') as filestream:
+            pickle.dump(obj, filestream, protocol=protocol)
         return
     with open(filename_, 'wb') as filestream:
-        pickle.dump(obj, filestream)
+        with _BlockCompressingWriter(
+                filestream,
+                lambda block: codec.compress(block, compresslevel),
+                threads or cpu_count() or 1) as writer:
+            pickle.dump(obj, writer, protocol=protocol)
+
 
+def pickleload(filename: Union[str, Path],
+               threads: Optional[int] = None) -> Any:
+    """load object from pickle file.
 
-def pickleload(filename: Union[str, Path]) -> Any:
-    """load object from pickle file."""
+    gzip files written by pickledump are inflated in parallel on
+    `threads` threads (cpu count by default).
+    """
     filename_ = str(filename)
-    if filename_.endswith(".gz"):
-        with gzip.open(filename_, 'rb') as filestream:
-            return pickle.load(filestream)
+    codec = _codec_of(filename_)
     with open(filename_, 'rb') as filestream:
-        return pickle.load(filestream)
+        if codec is None:
+            return pickle.load(filestream)
+        if (codec.compress is _gzip_compress and
+                _gzip_member_size(filestream.peek(_GZIP_HEADER.size))
+                is not None):
+            blocks = _gzip_blocks(filestream, threads or cpu_count() or 1)
+            with io.BufferedReader(_BlockReader(blocks),
+                                   PICKLE_BLOCK_SIZE) as reader:
+                return pickle.load(reader)
+        with codec.open_to_read(filestream) as reader:
+            return pickle.load(reader)
+
+
+def _buffer_file_of(filename: Union[str, Path]) -> str:
+    return str(filename) + BUFFER_FILE_SUFFIX
+
+
+def pickledump_split(obj: Any,
+                     filename: Union[str, Path],
+                     compresslevel: Optional[int] = None) -> None:
+    """dump object to pickle skeleton and raw buffer file.
+
+    Out-of-band buffers of pickle protocol 5 such as data of ndarrays are
+    written uncompressed and aligned to `filename` + BUFFER_FILE_SUFFIX,
+    while the rest is written to `filename` by pickledump.
+    """
+    layout: List[Any] = []
+    with open(_buffer_file_of(filename), 'wb') as filestream:
+        def _put_buffer(buffer: pickle.PickleBuffer) -> None:
+            padding = -filestream.tell() % BUFFER_ALIGNMENT
+            filestream.write(b'\0' * padding)
+            with buffer.raw() as raw:
+                layout.append((filestream.tell(), raw.nbytes))
+                filestream.write(raw)
+        skeleton = pickle.dumps(obj, protocol=5, buffer_callback=_put_buffer)
+    pickledump({'skeleton': skeleton, 'buffers': layout}, filename,
+               compresslevel=compresslevel)
+
+
+def pickleload_split(filename: Union[str, Path],
+                     use_mmap: bool = True) -> Any:
+    """load object dumped by pickledump_split.
+
+    With use_mmap, the buffer file is memory-mapped and ndarrays become
+    read-only views on it, which processes mapping the same file share.
+    """
+    record = pickleload(filename)
+    layout = record['buffers']
+    if not layout:
+        return pickle.loads(record['skeleton'])
+    with open(_buffer_file_of(filename), 'rb') as filestream:
+        # A file of empty buffers only cannot be memory-mapped.
+        if use_mmap and fstat(filestream.fileno()).st_size > 0:
+            whole: Any = memoryview(mmap.mmap(
+                filestream.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            whole = memoryview(filestream.read())
+    return pickle.loads(record['skeleton'], buffers=[
+        whole[offset:offset + size] for offset, size in layout])
 
 
 @contextmanager
@@ -51,19 +371,130 @@ def suppress_stderr_only():
             yield err
 
 
+class StderrLineFilter(io.TextIOBase):
+    """Writer forwarding each completed line unless it is suppressed.
+
+    What is_line_to_be_suppressed itself writes, e.g. by warnings.warn
+    while sys.stderr is this filter, goes to destination as it is.
+    """
+    def __init__(self,
+                 is_line_to_be_suppressed: Callable[[str, str], bool],
+                 destination: Any):
+        super().__init__()
+        self._is_line_to_be_suppressed = is_line_to_be_suppressed
+        self._destination = destination
+        self._partial = ''
+        self._prev = ''
+        self._lock = threading.RLock()
+        self._feeding = False
+        self.suppressed_count = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            # Only the thread feeding a line can see it set here.
+            if self._feeding:
+                self._destination.write(text)
+                self._destination.flush()
+                return len(text)
+            lines = (self._partial + text).split('\n')
+            self._partial = lines.pop()
+            for line in lines:
+                self._feed(line)
+        return len(text)
+
+    def _feed(self, line: str) -> None:
+        self._feeding = True
+        try:
+            if self._is_line_to_be_suppressed(line, self._prev):
+                self.suppressed_count += 1
+                return
+            print(line, file=self._destination, flush=True)
+        finally:
+            self._feeding = False
+            self._prev = line
+
+    def finish(self) -> None:
+        """feed the last line lacking line break."""
+        with self._lock:
+            if self._partial:
+                self._feed(self._partial)
+                self._partial = ''
+
+
+def _pump_lines(read_fd: int,
+                line_filter: StderrLineFilter,
+                destination: Any) -> None:
+    """feed what is written to pipe to line filter until EOF.
+
+    destination of line_filter is closed at the end.
+    """
+    try:
+        with open(read_fd, 'r', errors='replace', closefd=True) as reader:
+            for text in iter(reader.readline, ''):
+                line_filter.write(text)
+        line_filter.finish()
+    finally:
+        destination.close()
+
+
 @contextmanager
-def filter_stderr(is_line_to_be_suppressed: Callable[[str, str], bool]):
-    """filter stderr."""
-    output = StringIO()
+def filter_stderr(is_line_to_be_suppressed: Callable[[str, str], bool],
+                  streaming: bool = False,
+                  capture_fd: bool = False):
+    """filter stderr.
+
+    By default lines are filtered when the block exits.  With streaming,
+    each line is filtered and forwarded as soon as it completes, and the
+    StderrLineFilter counting suppressed lines is yielded.  capture_fd
+    implies streaming and also filters what C extensions write to file
+    descriptor 2, through a pipe and a reader thread.  The block waits for
+    the reader at most FD_READER_TIMEOUT_IN_SEC after it exits, as child
+    processes started in it may keep descriptor 2.
+    """
+    if not (streaming or capture_fd):
+        output = StringIO()
+        try:
+            with redirect_stderr(output) as err:
+                yield err
+        finally:
+            prev = ''
+            for line in output.getvalue().split('\n'):
+                try:
+                    if is_line_to_be_suppressed(line, prev):
+                        continue
+                    print(line, file=sys.stderr)
+                finally:
+                    prev = line
+        return
+    if not capture_fd:
+        line_filter = StderrLineFilter(is_line_to_be_suppressed, sys.stderr)
+        try:
+            with redirect_stderr(line_filter):
+                yield line_filter
+        finally:
+            line_filter.finish()
+        return
+    sys.stderr.flush()
+    saved_fd = os.dup(2)
+    destination = open(  # pylint: disable=consider-using-with
+        os.dup(saved_fd), 'w', buffering=1)
+    line_filter = StderrLineFilter(is_line_to_be_suppressed, destination)
+    read_fd, write_fd = os.pipe()
+    reader = threading.Thread(target=_pump_lines,
+                              args=(read_fd, line_filter, destination),
+                              daemon=True)
+    reader.start()
+    os.dup2(write_fd, 2)
+    os.close(write_fd)
     try:
-        with redirect_stderr(output) as err:
-            yield err
+        with redirect_stderr(line_filter):
+            yield line_filter
     finally:
-        prev = ''
-        for line in output.getvalue().split('\n'):
-            try:
-                if is_line_to_be_suppressed(line, prev):
-                    continue
-                print(line, file=sys.stderr)
-            finally:
-                prev = line
+        os.dup2(saved_fd, 2)
+        os.close(saved_fd)
+        # A child process started in the block may still hold the pipe;
+        # the reader then keeps filtering its output in background.
+        reader.join(FD_READER_TIMEOUT_IN_SEC)
@@ -1,8 +1,24 @@
 from pathlib import Path
-from typing import Any, Callable, Union
+import io
+from typing import Any, Callable, Optional, Union
 
-def pickledump(obj: Any, filename: Union[str, Path]) -> None: ...
-def pickleload(filename: Union[str, Path]) -> Any: ...
+PICKLE_BLOCK_SIZE: int
+PICKLE_PROTOCOL: int
+BUFFER_FILE_SUFFIX: str
+BUFFER_ALIGNMENT: int
+FD_READER_TIMEOUT_IN_SEC: float
+
+def pickledump(obj: Any, filename: Union[str, Path], compresslevel: Optional[int]=..., protocol: int=..., threads: Optional[int]=...) -> None: ...
+def pickleload(filename: Union[str, Path], threads: Optional[int]=...) -> Any: ...
+def pickledump_split(obj: Any, filename: Union[str, Path], compresslevel: Optional[int]=...) -> None: ...
+def pickleload_split(filename: Union[str, Path], use_mmap: bool=...) -> Any: ...
 def suppress_stdout_stderr() -> None: ...
 def suppress_stderr_only() -> None: ...
-def filter_stderr(is_line_to_be_suppressed: Callable[[str, str], bool]) -> Any: ...
+class StderrLineFilter(io.TextIOBase):
+    suppressed_count: int = ...
+    def __init__(self, is_line_to_be_suppressed: Callable[[str, str], bool], destination: Any) -> None: ...
+    def writable(self) -> bool: ...
+    def write(self, text: str) -> int: ...
+    def finish(self) -> None: ...
+
+def filter_stderr(is_line_to_be_suppressed: Callable[[str, str], bool], streaming: bool=..., capture_fd: bool=...) -> Any: ...
@@ -0,0 +1,98 @@
+"""NaN aware statistics vectorized for arrays."""
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+
+from math import isnan
+import statistics
+
+import numpy as np  # type: ignore
+
+from miscutil import number
+from miscutil.number import NAN
+from miscutil.number import nan_if_error
+
+
+def _as_float_array(nums: Any) -> Optional[np.ndarray]:
+    """view ndarray or buffer protocol object as float array if possible."""
+    if isinstance(nums, np.ndarray):
+        return nums.astype(float, copy=False)
+    try:
+        view = memoryview(nums)
+    except TypeError:
+        return None
+    return np.asarray(view).astype(float, copy=False)
+
+
+def _non_nan_array(nums: Iterable[float]) -> np.ndarray:
+    """get float array without NaN; converts plain iterables only once."""
+    arr = _as_float_array(nums)
+    if arr is None:
+        arr = np.fromiter(nums, dtype=float)
+    return arr[~np.isnan(arr)]
+
+
+def _streaming_nnan(nums: Iterable[float]) -> Iterable[float]:
+    """omit NaN lazily without wrapping in DupableIterable."""
+    return (num for num in nums if not isnan(num))
+
+
+def nnan(nums: Iterable[float]) -> Iterable[float]:
+    """omit NaN from float numbers.
+
+    ndarray and buffer protocol objects are filtered at once into ndarray.
+    """
+    arr = _as_float_array(nums)
+    if arr is None:
+        return number.nnan(nums)
+    return arr[~np.isnan(arr)]
+
+
+def _reduce(nums: Iterable[float],
+            on_array: Callable[[np.ndarray], Any],
+            on_stream: Callable[[Iterable[float]], float]) -> float:
+    """reduce non-NaN numbers in vectorized way if possible."""
+    def _run(nums: Iterable[float]) -> float:
+        arr = _as_float_array(nums)
+        if arr is None:
+            return on_stream(_streaming_nnan(nums))
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return NAN
+        return float(on_array(arr))
+    return nan_if_error(_run, nums)
+
+
+def safe_max(nums: Iterable[float]) -> float:
+    """max of non-NaN numbers; nan instead of raising an exception."""
+    return _reduce(nums, np.max, lambda es: max(es, default=NAN))
+
+
+def safe_min(nums: Iterable[float]) -> float:
+    """min of non-NaN numbers; nan instead of raising an exception."""
+    return _reduce(nums, np.min, lambda es: min(es, default=NAN))
+
+
+def safe_mean(nums: Iterable[float]) -> float:
+    """mean of non-NaN numbers; nan instead of raising an exception."""
+    return _reduce(nums, np.mean, statistics.fmean)
+
+
+def safe_median(nums: Iterable[float]) -> float:
+    """median of non-NaN numbers; nan instead of raising an exception."""
+    return safe_percentile(nums, 50.0)
+
+
+def safe_percentile(nums: Iterable[float], percent: float) -> float:
+    """percentile of non-NaN numbers; nan instead of raising an exception.
+
+    percent is in [0, 100] and numbers are linearly interpolated as
+    numpy.percentile does.
+    """
+    def _run(nums: Iterable[float]) -> float:
+        arr = _non_nan_array(nums)
+        if arr.size == 0:
+            return NAN
+        return float(np.percentile(arr, percent))
+    return nan_if_error(_run, nums)
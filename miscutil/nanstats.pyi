@@ -0,0 +1,11 @@
+from miscutil import number as number
+from miscutil.number import NAN as NAN
+from miscutil.number import nan_if_error as nan_if_error
+from typing import Iterable
+
+def nnan(nums: Iterable[float]) -> Iterable[float]: ...
+def safe_max(nums: Iterable[float]) -> float: ...
+def safe_min(nums: Iterable[float]) -> float: ...
+def safe_mean(nums: Iterable[float]) -> float: ...
+def safe_median(nums: Iterable[float]) -> float: ...
+def safe_percentile(nums: Iterable[float], percent: float) -> float: ...
@@ -3,9 +3,7 @@ from typing import Any
 from typing import Callable
 from typing import Iterable
 
-import statistics
-
-import numpy as np  # type: ignore
+from math import isnan
 
 from miscutil import DupableIterable
 
@@ -15,14 +13,14 @@ NAN = float('nan')
 
 def nnan(nums: Iterable[float]) -> Iterable[float]:
     """omit NaN from float numbers."""
-    return DupableIterable(num for num in nums if not np.isnan(num))
+    return DupableIterable(num for num in nums if not isnan(num))
 
 
 def nan_if_error(func: Callable[[Any], float], data: Any) -> float:
     """function wrapper to convert exception to nan emission."""
     try:
         return func(data)
-    except (statistics.StatisticsError, ValueError):
+    except ValueError:  # including statistics.StatisticsError
         return NAN
 
 
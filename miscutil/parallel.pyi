@@ -0,0 +1,9 @@
+from miscutil import to_end as to_end
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+TTT = TypeVar('TTT')
+TTT2 = TypeVar('TTT2')
+
+def pimap(func: Callable[[TTT], TTT2], elems: Iterable[TTT], max_workers: Optional[int]=..., use_processes: bool=..., chunk_size: int=..., prefetch: Optional[int]=..., ordered: bool=...) -> Iterator[TTT2]: ...
+def pmap(func: Callable[[TTT], TTT2], elems: Iterable[TTT], max_workers: Optional[int]=..., use_processes: bool=..., chunk_size: int=..., prefetch: Optional[int]=..., ordered: bool=...) -> List[TTT2]: ...
+def benchmark(count: int=..., max_workers: Optional[int]=...) -> Dict[str, Any]: ...
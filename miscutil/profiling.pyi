@@ -0,0 +1,42 @@
+from miscutil.number import NAN as NAN
+from miscutil.subprocess import Duration as Duration
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+TTT = TypeVar('TTT')
+LABEL_SEPARATOR: str
+HISTOGRAM_STEPS_PER_OCTAVE: int
+
+class TimingStats:
+    count: int = ...
+    total_ns: int = ...
+    cpu_ns: int = ...
+    min_ns: int = ...
+    max_ns: int = ...
+    buckets: Dict[int, int] = ...
+    def __init__(self) -> None: ...
+    def add(self, elapsed_ns: int, cpu_ns: int=...) -> TimingStats: ...
+    def merge(self, other: TimingStats) -> TimingStats: ...
+    def quantile_ns(self, q: float) -> float: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+class Profiler:
+    enabled: bool = ...
+    stats: Dict[str, TimingStats] = ...
+    def __init__(self, enabled: bool=...) -> None: ...
+    def timer(self, label: str) -> Timer: ...
+    def record(self, label: str, elapsed_ns: int, cpu_ns: int=...) -> None: ...
+    def reset(self) -> None: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+PROFILER: Profiler
+
+class Timer(Duration):
+    label: str = ...
+    profiler: Profiler = ...
+    path: str = ...
+    def __init__(self, label: str, profiler: Optional[Profiler]=...) -> None: ...
+    def __enter__(self) -> Timer: ...
+    def __exit__(self, status: Any, ex_str: Any, traceback_info: Any) -> None: ...
+    def __call__(self, func: Callable[..., TTT]) -> Callable[..., TTT]: ...
+
+def timer(label: str) -> Timer: ...
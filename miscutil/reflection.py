@@ -1,9 +1,87 @@
 """reflection related utilities."""
 from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
 
 import importlib
+import sys
+import threading
+from time import perf_counter_ns
+
+_RESOLVED: Dict[str, Any] = {}
+_IMPORT_NS: Dict[str, int] = {}
+
+
+def _import(module_name: str) -> Any:
+    """import module recording time of its first import.
+
+    importlib.import_module is called even for modules in sys.modules, so
+    that an import in progress on another thread is waited for.
+    """
+    if module_name in sys.modules:
+        return importlib.import_module(module_name)
+    start = perf_counter_ns()
+    module = importlib.import_module(module_name)
+    _IMPORT_NS.setdefault(module_name, perf_counter_ns() - start)
+    return module
 
 
 def get_module(fully_qualified_name: str) -> Any:
-    """get module."""
-    return importlib.import_module(fully_qualified_name)
+    """get module, or its attribute by 'package.module:Class.attr'.
+
+    Resolved objects are cached by name.
+    """
+    try:
+        return _RESOLVED[fully_qualified_name]
+    except KeyError:
+        pass
+    module_name, _, attr_path = fully_qualified_name.partition(':')
+    obj = _import(module_name)
+    for attr_name in attr_path.split('.') if attr_path else []:
+        obj = getattr(obj, attr_name)
+    _RESOLVED[fully_qualified_name] = obj
+    return obj
+
+
+def prefetch(names: Iterable[str]) -> Dict[str, Exception]:
+    """resolve names in advance; get exceptions by name failing.
+
+    get_module raises them again when it is called for those names.
+    """
+    failures: Dict[str, Exception] = {}
+    for name in names:
+        try:
+            get_module(name)
+        except Exception as ex:  # pylint: disable=broad-except
+            failures[name] = ex
+    return failures
+
+
+def prefetch_in_background(names: Iterable[str]) -> threading.Thread:
+    """start daemon thread to prefetch names, e.g. while starting up."""
+    thread = threading.Thread(target=prefetch, args=(list(names),),
+                              name='prefetch-modules', daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times() -> Dict[str, float]:
+    """get seconds of imports by get_module, slowest first.
+
+    The time of a module includes the imports it triggers first.
+    """
+    return {name: elapsed_ns / 1e9
+            for name, elapsed_ns in sorted(_IMPORT_NS.items(),
+                                           key=lambda item: -item[1])}
+
+
+def resolved_names() -> List[str]:
+    """get names cached by get_module."""
+    return list(_RESOLVED)
+
+
+def clear_cache() -> None:
+    """forget resolved objects and import times."""
+    _RESOLVED.clear()
+    _IMPORT_NS.clear()
@@ -1,3 +1,9 @@
-from typing import Any
+import threading
+from typing import Any, Dict, Iterable, List
 
 def get_module(fully_qualified_name: str) -> Any: ...
+def prefetch(names: Iterable[str]) -> Dict[str, Exception]: ...
+def prefetch_in_background(names: Iterable[str]) -> threading.Thread: ...
+def import_times() -> Dict[str, float]: ...
+def resolved_names() -> List[str]: ...
+def clear_cache() -> None: ...
@@ -1,15 +1,40 @@
 """Utilities for subprocess"""
 from typing import Any, Dict, List, Optional
+from typing import AsyncIterator
+from typing import Callable
+from typing import Deque
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Set
+from typing import Tuple
+from typing import Union
 
+from collections import deque
 from datetime import datetime
 from enum import Enum
+from os import cpu_count
+import queue
+import signal
 import subprocess
+import threading
+from time import perf_counter_ns
+from time import process_time_ns
 
-from miscutil.yamljson import to_yaml_str
+from miscutil import ensure_not_none
+from miscutil import if_none
+
+MAX_QUEUED_LINES = 1024
+OUTPUT_CHUNK_SIZE = 64 << 10
 
 
 class Duration:
-    """Execution duration manager."""
+    """Execution duration manager.
+
+    Durations are measured by time.perf_counter_ns and CPU time of the
+    process by time.process_time_ns; time_start and time_end are wall
+    clock stamps for information.
+    """
     class _Status(Enum):
         """Sort of execution status."""
         NotStarted = "NotStarted"
@@ -20,13 +45,19 @@ class Duration:
         self.status = self._Status.NotStarted
         self.time_start = datetime.min
         self.time_end = datetime.min
+        self.elapsed_ns = 0
+        self.cpu_ns = 0
 
     def __enter__(self) -> "Duration":
         self.status = self._Status.Started
         self.time_start = datetime.now()
+        self.cpu_ns = -process_time_ns()
+        self.elapsed_ns = -perf_counter_ns()
         return self
 
     def __exit__(self, status, ex_str, traceback_info) -> None:
+        self.elapsed_ns += perf_counter_ns()
+        self.cpu_ns += process_time_ns()
         self.time_end = datetime.now()
         self.status = self._Status.Finished
 
@@ -35,49 +66,464 @@ class Duration:
         """get consumed time in seconds."""
         if self.status != self._Status.Finished:
             return 0.0
-        return (self.time_end - self.time_start).total_seconds()
+        return self.elapsed_ns / 1e9
+
+    @property
+    def cpu_in_seconds(self) -> float:
+        """get consumed CPU time of this process in seconds."""
+        if self.status != self._Status.Finished:
+            return 0.0
+        return self.cpu_ns / 1e9
 
 
 class CommandResult:
-    """Summarized command execution result."""
+    """Summarized command execution result.
+
+    stdout and stderr are decoded from UTF-8 bytes on first access with
+    the error handler `errors` of bytes.decode.
+    """
+    __slots__ = [
+        'normal_end',
+        'returncode',
+        'stdout_bytes',
+        'stderr_bytes',
+        'errors',
+        '_stdout',
+        '_stderr']
+    # names exported by to_dict.
     __slot__ = [
         'normal_end',
         'returncode',
         'stdout',
         'stderr']
 
-    def __init__(self, result: subprocess.CompletedProcess):
+    def __init__(self,
+                 result: subprocess.CompletedProcess,
+                 errors: str = 'strict'):
         self.normal_end = result.returncode == 0
         self.returncode = result.returncode
-        self.stdout = '' if result.stdout is None else result.stdout.decode(
-            'utf8')
-        self.stderr = '' if result.stderr is None else result.stderr.decode(
-            'utf8')
+        self.stdout_bytes: bytes = if_none(result.stdout, bytes)
+        self.stderr_bytes: bytes = if_none(result.stderr, bytes)
+        self.errors = errors
+        self._stdout: Optional[str] = None
+        self._stderr: Optional[str] = None
+
+    @property
+    def stdout(self) -> str:
+        """get decoded stdout."""
+        if self._stdout is None:
+            self._stdout = self.stdout_bytes.decode('utf8', self.errors)
+        return self._stdout
+
+    @property
+    def stderr(self) -> str:
+        """get decoded stderr."""
+        if self._stderr is None:
+            self._stderr = self.stderr_bytes.decode('utf8', self.errors)
+        return self._stderr
 
     def to_dict(self) -> Dict[str, Any]:
         """get dict type version of this object."""
         return {name: getattr(self, name) for name in self.__slot__}
 
     def __repr__(self) -> str:
+        # pylint: disable=import-outside-toplevel
+        from miscutil.yamljson import to_yaml_str
         return to_yaml_str(self.to_dict())
 
 
-def run_command(
+def _is_utf8_continuation(data: bytes, index: int) -> bool:
+    """check if data[index] continues a UTF-8 character."""
+    return index < len(data) and data[index] & 0xC0 == 0x80
+
+
+class _BoundedCapture:
+    """Captured output keeping only its head and tail within a limit.
+
+    Both are cut at UTF-8 character boundaries, so kept output decodes
+    whenever the whole output does.
+    """
+    def __init__(self, max_kept_bytes: Optional[int]):
+        self._head_limit = (None if max_kept_bytes is None else
+                            max_kept_bytes // 2)
+        self._tail_limit = (0 if max_kept_bytes is None else
+                            max_kept_bytes - max_kept_bytes // 2)
+        self._head = bytearray()
+        self._head_closed = False
+        self._tail: Deque[bytes] = deque()
+        self._tail_size = 0
+        self.omitted = 0
+
+    def add(self, chunk: bytes) -> None:
+        """add chunk of output starting at a character boundary."""
+        if self._head_limit is None:
+            self._head += chunk
+            return
+        if not self._head_closed:
+            room = self._head_limit - len(self._head)
+            if len(chunk) <= room:
+                self._head += chunk
+                return
+            while room > 0 and _is_utf8_continuation(chunk, room):
+                room -= 1
+            self._head += chunk[:room]
+            self._head_closed = True
+            chunk = chunk[room:]
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail_size > self._tail_limit:
+            excess = self._tail_size - self._tail_limit
+            oldest = self._tail[0]
+            while _is_utf8_continuation(oldest, excess):
+                excess += 1
+            if len(oldest) <= excess:
+                self._tail.popleft()
+                dropped = len(oldest)
+            else:
+                self._tail[0] = oldest[excess:]
+                dropped = excess
+            self._tail_size -= dropped
+            self.omitted += dropped
+
+    def getvalue(self) -> bytes:
+        """get kept output with marker of omitted part."""
+        marker = (b'' if self.omitted == 0 else
+                  '\n... {} bytes omitted ...\n'.format(
+                      self.omitted).encode('utf8'))
+        return b''.join((bytes(self._head), marker, *self._tail))
+
+
+def _incomplete_utf8_size(data: bytes) -> int:
+    """count trailing bytes of data starting an unfinished character."""
+    for size in range(1, min(4, len(data) + 1)):
+        byte = data[-size]
+        if byte & 0xC0 != 0x80:
+            needed = (2 if byte & 0xE0 == 0xC0 else
+                      3 if byte & 0xF0 == 0xE0 else
+                      4 if byte & 0xF8 == 0xF0 else 1)
+            return size if needed > size else 0
+    return 0
+
+
+def _pump_output(pipe: Any,
+                 capture: _BoundedCapture,
+                 on_line: Optional[Callable[[str], None]],
+                 errors: str) -> None:
+    """capture output of pipe line by line until EOF.
+
+    Lines longer than OUTPUT_CHUNK_SIZE are handed in pieces ending at
+    character boundaries.
+    """
+    pending = b''
+    with pipe:
+        for chunk in iter(lambda: pipe.readline(OUTPUT_CHUNK_SIZE), b''):
+            chunk = pending + chunk
+            cut = (len(chunk) if chunk.endswith(b'\n') else
+                   len(chunk) - _incomplete_utf8_size(chunk))
+            chunk, pending = chunk[:cut], chunk[cut:]
+            if not chunk:
+                continue
+            capture.add(chunk)
+            if on_line is not None:
+                on_line(chunk.decode('utf8', errors))
+    if pending:
+        capture.add(pending)
+        if on_line is not None:
+            on_line(pending.decode('utf8', errors))
+
+
+def _run_streaming(  # pylint: disable=too-many-arguments
+        cmd_args: List[str],
+        cwd: Optional[str],
+        env: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        on_stdout: Optional[Callable[[str], None]],
+        on_stderr: Optional[Callable[[str], None]],
+        max_kept_bytes: Optional[int],
+        errors: str,
+        on_start: Optional[Callable[[subprocess.Popen], None]] = None
+) -> subprocess.CompletedProcess:
+    """run command handing output lines to callbacks as they arrive."""
+    captures = [_BoundedCapture(max_kept_bytes),
+                _BoundedCapture(max_kept_bytes)]
+    with subprocess.Popen(cmd_args, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, cwd=cwd,
+                          env=env) as process:
+        if on_start is not None:
+            on_start(process)
+        pumps = [threading.Thread(target=_pump_output,
+                                  args=(pipe, capture, on_line, errors),
+                                  daemon=True)
+                 for pipe, capture, on_line in zip(
+                     (process.stdout, process.stderr), captures,
+                     (on_stdout, on_stderr))]
+        for pump in pumps:
+            pump.start()
+        try:
+            returncode = process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            returncode = -signal.SIGKILL
+        for pump in pumps:
+            pump.join()
+    return subprocess.CompletedProcess(
+        cmd_args, returncode, captures[0].getvalue(), captures[1].getvalue())
+
+
+class Command(NamedTuple):
+    """Command line with its own execution settings."""
+    cmd_args: List[str]
+    cwd: Optional[str] = None
+    env: Optional[Dict[str, str]] = None
+    timeout: Optional[float] = None
+
+
+def _timed_out_process(
+        cmd_args: List[str],
+        ex: subprocess.TimeoutExpired) -> subprocess.CompletedProcess:
+    """get completed process of the command killed on timeout."""
+    return subprocess.CompletedProcess(
+        cmd_args, -signal.SIGKILL, ex.stdout, ex.stderr)
+
+
+def run_command(  # pylint: disable=too-many-arguments
         cmd_args: List[str],
         show_process: bool = False,
-        cwd: Optional[str] = None) -> CommandResult:
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        on_stdout: Optional[Callable[[str], None]] = None,
+        on_stderr: Optional[Callable[[str], None]] = None,
+        max_kept_bytes: Optional[int] = None,
+        errors: str = 'strict') -> CommandResult:
     """invoke command.
     Note you make sure return code is zero by yourself.
+    A command running longer than timeout seconds is killed and results
+    in return code -SIGKILL.
+    With on_stdout or on_stderr, each output line including its line break
+    is handed to them while the command runs, in pieces if it is longer
+    than OUTPUT_CHUNK_SIZE.  With max_kept_bytes, only the head and the
+    tail of each output within that size are kept in the result.
     """
     if show_process:
         print(' '.join(cmd_args))
-    # pylint: disable=subprocess-run-check
-    completed_process = subprocess.run(
-        list(cmd_args),
-        # capture_output=True,  # This is valid only after 3.7.
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=False,
-        # text=True,  # This is valid only after 3.7.
-        cwd=cwd)
-    return CommandResult(completed_process)
+    if (on_stdout is not None or on_stderr is not None or
+            max_kept_bytes is not None):
+        return CommandResult(_run_streaming(
+            list(cmd_args), cwd, env, timeout, on_stdout, on_stderr,
+            max_kept_bytes, errors), errors)
+    try:
+        # pylint: disable=subprocess-run-check
+        completed_process = subprocess.run(
+            list(cmd_args),
+            # capture_output=True,  # This is valid only after 3.7.
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+            # text=True,  # This is valid only after 3.7.
+            cwd=cwd,
+            env=env,
+            timeout=timeout)
+    except subprocess.TimeoutExpired as ex:
+        completed_process = _timed_out_process(list(cmd_args), ex)
+    return CommandResult(completed_process, errors)
+
+
+class CommandOutput:
+    """Output lines of a command, iterated while it runs.
+
+    Iteration yields pairs of 'stdout' or 'stderr' and a line.  result is
+    available after the iteration ends.  At most max_queued_lines lines
+    wait for the consumer; the command is blocked on its output beyond
+    them, and killed if the iteration is closed before it ends.
+    """
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 cmd_args: List[str],
+                 cwd: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None,
+                 timeout: Optional[float] = None,
+                 max_kept_bytes: Optional[int] = None,
+                 errors: str = 'strict',
+                 max_queued_lines: int = MAX_QUEUED_LINES):
+        self.cmd_args = cmd_args
+        self.cwd = cwd
+        self.env = env
+        self.timeout = timeout
+        self.max_kept_bytes = max_kept_bytes
+        self.errors = errors
+        self.max_queued_lines = max_queued_lines
+        self.result: Optional[CommandResult] = None
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        lines: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue(
+            self.max_queued_lines)
+        lock = threading.Lock()
+        closed = False
+        processes: List[subprocess.Popen] = []
+
+        def _put(item: Tuple[str, str]) -> None:
+            if not closed:
+                lines.put(item)
+
+        def _started(process: subprocess.Popen) -> None:
+            with lock:
+                processes.append(process)
+                if closed:
+                    process.kill()
+
+        def _run() -> None:
+            try:
+                self.result = CommandResult(_run_streaming(
+                    list(self.cmd_args), self.cwd, self.env, self.timeout,
+                    lambda line: _put(('stdout', line)),
+                    lambda line: _put(('stderr', line)),
+                    self.max_kept_bytes, self.errors, _started), self.errors)
+            finally:
+                lines.put(None)
+
+        runner = threading.Thread(target=_run, daemon=True)
+        runner.start()
+        ended = False
+        try:
+            for item in iter(lines.get, None):
+                yield item
+            ended = True
+        finally:
+            if not ended:
+                with lock:
+                    closed = True
+                    for process in processes:
+                        process.kill()
+                # Unblock the readers until the runner puts the end.
+                for _ in iter(lines.get, None):
+                    pass
+            runner.join()
+
+
+def _to_command(command: Union[Command, List[str]],
+                cwd: Optional[str],
+                env: Optional[Dict[str, str]],
+                timeout: Optional[float]) -> Command:
+    """complement settings of command by the defaults."""
+    if not isinstance(command, Command):
+        return Command(list(command), cwd, env, timeout)
+    return Command(command.cmd_args,
+                   cwd if command.cwd is None else command.cwd,
+                   env if command.env is None else command.env,
+                   timeout if command.timeout is None else command.timeout)
+
+
+def run_commands(
+        commands: Iterable[Union[Command, List[str]]],
+        max_workers: Optional[int] = None,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+) -> Iterator[Tuple[int, CommandResult]]:
+    """invoke commands concurrently.
+
+    At most max_workers (cpu count by default) commands run at once.
+    Pairs of the index of a command and its result are yielded in order
+    of completion.  cwd, env and timeout are defaults for commands not
+    specifying them by Command.  Closing the iteration early kills the
+    running commands and drops the others.
+    """
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import as_completed
+    from concurrent.futures import FIRST_COMPLETED
+    from concurrent.futures import Future
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import wait
+    workers = max_workers or cpu_count() or 1
+    lock = threading.Lock()
+    running: Set[subprocess.Popen] = set()
+    closed = False
+
+    def _run(spec: Command) -> CommandResult:
+        started: List[subprocess.Popen] = []
+
+        def _started(process: subprocess.Popen) -> None:
+            with lock:
+                started.append(process)
+                running.add(process)
+                if closed:
+                    process.kill()
+
+        try:
+            return CommandResult(_run_streaming(
+                spec.cmd_args, spec.cwd, spec.env, spec.timeout, None, None,
+                None, 'strict', _started))
+        finally:
+            with lock:
+                running.difference_update(started)
+
+    pending: Dict[Future, int] = {}
+    executor = ThreadPoolExecutor(workers)
+    try:
+        for index, command in enumerate(commands):
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            pending[executor.submit(
+                _run, _to_command(command, cwd, env, timeout))] = index
+        for future in as_completed(list(pending)):
+            yield pending.pop(future), future.result()
+    finally:
+        with lock:
+            closed = True
+            for process in running:
+                process.kill()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_command_async(
+        cmd_args: List[str],
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None) -> CommandResult:
+    """invoke command on asyncio event loop."""
+    import asyncio  # pylint: disable=import-outside-toplevel
+    process = await asyncio.create_subprocess_exec(
+        *cmd_args, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE, cwd=cwd, env=env)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(),
+                                                timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        raise
+    return CommandResult(subprocess.CompletedProcess(
+        list(cmd_args), ensure_not_none(process.returncode), stdout, stderr))
+
+
+async def run_commands_async(
+        commands: Iterable[Union[Command, List[str]]],
+        max_workers: Optional[int] = None,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None) -> AsyncIterator[
+            Tuple[int, CommandResult]]:
+    """asyncio version of run_commands."""
+    import asyncio  # pylint: disable=import-outside-toplevel
+    semaphore = asyncio.Semaphore(max_workers or cpu_count() or 1)
+
+    async def _run(index: int, spec: Command) -> Tuple[int, CommandResult]:
+        async with semaphore:
+            return index, await run_command_async(
+                spec.cmd_args, cwd=spec.cwd, env=spec.env,
+                timeout=spec.timeout)
+
+    tasks = [asyncio.ensure_future(_run(index, _to_command(
+        command, cwd, env, timeout)))
+             for index, command in enumerate(commands)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,7 +1,10 @@
 import subprocess
 from enum import Enum
-from miscutil.yamljson import to_yaml_str as to_yaml_str
-from typing import Any, Dict, List, Optional
+from miscutil import if_none as if_none
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+MAX_QUEUED_LINES: int
+OUTPUT_CHUNK_SIZE: int
 
 class Duration:
     class _Status(Enum):
@@ -11,19 +14,50 @@ class Duration:
     status: Any = ...
     time_start: Any = ...
     time_end: Any = ...
+    elapsed_ns: int = ...
+    cpu_ns: int = ...
     def __init__(self) -> None: ...
     def __enter__(self) -> Duration: ...
     def __exit__(self, status: Any, ex_str: Any, traceback_info: Any) -> None: ...
     @property
     def in_seconds(self) -> float: ...
+    @property
+    def cpu_in_seconds(self) -> float: ...
 
 class CommandResult:
     __slot__: Any = ...
     normal_end: Any = ...
     returncode: Any = ...
-    stdout: Any = ...
-    stderr: Any = ...
-    def __init__(self, result: subprocess.CompletedProcess) -> None: ...
+    stdout_bytes: bytes = ...
+    stderr_bytes: bytes = ...
+    errors: str = ...
+    def __init__(self, result: subprocess.CompletedProcess, errors: str=...) -> None: ...
+    @property
+    def stdout(self) -> str: ...
+    @property
+    def stderr(self) -> str: ...
     def to_dict(self) -> Dict[str, Any]: ...
 
-def run_command(cmd_args: List[str], show_process: bool=..., cwd: Optional[str]=...) -> CommandResult: ...
+class Command(NamedTuple):
+    cmd_args: List[str]
+    cwd: Optional[str] = ...
+    env: Optional[Dict[str, str]] = ...
+    timeout: Optional[float] = ...
+
+def run_command(cmd_args: List[str], show_process: bool=..., cwd: Optional[str]=..., env: Optional[Dict[str, str]]=..., timeout: Optional[float]=..., on_stdout: Optional[Callable[[str], None]]=..., on_stderr: Optional[Callable[[str], None]]=..., max_kept_bytes: Optional[int]=..., errors: str=...) -> CommandResult: ...
+
+class CommandOutput:
+    cmd_args: List[str] = ...
+    cwd: Optional[str] = ...
+    env: Optional[Dict[str, str]] = ...
+    timeout: Optional[float] = ...
+    max_kept_bytes: Optional[int] = ...
+    errors: str = ...
+    max_queued_lines: int = ...
+    result: Optional[CommandResult] = ...
+    def __init__(self, cmd_args: List[str], cwd: Optional[str]=..., env: Optional[Dict[str, str]]=..., timeout: Optional[float]=..., max_kept_bytes: Optional[int]=..., errors: str=..., max_queued_lines: int=...) -> None: ...
+    def __iter__(self) -> Iterator[Tuple[str, str]]: ...
+
+def run_commands(commands: Iterable[Union[Command, List[str]]], max_workers: Optional[int]=..., cwd: Optional[str]=..., env: Optional[Dict[str, str]]=..., timeout: Optional[float]=...) -> Iterator[Tuple[int, CommandResult]]: ...
+async def run_command_async(cmd_args: List[str], cwd: Optional[str]=..., env: Optional[Dict[str, str]]=..., timeout: Optional[float]=...) -> CommandResult: ...
+def run_commands_async(commands: Iterable[Union[Command, List[str]]], max_workers: Optional[int]=..., cwd: Optional[str]=..., env: Optional[Dict[str, str]]=..., timeout: Optional[float]=...) -> AsyncIterator[Tuple[int, CommandResult]]: ...
@@ -1,25 +1,127 @@
 """Utility library for test."""
 from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import hashlib
+import os
 from pathlib import Path
 import unittest
-import yaml
 
 from miscutil import yamljson
+from miscutil.subprocess import Duration
+from miscutil.yamlbackend import yaml_load
+
+UPDATE_GOLDENS_ENV = 'MISCUTIL_UPDATE_GOLDENS'
+
+
+def update_goldens_requested() -> bool:
+    """check if environment variable asks to rewrite goldens."""
+    return os.environ.get(UPDATE_GOLDENS_ENV, '') not in ('', '0')
+
+
+def write_if_changed(path: Union[str, Path], text: str) -> bool:
+    """write text unless the file has it already; True if written."""
+    data = text.encode('utf8')
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as current:
+                if current.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(path, 'wb') as out:
+        out.write(data)
+    return True
+
+
+class GoldenCache:
+    """Goldens parsed once per process.
+
+    An entry is reused while mtime and size of its file are unchanged or,
+    if they changed, while the content hash is the same.  Every caller gets
+    its own copy of the loaded object, which it may modify.
+    """
+    def __init__(self):
+        self._entries: Dict[Tuple[str, bool],
+                            Tuple[Tuple[int, int], bytes, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self,
+             path: Union[str, Path],
+             convert_from_to_yaml: bool = True) -> Any:
+        """get parsed YAML or text of golden file."""
+        key = (str(path), convert_from_to_yaml)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return copy.deepcopy(entry[2])
+        with open(path, 'rb') as golden:
+            content = golden.read()
+        digest = hashlib.sha256(content).digest()
+        if entry is not None and entry[1] == digest:
+            self.hits += 1
+            value = entry[2]
+        else:
+            self.misses += 1
+            text = content.decode('utf8')
+            value = (yaml_load(text) if convert_from_to_yaml else
+                     text.replace('\r\n', '\n').replace('\r', '\n'))
+        self._entries[key] = (signature, digest, value)
+        return copy.deepcopy(value)
+
+    def clear(self) -> None:
+        """forget all entries."""
+        self._entries = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses}
+
+
+GOLDEN_CACHE = GoldenCache()
+
+
+def _asis_text(asis_obj: Any, convert_from_to_yaml: bool) -> str:
+    """get content of .asis file as print writes."""
+    if convert_from_to_yaml:
+        return '{}\n'.format(yamljson.json_obj2yaml_str(asis_obj))
+    return '{}\n'.format(asis_obj)
 
 
 class TCWithGoldenFile(unittest.TestCase):
-    """"Abstract test case using golden files."""
+    """"Abstract test case using golden files.
+
+    With update_goldens (by default, environment variable
+    MISCUTIL_UPDATE_GOLDENS other than 0), goldens are overwritten by the
+    actual outputs.
+    """
     def __init__(self,
                  *,
                  top_dir: str,
                  suffix_of_golden: str,
                  out_extension: str = 'yaml',
-                 method_name: str = 'runTest'):
+                 method_name: str = 'runTest',
+                 update_goldens: Optional[bool] = None):
         super().__init__(method_name)
         self.maxDiff = None  # pylint: disable=invalid-name
         self.top_dir = top_dir
         self.suffix_of_golden = suffix_of_golden
         self.out_extension = out_extension
+        self.update_goldens = (update_goldens_requested()
+                               if update_goldens is None else update_goldens)
 
     def _full_path(self, rel_path: str, *args, **kwargs) -> str:
         return str(Path(self.top_dir, rel_path.format(*args, **kwargs)))
@@ -47,16 +149,147 @@ class TCWithGoldenFile(unittest.TestCase):
             asis_obj: Any,
             core_of_golden: str,
             convert_from_to_yaml: bool = True) -> Any:
-        with open(self._golden_yaml_path(core_of_golden)) as yfile:
-            if convert_from_to_yaml:
-                expected_obj = yaml.load(yfile, Loader=yaml.FullLoader)
-            else:
-                expected_obj = yfile.read()
-        with open(
-                self._golden_yaml_path('{}.asis'.format(core_of_golden)),
-                'w') as yfile:
-            if convert_from_to_yaml:
-                print(yamljson.json_obj2yaml_str(asis_obj), file=yfile)
-            else:
-                print(asis_obj, file=yfile)
+        asis_text = _asis_text(asis_obj, convert_from_to_yaml)
+        golden_path = self._golden_yaml_path(core_of_golden)
+        if self.update_goldens:
+            write_if_changed(golden_path, asis_text)
+        expected_obj = GOLDEN_CACHE.load(golden_path, convert_from_to_yaml)
+        write_if_changed(
+            self._golden_yaml_path('{}.asis'.format(core_of_golden)),
+            asis_text)
         return expected_obj
+
+    def assertGoldenCases(  # pylint: disable=invalid-name
+            self,
+            convert: Callable[[Any], Any],
+            max_workers: Optional[int] = None) -> "GoldenReport":
+        """assert convert turns every discovered input into its golden.
+
+        convert must be picklable, e.g. a function at module level, unless
+        max_workers is 1.
+        """
+        report = run_golden_cases(
+            self.top_dir, self.suffix_of_golden, convert,
+            out_extension=self.out_extension, max_workers=max_workers,
+            update_goldens=self.update_goldens)
+        for result in report.failures:
+            with self.subTest(core=result.core):
+                self.fail('{}\n{}'.format(
+                    self._memo_on_golden_file_path(result.core, result.core),
+                    result.message))
+        return report
+
+
+class GoldenCaseResult(NamedTuple):
+    """Result of a case of run_golden_cases."""
+    core: str
+    passed: bool
+    elapsed_in_sec: float
+    message: str = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'passed': self.passed, 'elapsed': self.elapsed_in_sec}
+
+
+class GoldenReport:
+    """Results of run_golden_cases with per-case timing."""
+    def __init__(self, results: List[GoldenCaseResult], elapsed_in_sec: float):
+        self.results = results
+        self.elapsed_in_sec = elapsed_in_sec
+
+    @property
+    def failures(self) -> List[GoldenCaseResult]:
+        """get failed cases."""
+        return [result for result in self.results if not result.passed]
+
+    def timing_lines(self, top: Optional[int] = None) -> List[str]:
+        """get lines of cases in descending order of elapsed time."""
+        slowest = sorted(self.results,
+                         key=lambda result: -result.elapsed_in_sec)
+        return ['{:10.6f} {} {}'.format(
+            result.elapsed_in_sec, 'ok  ' if result.passed else 'FAIL',
+            result.core) for result in slowest[:top]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get dict type version of this object."""
+        return {'elapsed': self.elapsed_in_sec,
+                'failures': len(self.failures),
+                'cases': {result.core: result.to_dict()
+                          for result in self.results}}
+
+
+def discover_golden_cases(top_dir: str,
+                          suffix_of_golden: str,
+                          out_extension: str = 'yaml') -> List[str]:
+    """get cores of input/<core>.yaml having golden/<core>.<suffix>.<ext>."""
+    input_dir = Path(top_dir, 'input')
+    golden_dir = Path(top_dir, 'golden')
+    golden_suffix = '.{}.{}'.format(suffix_of_golden, out_extension)
+    cores = []
+    for input_path in sorted(input_dir.rglob('*.yaml')):
+        core = input_path.relative_to(input_dir).as_posix()[:-len('.yaml')]
+        if (golden_dir / (core + golden_suffix)).is_file():
+            cores.append(core)
+    return cores
+
+
+def _golden_mismatch(actual: Any, expected: Any) -> Optional[str]:
+    """describe differences in YAML; None if they are equal."""
+    encoder = yamljson.JSONEncoder(show_type=False)
+    actual_json = encoder.to_json(actual)
+    expected_json = encoder.to_json(expected)
+    if yamljson.same_json(actual_json, expected_json):
+        return None
+    return yamljson.format_json_differences(
+        yamljson.json_differences(expected_json, actual_json))
+
+
+def _run_golden_case(
+        spec: Tuple[Callable[[Any], Any], str, str, str, bool, str]
+) -> GoldenCaseResult:
+    convert, top_dir, suffix_of_golden, out_extension, update_goldens, core = (
+        spec)
+    case = TCWithGoldenFile(top_dir=top_dir, suffix_of_golden=suffix_of_golden,
+                            out_extension=out_extension,
+                            update_goldens=update_goldens)
+    # pylint: disable=protected-access
+    with Duration() as duration:
+        try:
+            with open(case._input_yaml_path(core), encoding='utf8') as yfile:
+                actual = convert(yaml_load(yfile))
+            message = _golden_mismatch(
+                actual, case._put_asis_n_get_expected(actual, core))
+        except Exception as ex:  # pylint: disable=broad-except
+            message = '{}: {}'.format(type(ex).__name__, ex)
+    return GoldenCaseResult(core, message is None, duration.in_seconds,
+                            message or '')
+
+
+def run_golden_cases(  # pylint: disable=too-many-arguments
+        top_dir: str,
+        suffix_of_golden: str,
+        convert: Callable[[Any], Any],
+        out_extension: str = 'yaml',
+        max_workers: Optional[int] = None,
+        update_goldens: Optional[bool] = None) -> GoldenReport:
+    """convert discovered inputs on process pool and compare with goldens.
+
+    Each case also puts its .asis file as TCWithGoldenFile does.
+    """
+    if update_goldens is None:
+        update_goldens = update_goldens_requested()
+    specs = [(convert, top_dir, suffix_of_golden, out_extension,
+              update_goldens, core)
+             for core in discover_golden_cases(
+                 top_dir, suffix_of_golden, out_extension)]
+    with Duration() as duration:
+        if max_workers == 1 or len(specs) <= 1:
+            results = [_run_golden_case(spec) for spec in specs]
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(
+                    _run_golden_case, specs,
+                    chunksize=max(1, len(specs) // (4 * workers))))
+    return GoldenReport(results, duration.in_seconds)
@@ -1,10 +1,49 @@
 import unittest
 from miscutil import yamljson as yamljson
-from typing import Any
+from miscutil.subprocess import Duration as Duration
+from miscutil.yamlbackend import yaml_load as yaml_load
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+
+UPDATE_GOLDENS_ENV: str
+
+def update_goldens_requested() -> bool: ...
+def write_if_changed(path: Union[str, Path], text: str) -> bool: ...
+
+class GoldenCache:
+    hits: int = ...
+    misses: int = ...
+    def __init__(self) -> None: ...
+    def load(self, path: Union[str, Path], convert_from_to_yaml: bool=...) -> Any: ...
+    def clear(self) -> None: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+GOLDEN_CACHE: GoldenCache
 
 class TCWithGoldenFile(unittest.TestCase):
     maxDiff: Any = ...
     top_dir: Any = ...
     suffix_of_golden: Any = ...
     out_extension: Any = ...
-    def __init__(self, top_dir: str, suffix_of_golden: str, *, out_extension: str=..., method_name: str=...) -> None: ...
+    update_goldens: bool = ...
+    def __init__(self, *, top_dir: str, suffix_of_golden: str, out_extension: str=..., method_name: str=..., update_goldens: Optional[bool]=...) -> None: ...
+    def assertGoldenCases(self, convert: Callable[[Any], Any], max_workers: Optional[int]=...) -> GoldenReport: ...
+
+class GoldenCaseResult(NamedTuple):
+    core: str
+    passed: bool
+    elapsed_in_sec: float
+    message: str = ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+class GoldenReport:
+    results: List[GoldenCaseResult] = ...
+    elapsed_in_sec: float = ...
+    def __init__(self, results: List[GoldenCaseResult], elapsed_in_sec: float) -> None: ...
+    @property
+    def failures(self) -> List[GoldenCaseResult]: ...
+    def timing_lines(self, top: Optional[int]=...) -> List[str]: ...
+    def to_dict(self) -> Dict[str, Any]: ...
+
+def discover_golden_cases(top_dir: str, suffix_of_golden: str, out_extension: str=...) -> List[str]: ...
+def run_golden_cases(top_dir: str, suffix_of_golden: str, convert: Callable[[Any], Any], out_extension: str=..., max_workers: Optional[int]=..., update_goldens: Optional[bool]=...) -> GoldenReport: ...
@@ -0,0 +1,65 @@
+"""YAML backend choosing libyaml bindings when they are available."""
+from typing import Any
+from typing import IO
+from typing import Iterator
+from typing import Union
+
+import yaml
+
+try:
+    from yaml import CDumper as _CDumper  # type: ignore
+    from yaml import CSafeLoader as Loader  # type: ignore
+    WITH_LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as Loader  # type: ignore
+    _CDumper = None
+    WITH_LIBYAML = False
+
+Dumper = yaml.Dumper
+
+
+def backend_name() -> str:
+    """get name of active YAML backend: 'libyaml' or 'python'."""
+    return 'libyaml' if WITH_LIBYAML else 'python'
+
+
+def _is_portable_text(text: Any) -> bool:
+    return type(text) is str and text.isascii() and text.isprintable()
+
+
+def _is_portable(obj: Any) -> bool:
+    """check if libyaml emits obj byte-identically to the python emitter.
+
+    The emitters differ on folding double quoted scalars, on empty keys
+    and on document end markers of top-level scalars, so only containers
+    of printable ASCII text and other plain scalars qualify.
+    """
+    obj_type = type(obj)
+    if obj_type is str:
+        return obj.isascii() and obj.isprintable()
+    if obj_type in (int, float, bool) or obj is None:
+        return True
+    if obj_type is list:
+        return all(map(_is_portable, obj))
+    if obj_type is dict:
+        return all(key and _is_portable_text(key) and _is_portable(value)
+                   for key, value in obj.items())
+    return False
+
+
+def yaml_dump(obj: Any, sort_keys: bool = True) -> str:
+    """dump obj to YAML string as yaml.dump does."""
+    if (_CDumper is not None and isinstance(obj, (list, dict))
+            and _is_portable(obj)):
+        return yaml.dump(obj, Dumper=_CDumper, sort_keys=sort_keys)
+    return yaml.dump(obj, Dumper=Dumper, sort_keys=sort_keys)
+
+
+def yaml_load(stream: Union[str, bytes, IO]) -> Any:
+    """load YAML document with the fastest safe loader."""
+    return yaml.load(stream, Loader=Loader)
+
+
+def yaml_load_all(stream: Union[str, bytes, IO]) -> Iterator[Any]:
+    """load YAML documents lazily one by one."""
+    return yaml.load_all(stream, Loader=Loader)
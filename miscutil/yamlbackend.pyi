@@ -0,0 +1,10 @@
+from typing import Any, IO, Iterator, Union
+
+WITH_LIBYAML: bool
+Loader: Any
+Dumper: Any
+
+def backend_name() -> str: ...
+def yaml_dump(obj: Any, sort_keys: bool=...) -> str: ...
+def yaml_load(stream: Union[str, bytes, IO]) -> Any: ...
+def yaml_load_all(stream: Union[str, bytes, IO]) -> Iterator[Any]: ...
@@ -1,30 +1,54 @@
 """Utility library for json and yaml with intermediate expression."""
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import Collection, List
+from typing import IO
+from typing import Iterable
+from typing import Iterator
 from typing import Optional
+from typing import Set
 from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import Union
 
 from collections.abc import Mapping as ABCMapping  # type: ignore
 from enum import Enum
 import json
-from unittest import TestCase
-import yaml
+from math import copysign
+from operator import itemgetter
+from operator import methodcaller
+from pathlib import Path
 
-from miscutil import none_or
+if TYPE_CHECKING:
+    from unittest import TestCase
+
+# PyYAML is imported on the first conversion from or to YAML.
+# pylint: disable=import-outside-toplevel
 
 KEY_NAME_FOR_TYPE = " type"
+RECORD_FORMAT_BY_SUFFIX = {
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+}
+_JSON_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+DIFF_LIMIT = 10
+MISSING = object()
 
 
 def json_obj2yaml_str(in_json_obj: Any, sort_keys: bool = True) -> str:
     """convert JSON object to YAML string."""
-    return yaml.dump(JSONEncoder(show_type=False).to_json(in_json_obj),
+    from miscutil.yamlbackend import yaml_dump
+    return yaml_dump(JSONEncoder(show_type=False).to_json(in_json_obj),
                      sort_keys=sort_keys)
 
 
 def json2yaml(in_json: str, sort_keys: bool = True) -> str:
     """convert string in JSON to string in YAML."""
-    return yaml.dump(json.loads(in_json), sort_keys=sort_keys)
+    from miscutil.yamlbackend import yaml_dump
+    return yaml_dump(json.loads(in_json), sort_keys=sort_keys)
 
 
 def json2yaml_lines(in_json: str, sort_keys: bool = True) -> List[str]:
@@ -53,8 +77,181 @@ def to_json_using_slot(
     return obj
 
 
+def same_json(left: Any, right: Any) -> bool:
+    """check if JSON objects are rendered identically in YAML.
+
+    Unlike ==, 1, 1.0 and True differ, and so do 0.0 and -0.0, while
+    nan equals nan.  The walk stops at the first mismatch.
+    """
+    if left is right:
+        return True
+    left_type = type(left)
+    if left_type is not type(right):
+        return False
+    if left_type is dict:
+        return (len(left) == len(right) and
+                all(key in right and same_json(value, right[key])
+                    for key, value in left.items()))
+    if left_type is list:
+        return (len(left) == len(right) and
+                all(map(same_json, left, right)))
+    if left_type is float:
+        if left != left:  # pylint: disable=comparison-with-itself
+            return right != right  # pylint: disable=comparison-with-itself
+        return left == right and copysign(1.0, left) == copysign(1.0, right)
+    return left == right
+
+
+def _child_path(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return '{}[{}]'.format(path, key)
+    if key.isidentifier():
+        return '{}.{}'.format(path, key)
+    return '{}[{!r}]'.format(path, key)
+
+
+def json_differences(expected: Any,
+                     actual: Any,
+                     limit: int = DIFF_LIMIT,
+                     path: str = '$') -> List[Tuple[str, Any, Any]]:
+    """get at most limit (path, expected, actual) of differing subtrees.
+
+    Subtrees missing on either side are MISSING.
+    """
+    found: List[Tuple[str, Any, Any]] = []
+
+    def _walk(expected: Any, actual: Any, path: str) -> None:
+        if len(found) >= limit or same_json(expected, actual):
+            return
+        expected_type = type(expected)
+        if expected_type is not type(actual) or expected_type not in (
+                dict, list):
+            found.append((path, expected, actual))
+            return
+        if expected_type is dict:
+            children = [(_child_path(path, key), expected.get(key, MISSING),
+                         actual.get(key, MISSING))
+                        for key in sorted(set(expected) | set(actual))]
+        else:
+            children = [(_child_path(path, index),
+                         expected[index] if index < len(expected) else MISSING,
+                         actual[index] if index < len(actual) else MISSING)
+                        for index in range(max(len(expected), len(actual)))]
+        for child_path, expected_child, actual_child in children:
+            if expected_child is MISSING or actual_child is MISSING:
+                if len(found) < limit:
+                    found.append((child_path, expected_child, actual_child))
+            else:
+                _walk(expected_child, actual_child, child_path)
+
+    _walk(expected, actual, path)
+    return found
+
+
+def _subtree_yaml(obj: Any) -> str:
+    """render subtree in YAML without document end marker."""
+    if obj is MISSING:
+        return '(missing)'
+    from miscutil.yamlbackend import yaml_dump
+    text = yaml_dump(obj, sort_keys=True)
+    if text.endswith('\n...\n'):
+        text = text[:-len('...\n')]
+    return text.rstrip('\n')
+
+
+def format_json_differences(
+        differences: List[Tuple[str, Any, Any]]) -> str:
+    """describe differences by json_differences in YAML."""
+    def _indent(text: str) -> str:
+        return '\n'.join('    ' + line for line in text.split('\n'))
+    return '\n'.join(
+        'at {}:\n  expected:\n{}\n  actual:\n{}'.format(
+            path, _indent(_subtree_yaml(expected)),
+            _indent(_subtree_yaml(actual)))
+        for path, expected, actual in differences)
+
+
+def _normalize_key(key: Any) -> str:
+    """convert dict key to str in the way json.dumps does."""
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return json.dumps(float.__float__(key))
+    raise TypeError('keys must be str, int, float, bool or None, '
+                    'not {}'.format(key.__class__.__name__))
+
+
+def _primitive_converter(obj: Any) -> Optional[Callable[[Any], Any]]:
+    """get converter JSONEncoder.treat_primitive applies to obj."""
+    if isinstance(obj, Enum):
+        return _enum_name
+    if isinstance(obj, ABCMapping):
+        return dict
+    if isinstance(obj, set):
+        return list
+    return None
+
+
+def _enum_name(obj: Enum) -> str:
+    return obj.name
+
+
+def _primitive_plan(encoder: "JSONEncoder", target: Any) -> Any:
+    """plan for overridden treat_primitive."""
+    treated, obj = encoder.treat_primitive(target)
+    if treated:
+        return obj
+    return _fallback_plan(encoder, target)
+
+
+def _fallback_plan(encoder: "JSONEncoder", target: Any) -> Any:
+    """plan for objects the encoder does not know."""
+    try:
+        if encoder.other_encoder is not None:
+            return encoder.other_encoder.default(target)
+        return json.JSONEncoder.default(encoder, target)
+    except TypeError as ex:
+        return "{} for {} - {}: {}".format(
+            type(ex), type(target), ex, target)
+
+
+def _converter_plan(
+        convert: Callable[[Any], Any]) -> Callable[["JSONEncoder", Any], Any]:
+    """get plan applying convert to the target."""
+    def _plan(_: "JSONEncoder", target: Any) -> Any:
+        return convert(target)
+    return _plan
+
+
+# (True, method caller) to arrange what to_json or to_dict returns, or
+# (False, plan) to apply plan to the encoder and the target.
+_Plan = Tuple[bool, Callable[..., Any]]
+
+
 class JSONEncoder(json.JSONEncoder):
-    """JSON encoder for classes that have method 'to_json'."""
+    """JSON encoder for classes that have method 'to_json'.
+
+    How to serialize objects of a type is resolved once and cached per
+    encoder class and type.  Handlers registered to an encoder class apply
+    to the class and its subclasses.
+    """
+    PLAN_CACHE_SIZE = 1024
+    _handlers: Dict[type, Callable[[Any], Any]] = {}
+    _plans: Dict[type, _Plan] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = {}
+        cls._plans = {}
+
     def __init__(self, *,
                  skipkeys=False, ensure_ascii=True, check_circular=True,
                  allow_nan=True, sort_keys=False, indent=None,
@@ -71,51 +268,124 @@ class JSONEncoder(json.JSONEncoder):
         self.show_type = show_type
         self.show_zero_value = show_zero_value
 
+    @classmethod
+    def register_handler(cls,
+                         target_type: type,
+                         handler: Callable[[Any], Any]) -> None:
+        """register handler converting instances of target_type to json.
+
+        Handlers apply to subclasses of target_type too and take precedence
+        over to_json and to_dict of the target for this encoder class and
+        its subclasses, where handlers of subclasses win.
+        """
+        cls._handlers[target_type] = handler
+        encoder_classes: List[type] = [cls]
+        while encoder_classes:
+            encoder_class = encoder_classes.pop()
+            encoder_class.__dict__['_plans'].clear()
+            encoder_classes.extend(encoder_class.__subclasses__())
+
     # pylint: disable=method-hidden, arguments-differ
     def default(self, target: Any) -> Any:
-        to_json = None
+        plan = self._plans.get(type(target))
+        if plan is None:
+            plan = self._resolve_plan(target)
+        by_method, run = plan
+        if not by_method:
+            return run(self, target)
+        obj = run(target)
+        if not self.show_type and KEY_NAME_FOR_TYPE in obj:
+            obj.pop(KEY_NAME_FOR_TYPE)
+        if not self.show_zero_value and hasattr(obj, "items"):
+            return {key: value for key, value in obj.items() if value}
+        return obj
+
+    def _resolve_plan(self, target: Any) -> _Plan:
+        """resolve how to serialize objects of the type of target."""
+        plans = self._plans
+        if len(plans) >= self.PLAN_CACHE_SIZE:
+            plans.pop(next(iter(plans)), None)
+        plan = plans[type(target)] = self._make_plan(target)
+        return plan
+
+    def _make_plan(self, target: Any) -> _Plan:
+        handlers: Dict[type, Callable[[Any], Any]] = {}
+        for encoder_class in reversed(type(self).__mro__):
+            handlers.update(encoder_class.__dict__.get('_handlers', {}))
+        for klass in type(target).__mro__:
+            handler = handlers.get(klass)
+            if handler is not None:
+                return False, _converter_plan(handler)
         if hasattr(target, "to_json"):
-            to_json = getattr(target, "to_json")
-        elif hasattr(target, "to_dict"):
-            to_json = getattr(target, "to_dict")
-        if to_json is not None:
-            obj = to_json()
-            if not self.show_type and KEY_NAME_FOR_TYPE in obj:
-                obj.pop(KEY_NAME_FOR_TYPE)
-            if not self.show_zero_value and hasattr(obj, "items"):
-                return {key: value for key, value in obj.items() if value}
-            return obj
-        treated, obj = self.treat_primitive(target)
-        if treated:
-            return obj
-        try:
-            if self.other_encoder is not None:
-                return self.other_encoder.default(target)
-            return super().default(target)
-        except TypeError as ex:
-            return "{} for {} - {}: {}".format(
-                type(ex), type(target), ex, target)
+            return True, methodcaller("to_json")
+        if hasattr(target, "to_dict"):
+            return True, methodcaller("to_dict")
+        if type(self).treat_primitive is not JSONEncoder.treat_primitive:
+            return False, _primitive_plan
+        convert = _primitive_converter(target)
+        if convert is not None:
+            return False, _converter_plan(convert)
+        return False, _fallback_plan
 
     @staticmethod
     def treat_primitive(obj: Any) -> Tuple[bool, Any]:
         """convert some type of primitive instance to json."""
-        if isinstance(obj, Enum):
-            return True, obj.name
-        if isinstance(obj, ABCMapping):
-            # return (True, {key: value for key, value in obj.items()})
-            return (True, dict(obj))
-        if isinstance(obj, set):
-            return (True, list(obj))
-        return False, None
+        convert = _primitive_converter(obj)
+        if convert is None:
+            return False, None
+        return True, convert(obj)
 
     def to_json(self, obj: Any) -> Dict[str, Any]:
-        """convert an object to json"""
-        return json.loads(json.dumps(
-            obj, ensure_ascii=False, default=self.default, sort_keys=True))
+        """convert an object to json
+
+        The result equals json.loads(json.dumps(obj, default=self.default,
+        sort_keys=True)) but is built in one walk without the JSON text.
+        """
+        return self._normalize(obj, set())
+
+    def _normalize(self, obj: Any, markers: Set[int]) -> Any:
+        """normalize obj to json object in the way json.dumps encodes."""
+        obj_type = type(obj)
+        if obj_type in _JSON_SCALAR_TYPES:
+            return obj
+        marker = id(obj)
+        if marker in markers:
+            raise ValueError("Circular reference detected")
+        markers.add(marker)
+        try:
+            if obj_type is dict or obj_type is list:
+                return self._normalize_container(obj, markers)
+            if isinstance(obj, str):
+                return str.__str__(obj)
+            if isinstance(obj, int):
+                return int.__int__(obj)
+            if isinstance(obj, float):
+                return float.__float__(obj)
+            if isinstance(obj, (list, tuple, dict)):
+                return self._normalize_container(obj, markers)
+            return self._normalize(self.default(obj), markers)
+        finally:
+            markers.discard(marker)
+
+    def _normalize_container(self, obj: Any, markers: Set[int]) -> Any:
+        """normalize elements of list, tuple or dict."""
+        normalize = self._normalize
+        scalar_types = _JSON_SCALAR_TYPES
+        if isinstance(obj, dict):
+            return {(key if type(key) is str else _normalize_key(key)):
+                    (value if type(value) in scalar_types else
+                     normalize(value, markers))
+                    for key, value in sorted(obj.items(), key=itemgetter(0))}
+        return [elem if type(elem) in scalar_types else
+                normalize(elem, markers)
+                for elem in obj]
 
     def to_yaml_str(self, obj: Any) -> str:
         """convert an object to yaml string"""
-        return json_obj2yaml_str(self.to_json(obj))
+        # to_json emits plain json objects that json_obj2yaml_str would
+        # only normalize again.
+        from miscutil.yamlbackend import yaml_dump
+        return yaml_dump(self.to_json(obj), sort_keys=True)
 
     def to_yaml_lines(self, obj: Any) -> List[str]:
         """convert an object to yaml lines"""
@@ -123,15 +393,26 @@ class JSONEncoder(json.JSONEncoder):
 
     def assertJsonEqualAsYaml(  # pylint: disable=invalid-name
             self,
-            testCase: TestCase,
+            testCase: 'TestCase',
             practical: Any,
             expected: Any,
             memo: Optional[str] = None) -> None:
-        """assert equality of objects in JSON format."""
-        return testCase.assertSequenceEqual(
-            self.to_yaml_lines(practical), self.to_yaml_lines(expected),
-            # msg=none_or(memo, lambda msg: '\n{}'.format(msg)))
-            msg=none_or(memo, '\n{}'.format))
+        """assert equality of objects in JSON format.
+
+        Normalized objects are compared as trees and only differing
+        subtrees are rendered in YAML with their paths.
+        """
+        expected_json = self.to_json(expected)
+        practical_json = self.to_json(practical)
+        if same_json(practical_json, expected_json):
+            return
+        differences = json_differences(expected_json, practical_json)
+        message = 'JSON objects differ{}:\n{}'.format(
+            '' if len(differences) < DIFF_LIMIT else
+            ' (first {})'.format(DIFF_LIMIT),
+            format_json_differences(differences))
+        testCase.fail(message if memo is None else
+                      '{}\n{}'.format(message, memo))
 
 
 def to_yaml_str(obj: Any,
@@ -156,3 +437,64 @@ def obj_to_json(obj: Any,
     """convert an object to json object"""
     return JSONEncoder(show_type=show_type,
                        show_zero_value=show_zero_value).to_json(obj)
+
+
+def _record_format(target: Union[str, Path, IO[str]],
+                   record_format: Optional[str]) -> str:
+    """determine record format from explicit one or suffix of file name."""
+    if record_format is None and isinstance(target, (str, Path)):
+        record_format = RECORD_FORMAT_BY_SUFFIX.get(Path(target).suffix)
+    if record_format not in ('ndjson', 'yaml'):
+        raise ValueError('unknown record format {} for {}'.format(
+            record_format, target))
+    return record_format
+
+
+def write_records(objs: Iterable[Any],
+                  destination: Union[str, Path, IO[str]],
+                  record_format: Optional[str] = None,
+                  show_type: bool = False,
+                  show_zero_value: bool = False) -> int:
+    """write objects one by one as NDJSON or multi-document YAML.
+
+    record_format is 'ndjson' or 'yaml', or is decided from the suffix of
+    destination if it is a file name.  Returns the number of records.
+    """
+    record_format = _record_format(destination, record_format)
+    if isinstance(destination, (str, Path)):
+        with open(destination, 'w', encoding='utf8') as stream:
+            return write_records(
+                objs, stream, record_format,
+                show_type=show_type, show_zero_value=show_zero_value)
+    encoder = JSONEncoder(show_type=show_type,
+                          show_zero_value=show_zero_value)
+    count = 0
+    for obj in objs:
+        if record_format == 'ndjson':
+            destination.write(json.dumps(
+                obj, ensure_ascii=False, default=encoder.default,
+                sort_keys=True))
+            destination.write('\n')
+        else:
+            if count > 0:
+                destination.write('---\n')
+            destination.write(encoder.to_yaml_str(obj))
+        count += 1
+    return count
+
+
+def read_records(source: Union[str, Path, IO[str]],
+                 record_format: Optional[str] = None) -> Iterator[Any]:
+    """read NDJSON or multi-document YAML lazily one record at a time."""
+    record_format = _record_format(source, record_format)
+    if isinstance(source, (str, Path)):
+        with open(source, encoding='utf8') as stream:
+            yield from read_records(stream, record_format)
+        return
+    if record_format == 'yaml':
+        from miscutil.yamlbackend import yaml_load_all
+        yield from yaml_load_all(source)
+        return
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
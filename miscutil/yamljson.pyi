@@ -1,20 +1,29 @@
 import json
-from miscutil import none_or as none_or
-from typing import Any, Collection, Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
 from unittest import TestCase
 
 KEY_NAME_FOR_TYPE: str
+RECORD_FORMAT_BY_SUFFIX: Dict[str, str]
+DIFF_LIMIT: int
+MISSING: Any
 
 def json_obj2yaml_str(in_json_obj: Any, sort_keys: bool=...) -> str: ...
 def json2yaml(in_json: str, sort_keys: bool=...) -> str: ...
 def json2yaml_lines(in_json: str, sort_keys: bool=...) -> List[str]: ...
+def same_json(left: Any, right: Any) -> bool: ...
+def json_differences(expected: Any, actual: Any, limit: int=..., path: str=...) -> List[Tuple[str, Any, Any]]: ...
+def format_json_differences(differences: List[Tuple[str, Any, Any]]) -> str: ...
 def to_json_using_slot(self, attr_names: List[str]=..., using_to_json: Collection[str]=..., with_key_name: bool=...) -> Dict[str, Any]: ...
 
 class JSONEncoder(json.JSONEncoder):
+    PLAN_CACHE_SIZE: int = ...
     other_encoder: Any = ...
     show_type: Any = ...
     show_zero_value: Any = ...
     def __init__(self, *, skipkeys: Any=..., ensure_ascii: Any=..., check_circular: Any=..., allow_nan: Any=..., sort_keys: Any=..., indent: Any=..., separators: Any=..., default: Any=..., other_encoder: Any=..., show_type: bool=..., show_zero_value: bool=...) -> None: ...
+    @classmethod
+    def register_handler(cls, target_type: type, handler: Callable[[Any], Any]) -> None: ...
     def default(self, target: Any) -> Any: ...
     @staticmethod
     def treat_primitive(obj: Any) -> Tuple[bool, Any]: ...
@@ -26,3 +35,5 @@ class JSONEncoder(json.JSONEncoder):
 def to_yaml_str(obj: Any, show_type: bool=..., show_zero_value: bool=...) -> str: ...
 def print_as_yaml_str(obj: Any, show_type: bool=..., show_zero_value: bool=...) -> None: ...
 def obj_to_json(obj: Any, show_type: bool=..., show_zero_value: bool=...) -> Any: ...
+def write_records(objs: Iterable[Any], destination: Union[str, Path, IO[str]], record_format: Optional[str]=..., show_type: bool=..., show_zero_value: bool=...) -> int: ...
+def read_records(source: Union[str, Path, IO[str]], record_format: Optional[str]=...) -> Iterator[Any]: ...
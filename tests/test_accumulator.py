@@ -0,0 +1,154 @@
+"""Tests of online accumulators."""
+import math
+import random
+import statistics
+import unittest
+
+import numpy as np
+
+from miscutil.accumulator import MeanVariance
+from miscutil.accumulator import MinMax
+from miscutil.accumulator import TDigest
+
+NAN = float('nan')
+
+
+def _samples(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.concatenate((rng.normal(100.0, 15.0, count // 2),
+                           rng.exponential(30.0, count - count // 2)))
+
+
+class TestMeanVariance(unittest.TestCase):
+    """MeanVariance agrees with statistics."""
+    def test_update(self):
+        values = [2.0, NAN, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0]
+        non_nan = [value for value in values if not math.isnan(value)]
+        for acc in (MeanVariance().update_many(values),
+                    MeanVariance().update_many(np.array(values)),
+                    MeanVariance().update_many(iter(values))):
+            with self.subTest(acc=acc):
+                self.assertEqual(acc.count, 8)
+                self.assertAlmostEqual(acc.mean, statistics.fmean(non_nan))
+                self.assertAlmostEqual(acc.variance,
+                                       statistics.variance(non_nan))
+                self.assertAlmostEqual(acc.pvariance,
+                                       statistics.pvariance(non_nan))
+                self.assertAlmostEqual(acc.stdev, statistics.stdev(non_nan))
+        one_by_one = MeanVariance()
+        for value in values:
+            one_by_one.update(value)
+        self.assertAlmostEqual(one_by_one.variance,
+                               statistics.variance(non_nan))
+
+    def test_merge(self):
+        values = _samples(1001)
+        merged = MeanVariance()
+        for part in np.array_split(values, 7):
+            merged.merge(MeanVariance().update_many(part))
+        self.assertEqual(merged.count, values.size)
+        self.assertAlmostEqual(merged.mean, float(np.mean(values)))
+        self.assertAlmostEqual(merged.variance,
+                               float(np.var(values, ddof=1)), places=6)
+
+    def test_merge_with_empty(self):
+        acc = MeanVariance().update_many([1.0, 3.0])
+        self.assertEqual(acc.merge(MeanVariance()).to_dict(),
+                         {'count': 2, 'mean': 2.0, 'variance': 2.0})
+        self.assertEqual(MeanVariance().merge(acc).to_dict(),
+                         {'count': 2, 'mean': 2.0, 'variance': 2.0})
+
+    def test_few_values(self):
+        self.assertTrue(math.isnan(MeanVariance().variance))
+        self.assertTrue(math.isnan(MeanVariance().pvariance))
+        single = MeanVariance().update(5.0)
+        self.assertEqual((single.count, single.mean), (1, 5.0))
+        self.assertTrue(math.isnan(single.variance))
+        self.assertEqual(single.pvariance, 0.0)
+        self.assertEqual(MeanVariance().update_many([NAN]).count, 0)
+
+
+class TestMinMax(unittest.TestCase):
+    """MinMax skips NaN and merges."""
+    def test_update_and_merge(self):
+        left = MinMax().update_many([3.0, NAN, -1.0])
+        right = MinMax().update(7.0)
+        self.assertEqual(left.merge(right).to_dict(),
+                         {'count': 3, 'min': -1.0, 'max': 7.0})
+        self.assertEqual(left.merge(MinMax()).count, 3)
+        self.assertEqual(MinMax().merge(left).to_dict(), left.to_dict())
+
+    def test_empty(self):
+        acc = MinMax().update(NAN)
+        self.assertEqual(acc.count, 0)
+        self.assertTrue(math.isnan(acc.min))
+        self.assertTrue(math.isnan(acc.max))
+
+
+class TestTDigest(unittest.TestCase):
+    """TDigest approximates quantiles with bounded centroids."""
+    QUANTILES = (0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999)
+
+    def assert_accurate(self, digest: TDigest, values: np.ndarray) -> None:
+        """check errors in rank of quantiles."""
+        ordered = np.sort(values)
+        for q in self.QUANTILES:
+            rank = np.searchsorted(ordered, digest.quantile(q)) / values.size
+            # the arcsine scale keeps errors in the tails small.
+            self.assertLess(abs(rank - q),
+                            0.002 if min(q, 1 - q) <= 0.01 else 0.01, q)
+        self.assertEqual(digest.quantile(0.0), float(ordered[0]))
+        self.assertEqual(digest.quantile(1.0), float(ordered[-1]))
+
+    def test_accuracy(self):
+        values = _samples(100000)
+        digest = TDigest().update_many(values)
+        self.assertEqual(digest.count, values.size)
+        self.assertLessEqual(digest.means.size, digest.compression)
+        self.assert_accurate(digest, values)
+
+    def test_one_by_one(self):
+        values = _samples(20000, seed=1)
+        digest = TDigest(buffer_size=100)
+        for value in values:
+            digest.update(float(value))
+        self.assert_accurate(digest, values)
+
+    def test_merge(self):
+        values = _samples(50000, seed=2)
+        merged = TDigest()
+        for part in np.array_split(values, 10):
+            merged.merge(TDigest().update_many(part))
+        self.assertEqual(merged.count, values.size)
+        self.assert_accurate(merged, values)
+
+    def test_merge_with_empty(self):
+        digest = TDigest().update_many([1.0, 2.0, 3.0])
+        self.assertEqual(digest.merge(TDigest()).count, 3)
+        empty = TDigest()
+        self.assertEqual(empty.merge(digest).quantile(0.5), 2.0)
+        self.assertEqual(empty.count, 3)
+
+    def test_single_value(self):
+        digest = TDigest().update(42.0)
+        for q in (0.0, 0.3, 0.5, 1.0):
+            self.assertEqual(digest.quantile(q), 42.0)
+        self.assertEqual(digest.to_dict(), {
+            'count': 1, 'min': 42.0, 'p50': 42.0, 'p95': 42.0, 'max': 42.0})
+
+    def test_empty_and_invalid(self):
+        self.assertTrue(math.isnan(TDigest().quantile(0.5)))
+        self.assertTrue(math.isnan(TDigest().update(NAN).quantile(0.5)))
+        digest = TDigest().update_many(range(10))
+        self.assertTrue(math.isnan(digest.quantile(1.5)))
+        self.assertEqual(digest.percentile(50), digest.quantile(0.5))
+
+    def test_small_exact(self):
+        values = [float(num) for num in range(1, 101)]
+        random.Random(0).shuffle(values)
+        digest = TDigest().update_many(values)
+        self.assertAlmostEqual(digest.quantile(0.5), 50.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
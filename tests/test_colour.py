@@ -0,0 +1,71 @@
+"""Tests of colour ramps."""
+import unittest
+
+from miscutil.colour import color_ramp
+from miscutil.colour import color_range
+from miscutil.colour import parse_color
+
+# Ranges given by colour 0.1.5, which color_range used to call.
+COLOUR_RANGES = [
+    (('red', 'blue', 5),
+     ['#ff0000', '#ffff00', '#00ff00', '#00ffff', '#0000ff']),
+    (('#000', '#fff', 4), ['#000000', '#555555', '#aaaaaa', '#ffffff']),
+    (('white', 'black', 3), ['#ffffff', '#7f7f7f', '#000000']),
+    (('#123456', '#abcdef', 6),
+     ['#123456', '#1c5389', '#2671bc', '#4590da', '#78aee5', '#abcdef']),
+    (('yellow', 'cyan', 2), ['#ffff00', '#00ffff']),
+    (('red', 'red', 3), ['#ff0000', '#ff0000', '#ff0000']),
+    (('gray', 'orange', 5),
+     ['#808080', '#a06a60', '#bf6940', '#df7d20', '#ffa500']),
+    (('red', 'blue', 1), ['#ff0000']),
+]
+
+
+class TestColorRange(unittest.TestCase):
+    """color_range gives what colour.Color.range_to gave."""
+    def test_known_ranges(self):
+        for args, expected in COLOUR_RANGES:
+            with self.subTest(args=args):
+                self.assertEqual(color_range(*args), expected)
+
+    def test_cached_copies(self):
+        first = color_range('red', 'blue', 5)
+        first.append('#000000')
+        self.assertEqual(color_range('red', 'blue', 5),
+                         COLOUR_RANGES[0][1])
+
+    def test_other_spaces(self):
+        self.assertEqual(color_range('#000', '#fff', 3, space='rgb'),
+                         ['#000000', '#7f7f7f', '#ffffff'])
+        ramp = color_range('#ff0000', '#0000ff', 5, space='lab')
+        self.assertEqual((ramp[0], ramp[-1]), ('#ff0000', '#0000ff'))
+        self.assertEqual(len(set(ramp)), 5)
+
+    def test_invalid(self):
+        for args in (('red', 'blue', 0), ('#12', 'blue', 2),
+                     ('nocolor', 'blue', 2), ('red', 'blue', 2, 'cmyk')):
+            with self.subTest(args=args):
+                with self.assertRaises(ValueError):
+                    color_range(*args)
+
+
+class TestColorRamp(unittest.TestCase):
+    """color_ramp passes stops at even intervals."""
+    def test_stops(self):
+        ramp = color_ramp(['#000000', '#ff0000', '#ffffff'], 5, space='rgb')
+        self.assertEqual(ramp, ['#000000', '#7f0000', '#ff0000', '#ff7f7f',
+                                '#ffffff'])
+        self.assertEqual(color_ramp(['red', 'blue'], 5),
+                         color_range('red', 'blue', 5))
+        self.assertEqual(color_ramp(['navy'], 3), ['#000080'] * 3)
+        with self.assertRaises(ValueError):
+            color_ramp([], 3)
+
+    def test_parse_color(self):
+        self.assertEqual(parse_color('#f00'), (1.0, 0.0, 0.0))
+        self.assertEqual(parse_color('#00FF00'), (0.0, 1.0, 0.0))
+        self.assertEqual(parse_color('Blue'), (0.0, 0.0, 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
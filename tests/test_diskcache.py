@@ -0,0 +1,149 @@
+"""Tests of DiskCache keys and disk_memoize."""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from miscutil.diskcache import DiskCache
+from miscutil.diskcache import disk_memoize
+
+KEY = DiskCache.key_of('key', (), {})
+_KEY_SCRIPT = '''
+from miscutil.diskcache import DiskCache
+print(DiskCache.key_of(
+    'f', ({'b', 'a', ('x', 1)}, frozenset({2.5, 'q'})),
+    {'opts': {'k2': 1, 'k1': {3, 1}}, 'seq': [1, {'s', 't'}]}))
+'''
+
+
+def _key_with_hash_seed(seed: str) -> str:
+    env = dict(os.environ, PYTHONHASHSEED=seed)
+    return subprocess.run([sys.executable, '-c', _KEY_SCRIPT], env=env,
+                          stdout=subprocess.PIPE, check=True,
+                          universal_newlines=True).stdout
+
+
+class TestKeyOf(unittest.TestCase):
+    """Keys depend on argument values only."""
+    def test_stable_across_hash_seeds(self):
+        keys = {_key_with_hash_seed(seed) for seed in ('1', '2', '3')}
+        self.assertEqual(len(keys), 1)
+
+    def test_dict_insertion_order(self):
+        self.assertEqual(DiskCache.key_of('f', ({'a': 1, 'b': 2},), {}),
+                         DiskCache.key_of('f', ({'b': 2, 'a': 1},), {}))
+        self.assertEqual(DiskCache.key_of('f', (), {'x': 1, 'y': 2}),
+                         DiskCache.key_of('f', (), {'y': 2, 'x': 1}))
+
+    def test_distinct_values(self):
+        keys = {DiskCache.key_of('f', args, {})
+                for args in (([1],), ((1,),), ({1},), (frozenset({1}),),
+                             ({1: None},), (1,), ('1',))}
+        self.assertEqual(len(keys), 7)
+        self.assertNotEqual(DiskCache.key_of('f', (1,), {}),
+                            DiskCache.key_of('f', (1,), {}, version='2'))
+
+
+class TestDiskCacheAge(unittest.TestCase):
+    """Entries expire by the time they were stored."""
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def _age(self, cache: DiskCache, key: str, seconds: float) -> None:
+        path = cache.directory / (key + cache.suffix)
+        stored = time.time() - seconds
+        os.utime(path, (stored, stored))
+
+    def test_expired_entry_is_miss(self):
+        cache = DiskCache(self.directory, max_age_in_sec=60)
+        cache.store(KEY, 'v')
+        self.assertEqual(cache.load(KEY), (True, 'v'))
+        self._age(cache, KEY, 120)
+        self.assertEqual(cache.load(KEY), (False, None))
+        self.assertEqual(cache.get_or_compute(KEY, lambda: 'new'), 'new')
+        self.assertEqual(cache.load(KEY), (True, 'new'))
+
+    def test_hits_keep_age(self):
+        cache = DiskCache(self.directory, max_age_in_sec=60)
+        cache.store(KEY, 'v')
+        self._age(cache, KEY, 50)
+        self.assertEqual(cache.load(KEY), (True, 'v'))
+        path = cache.directory / (KEY + cache.suffix)
+        self.assertLess(path.stat().st_mtime, time.time() - 40)
+        self._age(cache, KEY, 70)
+        self.assertEqual(cache.load(KEY), (False, None))
+
+    def test_evict_least_recently_used(self):
+        cache = DiskCache(self.directory)
+        for age, key in enumerate('abc'):
+            cache.store(key, key * 1000)
+            self._age(cache, key, 100 - age)
+        self.assertTrue(cache.load('a')[0])
+        size = (cache.directory / ('a' + cache.suffix)).stat().st_size
+        cache.max_bytes = 2 * size
+        self.assertEqual(cache.evict(), 1)
+        self.assertEqual([cache.load(key)[0] for key in 'abc'],
+                         [True, False, True])
+
+    def test_evict_expired(self):
+        cache = DiskCache(self.directory, max_age_in_sec=60)
+        cache.store('old', 1)
+        self._age(cache, 'old', 120)
+        cache.store('new', 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.load('old'), (False, None))
+        self.assertEqual(cache.load('new'), (True, 2))
+
+
+class TestDiskCacheBroken(unittest.TestCase):
+    """Broken entries are misses."""
+    def test_truncated_gzip_entry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory, suffix='.pkl.gz')
+            value = list(range(100000))
+            cache.store(KEY, value)
+            path = cache.directory / (KEY + cache.suffix)
+            data = path.read_bytes()
+            for size in (len(data) - 1, len(data) // 2, 5, 0):
+                with self.subTest(size=size):
+                    path.write_bytes(data[:size])
+                    self.assertEqual(cache.load(KEY), (False, None))
+            self.assertEqual(cache.get_or_compute(KEY, lambda: value),
+                             value)
+            self.assertEqual(cache.load(KEY), (True, value))
+
+    def test_broken_gzip_entry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory, suffix='.pkl.gz')
+            cache.store(KEY, list(range(100000)))
+            path = cache.directory / (KEY + cache.suffix)
+            data = bytearray(path.read_bytes())
+            data[len(data) // 2:len(data) // 2 + 8] = b'\xff' * 8
+            path.write_bytes(bytes(data))
+            self.assertEqual(cache.load(KEY), (False, None))
+
+
+class TestDiskMemoize(unittest.TestCase):
+    """disk_memoize computes each distinct call once."""
+    def test_hits_and_misses(self):
+        calls = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            @disk_memoize(directory)
+            def _square(num):
+                calls.append(num)
+                return num * num
+
+            self.assertEqual([_square(3), _square(3), _square(4)],
+                             [9, 9, 16])
+            self.assertEqual(calls, [3, 4])
+            cache = _square.cache  # type: ignore
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
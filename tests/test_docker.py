@@ -0,0 +1,246 @@
+"""Tests of DockerCompose against a fake docker-compose on PATH."""
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from miscutil.docker import ComposeProject
+from miscutil.docker import DockerCompose
+from miscutil.docker import DockerComposeGroup
+
+# Fake docker-compose run in a project directory.  'up' exits with the
+# status in file up_status.  'ps' says healthy from the ready_after-th
+# call after 'up' on, unless ready_after is missing.
+# 'logs -f' prints the lines of file logs and then never ends.  Every call
+# is logged with its time to file calls.
+FAKE_DOCKER_COMPOSE = '''#!{python}
+import os, sys, time
+command = sys.argv[1]
+with open('calls', 'a') as calls:
+    calls.write('{{}} {{}}\\n'.format(time.monotonic(),
+                                    ' '.join(sys.argv[1:])))
+if command == 'up':
+    open('started', 'w').close()
+    sys.exit(int(open('up_status').read()) if os.path.exists('up_status')
+             else 0)
+if command == 'ps':
+    ps_count = 0
+    if os.path.exists('ps_count'):
+        ps_count = int(open('ps_count').read())
+    if os.path.exists('started'):
+        ps_count += 1
+        with open('ps_count', 'w') as out:
+            out.write(str(ps_count))
+    ready = (os.path.exists('ready_after') and
+             ps_count >= int(open('ready_after').read()))
+    print('web  Up (healthy)' if ready else 'web  starting')
+if command == 'logs':
+    for line in open('logs') if os.path.exists('logs') else ():
+        print(line, end='', flush=True)
+    time.sleep(3600)
+'''
+
+
+class TCWithFakeDockerCompose(unittest.TestCase):
+    """Test case having fake docker-compose on PATH."""
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.top = Path(tmp.name)
+        bin_dir = self.top / 'bin'
+        bin_dir.mkdir()
+        script = bin_dir / 'docker-compose'
+        script.write_text(FAKE_DOCKER_COMPOSE.format(python=sys.executable))
+        script.chmod(0o755)
+        patcher = mock.patch.dict(os.environ, {'PATH': '{}{}{}'.format(
+            bin_dir, os.pathsep, os.environ.get('PATH', ''))})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _project_dir(self, name: str, **files: str) -> Path:
+        directory = self.top / name
+        directory.mkdir()
+        (directory / 'calls').touch()
+        for file_name, text in files.items():
+            (directory / file_name).write_text(text)
+        return directory
+
+
+class TestUpInBackground(TCWithFakeDockerCompose):
+    """up_in_background polls, backs off and follows output."""
+    def setUp(self):
+        super().setUp()
+        self.project = self._project_dir('project')
+        self.compose = DockerCompose(str(self.project))
+
+    def _put(self, name: str, text: str) -> None:
+        (self.project / name).write_text(text)
+
+    def _calls(self, command: str):
+        return [float(line.split()[0])
+                for line in (self.project / 'calls').read_text().splitlines()
+                if line.split()[1] == command]
+
+    def _up(self, **kwargs):
+        return self.compose.up_in_background(
+            ['ps'], ['Up', 'healthy'], **kwargs)
+
+    def test_already_running(self):
+        self._put('ready_after', '0')
+        self.assertTrue(self._up().normal_end)
+        self.assertEqual(self._calls('up'), [])
+
+    def test_polling(self):
+        self._put('ready_after', '3')
+        result = self._up(check_interval_in_sec=0.01)
+        self.assertTrue(result.normal_end)
+        self.assertEqual(len(self._calls('up')), 1)
+        self.assertEqual(len(self._calls('ps')), 4)
+
+    def test_max_count(self):
+        result = self._up(max_count=2, check_interval_in_sec=0.01)
+        self.assertFalse(result.normal_end)
+        self.assertEqual(len(self._calls('ps')), 2 + 2)
+
+    def test_up_failure(self):
+        self._put('ready_after', '1')
+        self._put('up_status', '1')
+        result = self.compose.up_in_background(['ps'], ['Up'])
+        self.assertFalse(result.normal_end)
+        self.assertEqual(len(self._calls('ps')), 1)
+
+    def test_backoff(self):
+        self._up(max_count=5, check_interval_in_sec=0.1, backoff_factor=2.0,
+                 max_interval_in_sec=0.4)
+        stamps = self._calls('ps')[1:]
+        gaps = [later - earlier for earlier, later in zip(stamps, stamps[1:])]
+        self.assertEqual(len(gaps), 5)
+        for gap, interval in zip(gaps, (0.1, 0.2, 0.4, 0.4, 0.4)):
+            self.assertGreaterEqual(gap, interval)
+            self.assertLess(gap, interval + 0.5)
+
+    def test_deadline(self):
+        started = time.monotonic()
+        result = self._up(max_count=None, check_interval_in_sec=0.05,
+                          deadline_in_sec=0.5)
+        self.assertFalse(result.normal_end)
+        self.assertGreaterEqual(time.monotonic() - started, 0.5)
+        self.assertLess(time.monotonic() - started, 3.0)
+
+    def test_follow_until_ready(self):
+        self._put('logs', 'web starting\nweb Up and healthy\n')
+        self._put('ready_after', '1')
+        started = time.monotonic()
+        result = self._up(follow_args=['logs', '-f'], deadline_in_sec=30)
+        self.assertTrue(result.normal_end)
+        self.assertLess(time.monotonic() - started, 10.0)
+        self.assertEqual(len(self._calls('ps')), 2)
+        self.assertEqual(len(self._calls('logs')), 1)
+
+    def test_follow_words(self):
+        self._put('logs', 'web listening\n')
+        self._put('ready_after', '1')
+        started = time.monotonic()
+        result = self._up(follow_args=['logs', '-f'],
+                          follow_words=['listening'])
+        self.assertTrue(result.normal_end)
+        self.assertLess(time.monotonic() - started, 2.0)
+
+    def test_follow_bounded_by_max_count(self):
+        self._put('logs', 'web starting\n')
+        started = time.monotonic()
+        result = self._up(follow_args=['logs', '-f'], max_count=2,
+                          check_interval_in_sec=0.2)
+        self.assertFalse(result.normal_end)
+        self.assertLess(time.monotonic() - started, 5.0)
+
+    def test_follow_bounded_by_deadline(self):
+        self._put('logs', 'web starting\n')
+        started = time.monotonic()
+        result = self._up(follow_args=['logs', '-f'], max_count=None,
+                          deadline_in_sec=0.5)
+        self.assertFalse(result.normal_end)
+        self.assertLess(time.monotonic() - started, 3.0)
+
+    def test_follow_requires_bound(self):
+        with self.assertRaises(ValueError):
+            self.compose.up_in_background(
+                ['ps'], ['Up'], max_count=None, follow_args=['logs', '-f'])
+
+
+def _commands(directory: Path):
+    return [line.split()[1]
+            for line in (directory / 'calls').read_text().splitlines()]
+
+
+class TestDockerComposeGroup(TCWithFakeDockerCompose):
+    """DockerComposeGroup brings up projects after their dependencies."""
+    def _project(self, name: str, depends_on=(), up_options=None, **files):
+        return ComposeProject(
+            name, str(self._project_dir(name, **files)), ['ps'],
+            ['Up', 'healthy'], tuple(depends_on),
+            dict({'check_interval_in_sec': 0.01, 'max_count': 3},
+                 **(up_options or {})))
+
+    def test_dependencies(self):
+        group = DockerComposeGroup([
+            self._project('db', ready_after='2'),
+            self._project('web', ['db'], ready_after='1')])
+        self.assertEqual([name for name, _ in group.up()], ['db', 'web'])
+        self.assertTrue(group.ready)
+        self.assertEqual(set(group.down()), {'db', 'web'})
+        self.assertEqual(_commands(self.top / 'web')[-1], 'down')
+
+    def test_down_by_docker_compose(self):
+        projects = [self._project(name, ready_after='1')
+                    for name in ('db', 'web', 'cache')]
+        group = DockerComposeGroup(projects)
+        for _ in group.up():
+            pass
+        with mock.patch.object(DockerCompose, 'down', autospec=True,
+                               side_effect=DockerCompose.down) as down:
+            results = group.down()
+        self.assertEqual(sorted(call[0][0].on_directory
+                                for call in down.call_args_list),
+                         sorted(project.on_directory
+                                for project in projects))
+        self.assertEqual(sorted(results), ['cache', 'db', 'web'])
+        self.assertTrue(all(result.normal_end
+                            for result in results.values()))
+        self.assertEqual((group.started, group.results), ([], {}))
+
+    def test_skipped_after_failure(self):
+        group = DockerComposeGroup([
+            self._project('db'),
+            self._project('web', ['db'], ready_after='1')])
+        results = dict(group.up())
+        self.assertFalse(results['db'].normal_end)
+        self.assertEqual(group.skipped, ['web'])
+        self.assertFalse(group.ready)
+        self.assertEqual(_commands(self.top / 'web'), [])
+
+    def test_unknown_and_cyclic_dependencies(self):
+        with self.assertRaises(ValueError):
+            DockerComposeGroup([self._project('web', ['db'])])
+        with self.assertRaises(ValueError):
+            DockerComposeGroup([self._project('a', ['b']),
+                                self._project('b', ['a'])])
+
+    def test_down_after_exception(self):
+        projects = [
+            self._project('slow', ready_after='3',
+                          up_options={'check_interval_in_sec': 0.2}),
+            self._project('bad', up_options={'no_such_option': 1})]
+        with self.assertRaises(TypeError):
+            with DockerComposeGroup(projects):
+                self.fail('entered')
+        for name in ('slow', 'bad'):
+            self.assertEqual(_commands(self.top / name)[-1:], ['down'])
+        self.assertIn('up', _commands(self.top / 'slow'))
+
+
+if __name__ == '__main__':
+    unittest.main()
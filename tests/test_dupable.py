@@ -0,0 +1,90 @@
+"""Tests of DupableIterable and its replay buffer."""
+import gc
+import unittest
+
+from miscutil import DupableIterable
+from miscutil import _ReplayBuffer
+
+SIZE = _ReplayBuffer.CHUNK_SIZE
+
+
+def _counting(count: int, pulled: list):
+    for num in range(count):
+        pulled.append(num)
+        yield num
+
+
+class TestDupableIterable(unittest.TestCase):
+    """DupableIterable replays its source to every iteration."""
+    def test_replay(self):
+        pulled: list = []
+        elems = DupableIterable(_counting(3 * SIZE + 5, pulled))
+        self.assertEqual(list(elems), list(range(3 * SIZE + 5)))
+        self.assertEqual(list(elems), list(range(3 * SIZE + 5)))
+        self.assertEqual(len(pulled), 3 * SIZE + 5)
+
+    def test_lazy_pull(self):
+        pulled: list = []
+        elems = DupableIterable(_counting(3 * SIZE, pulled))
+        cursor = iter(elems)
+        self.assertEqual([next(cursor) for _ in range(SIZE + 1)],
+                         list(range(SIZE + 1)))
+        self.assertEqual(len(pulled), SIZE + 1)
+
+    def test_interleaved_cursors(self):
+        elems = DupableIterable(iter(range(2 * SIZE + 3)))
+        first = iter(elems)
+        second = elems.dup()
+        got_first = [next(first) for _ in range(SIZE + 7)]
+        got_second = list(second)
+        got_first.extend(first)
+        self.assertEqual(got_first, list(range(2 * SIZE + 3)))
+        self.assertEqual(got_second, list(range(2 * SIZE + 3)))
+
+    def test_len_after_partial_iteration(self):
+        elems = DupableIterable(iter(range(2 * SIZE + 10)))
+        cursor = iter(elems)
+        head = [next(cursor) for _ in range(SIZE + 3)]
+        self.assertEqual(len(elems), 2 * SIZE + 10)
+        self.assertEqual(head + list(cursor), list(range(2 * SIZE + 10)))
+        self.assertEqual(list(elems), list(range(2 * SIZE + 10)))
+
+    def test_len_of_empty(self):
+        elems: DupableIterable = DupableIterable([])
+        self.assertEqual(len(elems), 0)
+        self.assertEqual(list(elems), [])
+
+    def test_dup_of_dupable_shares_buffer(self):
+        pulled: list = []
+        elems = DupableIterable(_counting(SIZE + 1, pulled))
+        again = DupableIterable(elems)
+        self.assertEqual(list(elems), list(again))
+        self.assertEqual(len(pulled), SIZE + 1)
+
+    def test_release_behind_cursors(self):
+        elems = DupableIterable(iter(range(4 * SIZE)))
+        cursor = iter(elems)
+        buffer = elems._buffer  # pylint: disable=protected-access
+        del elems
+        gc.collect()
+        head = [next(cursor) for _ in range(2 * SIZE + 1)]
+        self.assertLessEqual(len(buffer.chunks), 2)
+        self.assertEqual(buffer.head_chunk_no, 2)
+        self.assertEqual(head + list(cursor), list(range(4 * SIZE)))
+
+    def test_slowest_cursor_keeps_chunks(self):
+        elems = DupableIterable(iter(range(4 * SIZE)))
+        slow = iter(elems)
+        fast = iter(elems)
+        buffer = elems._buffer  # pylint: disable=protected-access
+        del elems
+        gc.collect()
+        next(slow)
+        fast_elems = list(fast)
+        self.assertEqual(buffer.head_chunk_no, 0)
+        self.assertEqual(fast_elems, list(range(4 * SIZE)))
+        self.assertEqual([0] + list(slow), list(range(4 * SIZE)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests of filter_stderr."""
+from contextlib import redirect_stderr
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from miscutil.files import FD_READER_TIMEOUT_IN_SEC
+from miscutil.files import StderrLineFilter
+from miscutil.files import filter_stderr
+
+
+def _is_noise(line: str, _prev: str) -> bool:
+    return 'noise' in line
+
+
+class TestStderrLineFilter(unittest.TestCase):
+    """Lines are filtered as soon as they complete."""
+    def test_partial_lines(self):
+        out = io.StringIO()
+        line_filter = StderrLineFilter(_is_noise, out)
+        for text in ('ke', 'ep 1\nnoi', 'se\nkeep', ' 2'):
+            line_filter.write(text)
+        self.assertEqual(out.getvalue(), 'keep 1\n')
+        line_filter.finish()
+        self.assertEqual(out.getvalue(), 'keep 1\nkeep 2\n')
+        self.assertEqual(line_filter.suppressed_count, 1)
+
+    def test_callback_writing_to_stderr(self):
+        out = io.StringIO()
+
+        def _noisy(line: str, _prev: str) -> bool:
+            print('checked ' + line, file=sys.stderr)
+            return 'noise' in line
+
+        def _run():
+            with redirect_stderr(out):
+                with filter_stderr(_noisy, streaming=True):
+                    print('noise', file=sys.stderr)
+                    print('keep', file=sys.stderr)
+
+        runner = threading.Thread(target=_run, daemon=True)
+        runner.start()
+        runner.join(10)
+        self.assertFalse(runner.is_alive(), 'deadlocked')
+        self.assertEqual(out.getvalue(),
+                         'checked noise\nchecked keep\nkeep\n')
+
+
+class TestFilterStderrOfFd(unittest.TestCase):
+    """capture_fd filters file descriptor 2 too."""
+    def test_child_keeping_fd(self):
+        started = time.monotonic()
+        with filter_stderr(_is_noise, capture_fd=True) as line_filter:
+            child = subprocess.Popen(  # pylint: disable=consider-using-with
+                [sys.executable, '-c',
+                 'import sys, time\n'
+                 'time.sleep({})\n'
+                 'print("noise", file=sys.stderr)'.format(
+                     3 * FD_READER_TIMEOUT_IN_SEC)])
+        self.assertLess(time.monotonic() - started,
+                        2 * FD_READER_TIMEOUT_IN_SEC)
+        child.wait()
+        deadline = time.monotonic() + 10
+        while (line_filter.suppressed_count == 0 and
+               time.monotonic() < deadline):
+            time.sleep(0.05)
+        self.assertEqual(line_filter.suppressed_count, 1)
+
+    def test_writes_to_fd(self):
+        with filter_stderr(_is_noise, capture_fd=True) as line_filter:
+            os.write(2, b'noise from fd\n')
+        self.assertEqual(line_filter.suppressed_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Tests of iterator helpers."""
+import unittest
+
+from miscutil import Pipeline
+from miscutil import count_up
+from miscutil import existing
+from miscutil import head
+from miscutil import length
+from miscutil import missing
+from miscutil import nth
+
+
+class TestNth(unittest.TestCase):
+    """nth counts negative ordinals from the last element."""
+    def test_list(self):
+        elems = [10, 11, 12]
+        self.assertEqual([nth(num, elems) for num in (-1, -2, -3)],
+                         [12, 11, 10])
+        self.assertEqual(nth(0, elems), 10)
+
+    def test_iterator(self):
+        pulled = []
+
+        def _elems():
+            for num in range(1000):
+                pulled.append(num)
+                yield num
+
+        self.assertEqual(nth(-2, _elems()), 998)
+        self.assertEqual(len(pulled), 1000)
+        self.assertEqual(nth(-1, iter([7])), 7)
+
+    def test_dict(self):
+        elems = {'a': 1, 'b': 2, 'c': 3}
+        self.assertEqual(nth(-1, elems), 'c')
+        self.assertEqual(nth(-3, elems), 'a')
+        self.assertEqual(nth(-1, elems.values()), 3)
+
+    def test_out_of_range(self):
+        self.assertEqual(nth(-4, [1, 2, 3], 'default'), 'default')
+        self.assertEqual(nth(-4, iter([1, 2, 3]), 'default'), 'default')
+        self.assertEqual(nth(-3, {'a': 1}, 'default'), 'default')
+        self.assertIsNone(nth(-4, [1, 2, 3]))
+        self.assertEqual(nth(3, [1, 2, 3], 'default'), 'default')
+
+    def test_empty(self):
+        self.assertIsNone(nth(-1, iter([])))
+        self.assertEqual(nth(-1, iter([]), 'default'), 'default')
+        self.assertEqual(nth(-1, [], 'default'), 'default')
+        self.assertEqual(nth(-1, (elem for elem in ()), 0), 0)
+
+
+class TestIteratorHelpers(unittest.TestCase):
+    """Helpers read as few elements as they need."""
+    def test_existing_and_missing(self):
+        self.assertTrue(existing([None]))
+        self.assertTrue(existing([0]))
+        self.assertFalse(existing([]))
+        self.assertFalse(missing([None]))
+        self.assertTrue(missing(iter([])))
+        self.assertTrue(existing(count_up()))
+
+    def test_head_reads_count_elements(self):
+        elems = iter(range(10))
+        self.assertEqual(list(head(3, elems)), [0, 1, 2])
+        self.assertEqual(next(elems), 3)
+        self.assertEqual(list(head(0, elems)), [])
+        self.assertEqual(list(head(-1, elems)), [])
+        self.assertEqual(next(elems), 4)
+        self.assertEqual(list(head(5, [1, 2])), [1, 2])
+
+    def test_length(self):
+        self.assertEqual(length([1, None, 3]), 3)
+        self.assertEqual(length(range(10 ** 12)), 10 ** 12)
+        self.assertEqual(length({'a': 1, 'b': 2}), 2)
+        elems = iter(range(5))
+        self.assertEqual(length(elems), 5)
+        self.assertEqual(list(elems), [])
+        self.assertEqual(length(elem for elem in []), 0)
+
+
+class TestPipeline(unittest.TestCase):
+    """Pipeline chains lazy operations."""
+    def test_lazy_on_endless_source(self):
+        self.assertEqual(
+            Pipeline(count_up()).map(lambda num: num * num)
+            .filter(lambda num: num % 2).take(3).to_list(),
+            [1, 9, 25])
+        self.assertTrue(Pipeline(count_up()).any(lambda num: num > 100))
+        self.assertFalse(Pipeline(count_up()).all(lambda num: num < 100))
+        self.assertEqual(Pipeline(count_up()).take(4).count(), 4)
+        self.assertEqual(next(iter(Pipeline(count_up()).batched(3))),
+                         (0, 1, 2))
+        self.assertEqual(next(iter(Pipeline(count_up()).window(2))), (0, 1))
+
+    def test_consumed_once_over_iterator(self):
+        pipeline = Pipeline(iter([1, 2, 3])).map(str)
+        self.assertEqual(pipeline.to_list(), ['1', '2', '3'])
+        self.assertEqual(pipeline.to_list(), [])
+
+    def test_groups_with_short_last(self):
+        elems = range(7)
+        self.assertEqual(Pipeline(elems).batched(3).to_list(),
+                         [(0, 1, 2), (3, 4, 5), (6,)])
+        self.assertEqual(Pipeline(elems).chunked(3).to_list(),
+                         [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(Pipeline(range(4)).window(3).to_list(),
+                         [(0, 1, 2), (1, 2, 3)])
+
+    def test_groups_larger_than_input(self):
+        self.assertEqual(Pipeline(range(2)).batched(5).to_list(), [(0, 1)])
+        self.assertEqual(Pipeline(range(2)).chunked(5).to_list(), [[0, 1]])
+        self.assertEqual(Pipeline(range(2)).window(5).to_list(), [])
+        self.assertEqual(Pipeline([]).batched(2).to_list(), [])
+        self.assertEqual(Pipeline([]).chunked(2).to_list(), [])
+
+    def test_invalid_size(self):
+        for operator in ('batched', 'chunked', 'window'):
+            with self.subTest(operator=operator):
+                with self.assertRaises(ValueError):
+                    getattr(Pipeline([1]), operator)(0)
+
+    def test_predicates(self):
+        self.assertTrue(Pipeline([0, 1]).any())
+        self.assertFalse(Pipeline([0, 1]).all())
+        self.assertTrue(Pipeline([]).all())
+        self.assertEqual(Pipeline([0, 1, 2, None]).filter().to_list(),
+                         [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
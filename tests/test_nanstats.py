@@ -0,0 +1,86 @@
+"""Tests of NaN aware statistics."""
+from typing import Any
+from typing import Callable
+from typing import List
+import array
+import math
+import unittest
+
+import numpy as np
+
+from miscutil import nanstats
+
+NAN = float('nan')
+NUMS = [3.0, NAN, 1.0, 4.0, NAN, 1.0, 5.0, 9.0, 2.0, 6.0]
+NON_NAN = [num for num in NUMS if not math.isnan(num)]
+
+
+def _inputs(nums: List[float]) -> List[Any]:
+    """get the same numbers as list, ndarray, buffer and generator."""
+    return [list(nums), np.array(nums), np.array(nums, dtype=np.float32),
+            array.array('d', nums), (num for num in nums)]
+
+
+class TestReductions(unittest.TestCase):
+    """Reductions skip NaN whatever the input is."""
+    EXPECTED = {
+        nanstats.safe_max: 9.0,
+        nanstats.safe_min: 1.0,
+        nanstats.safe_mean: sum(NON_NAN) / len(NON_NAN),
+        nanstats.safe_median: float(np.percentile(NON_NAN, 50)),
+    }
+
+    def assert_all_inputs(self, func: Callable[[Any], float],
+                          nums: List[float], expected: float) -> None:
+        """check func gives expected on every kind of input."""
+        for nums_in in _inputs(nums):
+            with self.subTest(func=func.__name__, nums=type(nums_in)):
+                actual = func(nums_in)
+                self.assertIs(type(actual), float)
+                if math.isnan(expected):
+                    self.assertTrue(math.isnan(actual))
+                else:
+                    self.assertAlmostEqual(actual, expected)
+
+    def test_values(self):
+        for func, expected in self.EXPECTED.items():
+            self.assert_all_inputs(func, NUMS, expected)
+
+    def test_percentile(self):
+        for percent in (0.0, 12.5, 50.0, 90.0, 100.0):
+            self.assert_all_inputs(
+                lambda nums, p=percent: nanstats.safe_percentile(nums, p),
+                NUMS, float(np.percentile(NON_NAN, percent)))
+
+    def test_all_nan_and_empty(self):
+        for nums in ([NAN, NAN], []):
+            for func in self.EXPECTED:
+                self.assert_all_inputs(func, nums, NAN)
+            self.assert_all_inputs(
+                lambda nums: nanstats.safe_percentile(nums, 10), nums, NAN)
+
+    def test_integer_buffers(self):
+        self.assertEqual(nanstats.safe_max(array.array('i', [1, 7, 3])), 7.0)
+        self.assertEqual(nanstats.safe_mean(np.arange(5)), 2.0)
+
+    def test_invalid_percent(self):
+        self.assertTrue(math.isnan(nanstats.safe_percentile(NUMS, 101)))
+
+
+class TestNnan(unittest.TestCase):
+    """nnan omits NaN."""
+    def test_arrays(self):
+        for nums in (np.array(NUMS), array.array('d', NUMS)):
+            with self.subTest(nums=type(nums)):
+                result = nanstats.nnan(nums)
+                self.assertIsInstance(result, np.ndarray)
+                self.assertEqual(result.tolist(), NON_NAN)
+
+    def test_iterables(self):
+        result = nanstats.nnan(num for num in NUMS)
+        self.assertEqual(list(result), NON_NAN)
+        self.assertEqual(list(result), NON_NAN)
+
+
+if __name__ == '__main__':
+    unittest.main()
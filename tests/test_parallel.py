@@ -0,0 +1,123 @@
+"""Tests of parallel maps."""
+from typing import Iterator
+from typing import List
+import os
+import threading
+import time
+import unittest
+
+from miscutil import count_up
+from miscutil import head
+from miscutil.parallel import pimap
+from miscutil.parallel import pmap
+
+
+def _square(num: int) -> int:
+    return num * num
+
+
+def _pid(_: int) -> int:
+    return os.getpid()
+
+
+def _fail_on_three(num: int) -> int:
+    if num == 3:
+        raise KeyError(num)
+    return num
+
+
+def _sleep_reversed(num: int) -> int:
+    time.sleep(0.01 * (5 - num % 5))
+    return num
+
+
+class TestPmap(unittest.TestCase):
+    """pmap and pimap map like map does."""
+    def test_order(self):
+        for chunk_size in (1, 3, 100):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(
+                    pmap(_sleep_reversed, range(23), max_workers=4,
+                         chunk_size=chunk_size),
+                    list(range(23)))
+
+    def test_unordered(self):
+        results = pmap(_sleep_reversed, range(10), max_workers=5,
+                       ordered=False)
+        self.assertEqual(sorted(results), list(range(10)))
+        self.assertNotEqual(results, list(range(10)))
+
+    def test_processes(self):
+        self.assertEqual(pmap(_square, range(20), max_workers=2,
+                              use_processes=True, chunk_size=3),
+                         [num * num for num in range(20)])
+        pids = set(pmap(_pid, range(8), max_workers=2, use_processes=True))
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_empty(self):
+        self.assertEqual(pmap(_square, []), [])
+        self.assertEqual(pmap(_square, [], ordered=False), [])
+
+    def test_exception(self):
+        for ordered in (True, False):
+            with self.subTest(ordered=ordered):
+                results = pimap(_fail_on_three, range(10), max_workers=2,
+                                ordered=ordered)
+                with self.assertRaises(KeyError):
+                    for _ in results:
+                        pass
+        with self.assertRaises(KeyError):
+            pmap(_fail_on_three, range(10), max_workers=2,
+                 use_processes=True)
+        results = pimap(_fail_on_three, range(10), max_workers=1)
+        self.assertEqual(list(head(3, results)), [0, 1, 2])
+        with self.assertRaises(KeyError):
+            next(results)
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            pmap(_square, range(3), chunk_size=0)
+
+
+class TestPimapEarlyStop(unittest.TestCase):
+    """pimap reads endless sources lazily and stops with the consumer."""
+    def test_endless_source(self):
+        consumed: List[int] = []
+
+        def _source() -> Iterator[int]:
+            for num in count_up():
+                consumed.append(num)
+                yield num
+
+        results = pimap(_square, _source(), max_workers=2, chunk_size=4,
+                        prefetch=3)
+        self.assertEqual(list(head(5, results)), [0, 1, 4, 9, 16])
+        # chunks in flight and the ones refilled while taking five
+        self.assertLessEqual(len(consumed), 4 * (3 + 2))
+        results.close()  # type: ignore
+        count = len(consumed)
+        time.sleep(0.05)
+        self.assertEqual(len(consumed), count)
+
+    def test_cancel_pending(self):
+        started: List[int] = []
+        release = threading.Event()
+
+        def _block(num: int) -> int:
+            started.append(num)
+            if num > 0:
+                release.wait(5)
+            return num
+
+        results = pimap(_block, count_up(), max_workers=2, prefetch=10)
+        self.assertEqual(next(results), 0)
+        timer = threading.Timer(0.1, release.set)
+        timer.start()
+        results.close()  # type: ignore
+        timer.join()
+        # chunks queued behind the two running ones are cancelled.
+        self.assertLessEqual(len(started), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""Tests of compressed pickle files."""
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from miscutil import files
+from miscutil.files import pickledump
+from miscutil.files import pickledump_split
+from miscutil.files import pickleload
+from miscutil.files import pickleload_split
+
+BLOCK_SIZE = 1000
+STOCK_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+
+def _sample():
+    return {'text': 'x' * (5 * BLOCK_SIZE + 17),
+            'nums': list(range(3 * BLOCK_SIZE)),
+            'array': np.arange(4 * BLOCK_SIZE, dtype=np.float64)}
+
+
+class TestPickleCodecs(unittest.TestCase):
+    """Pickle files span several blocks compressed one by one."""
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = mock.patch.object(files, 'PICKLE_BLOCK_SIZE', BLOCK_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _path(self, suffix: str) -> Path:
+        return Path(self._tmp.name, 'obj.pkl' + suffix)
+
+    def assertSample(self, obj):  # pylint: disable=invalid-name
+        expected = _sample()
+        self.assertEqual(obj['text'], expected['text'])
+        self.assertEqual(obj['nums'], expected['nums'])
+        np.testing.assert_array_equal(obj['array'], expected['array'])
+
+    def test_round_trip(self):
+        for suffix in ('', '.gz', '.bz2', '.xz'):
+            for dump_threads in (1, 4):
+                for load_threads in (1, 4):
+                    with self.subTest(suffix=suffix, dump=dump_threads,
+                                      load=load_threads):
+                        path = self._path(suffix)
+                        pickledump(_sample(), path, threads=dump_threads)
+                        self.assertSample(
+                            pickleload(path, threads=load_threads))
+
+    def test_compresslevel(self):
+        for suffix in ('.gz', '.bz2', '.xz'):
+            with self.subTest(suffix=suffix):
+                path = self._path(suffix)
+                pickledump(_sample(), path, compresslevel=1)
+                self.assertSample(pickleload(path))
+
+    def test_read_by_stock_readers(self):
+        for suffix, stock_open in STOCK_OPENERS.items():
+            with self.subTest(suffix=suffix):
+                path = self._path(suffix)
+                pickledump(_sample(), path, threads=4)
+                with stock_open(path, 'rb') as stream:
+                    self.assertSample(pickle.load(stream))
+
+    def test_gzip_members_carry_size(self):
+        path = self._path('.gz')
+        pickledump(_sample(), path)
+        data = path.read_bytes()
+        offset = 0
+        count = 0
+        while offset < len(data):
+            # pylint: disable=protected-access
+            size = files._gzip_member_size(data[offset:])
+            self.assertIsNotNone(size)
+            offset += size
+            count += 1
+        self.assertEqual(offset, len(data))
+        self.assertGreater(count, 1)
+
+    def test_load_files_of_stock_writers(self):
+        for suffix, stock_open in STOCK_OPENERS.items():
+            with self.subTest(suffix=suffix):
+                path = self._path(suffix)
+                with stock_open(path, 'wb') as stream:
+                    pickle.dump(_sample(), stream)
+                self.assertSample(pickleload(path, threads=4))
+
+    def test_load_pre_series_gzip(self):
+        # pickledump used to write gzip.open with the default protocol.
+        path = self._path('.gz')
+        with gzip.open(str(path), 'wb') as stream:
+            pickle.dump(_sample(), stream, protocol=pickle.DEFAULT_PROTOCOL)
+        self.assertSample(pickleload(path))
+        self.assertSample(pickleload(str(path), threads=1))
+
+    def test_corrupt_gzip_member(self):
+        path = self._path('.gz')
+        pickledump(_sample(), path)
+        data = bytearray(path.read_bytes())
+        data[-8] ^= 0xff  # CRC of the last member
+        path.write_bytes(bytes(data))
+        with self.assertRaises(OSError):
+            pickleload(path)
+
+    def test_truncated_gzip_member(self):
+        path = self._path('.gz')
+        pickledump(_sample(), path)
+        data = path.read_bytes()
+        # pylint: disable=protected-access
+        for size in (len(data) - 1, len(data) - files._GZIP_TRAILER.size,
+                     len(data) // 2, files._GZIP_HEADER.size + 1, 5):
+            for threads in (1, 4):
+                with self.subTest(size=size, threads=threads):
+                    path.write_bytes(data[:size])
+                    with self.assertRaises((EOFError, OSError)):
+                        pickleload(path, threads=threads)
+
+    def test_broken_deflate_stream(self):
+        path = self._path('.gz')
+        pickledump(_sample(), path)
+        data = bytearray(path.read_bytes())
+        # pylint: disable=protected-access
+        data[files._GZIP_HEADER.size:files._GZIP_HEADER.size + 8] = (
+            b'\xff' * 8)
+        path.write_bytes(bytes(data))
+        for threads in (1, 4):
+            with self.subTest(threads=threads):
+                with self.assertRaises(OSError):
+                    pickleload(path, threads=threads)
+
+    def test_missing_codec_library(self):
+        for suffix, module in (('.zst', 'zstandard'), ('.lz4', 'lz4')):
+            if getattr(files, module) is not None:
+                continue
+            with self.subTest(suffix=suffix):
+                with self.assertRaisesRegex(ImportError, module):
+                    pickledump(_sample(), self._path(suffix))
+
+
+class TestSplitPickle(unittest.TestCase):
+    """Split pickles keep out-of-band buffers in a raw file."""
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = Path(self._tmp.name, 'obj.pkl.gz')
+        self.buffer_path = Path(str(self.path) + files.BUFFER_FILE_SUFFIX)
+
+    def test_round_trip(self):
+        obj = {'a': np.arange(1000, dtype=np.float64),
+               'b': np.arange(7, dtype=np.int8),
+               'matrix': np.arange(12, dtype=np.int32).reshape(3, 4).T,
+               'empty': np.zeros(0), 'text': 'x', 'nums': [1, 2]}
+        pickledump_split(obj, self.path)
+        for use_mmap in (True, False):
+            with self.subTest(use_mmap=use_mmap):
+                loaded = pickleload_split(self.path, use_mmap=use_mmap)
+                self.assertEqual(sorted(loaded), sorted(obj))
+                for key in ('a', 'b', 'matrix', 'empty'):
+                    np.testing.assert_array_equal(loaded[key], obj[key])
+                    self.assertEqual(loaded[key].dtype, obj[key].dtype)
+                self.assertEqual(loaded['text'], 'x')
+                self.assertEqual(loaded['nums'], [1, 2])
+        self.assertFalse(pickleload_split(self.path)['a'].flags.writeable)
+
+    def test_aligned_buffers(self):
+        pickledump_split([np.arange(3, dtype=np.int8),
+                          np.arange(5, dtype=np.float64)], self.path)
+        loaded = pickleload_split(self.path)
+        for array in loaded:
+            self.assertEqual(
+                array.ctypes.data % files.BUFFER_ALIGNMENT, 0)
+
+    def test_without_buffers(self):
+        obj = {'text': 'no arrays', 'nums': list(range(10))}
+        pickledump_split(obj, self.path)
+        self.assertEqual(self.buffer_path.stat().st_size, 0)
+        for use_mmap in (True, False):
+            with self.subTest(use_mmap=use_mmap):
+                self.assertEqual(
+                    pickleload_split(self.path, use_mmap=use_mmap), obj)
+
+    def test_only_empty_buffers(self):
+        pickledump_split([np.zeros(0), np.zeros(0)], self.path)
+        loaded = pickleload_split(self.path)
+        self.assertEqual([array.shape for array in loaded], [(0,), (0,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Tests of aggregating profiling timers."""
+import math
+import threading
+import time
+import unittest
+
+from miscutil.profiling import HISTOGRAM_STEPS_PER_OCTAVE
+from miscutil.profiling import Profiler
+from miscutil.profiling import TimingStats
+
+TOLERANCE = 2 ** (1 / HISTOGRAM_STEPS_PER_OCTAVE) - 1
+
+
+class TestTimingStats(unittest.TestCase):
+    """TimingStats estimates quantiles within a bucket width."""
+    def test_quantiles(self):
+        durations = [1000 + 37 * num for num in range(1000)]
+        stats = TimingStats()
+        for elapsed_ns in reversed(durations):
+            stats.add(elapsed_ns, cpu_ns=1)
+        for q in (0.0, 0.1, 0.5, 0.95, 0.99, 1.0):
+            exact = durations[max(0, math.ceil(q * len(durations)) - 1)]
+            self.assertLessEqual(abs(stats.quantile_ns(q) - exact),
+                                 exact * TOLERANCE, q)
+        self.assertEqual((stats.count, stats.min_ns, stats.max_ns,
+                          stats.total_ns, stats.cpu_ns),
+                         (1000, durations[0], durations[-1],
+                          sum(durations), 1000))
+
+    def test_clipped_by_extrema(self):
+        stats = TimingStats().add(1000)
+        self.assertEqual(stats.quantile_ns(0.5), 1000.0)
+        stats.add(1001)
+        self.assertTrue(1000.0 <= stats.quantile_ns(1.0) <= 1001.0)
+
+    def test_zero_and_empty(self):
+        self.assertTrue(math.isnan(TimingStats().quantile_ns(0.5)))
+        stats = TimingStats().add(0).add(0).add(100)
+        self.assertEqual(stats.quantile_ns(0.5), 0.0)
+        self.assertTrue(math.isnan(stats.quantile_ns(2.0)))
+
+    def test_merge(self):
+        left = TimingStats().add(10).add(20)
+        right = TimingStats().add(5).add(40)
+        whole = TimingStats()
+        for elapsed_ns in (10, 20, 5, 40):
+            whole.add(elapsed_ns)
+        left.merge(right)
+        self.assertEqual(left.to_dict(), whole.to_dict())
+        self.assertEqual(left.merge(TimingStats()).count, 4)
+        self.assertEqual(TimingStats().merge(left).to_dict(),
+                         whole.to_dict())
+
+    def test_to_dict(self):
+        stats = TimingStats().add(2 * 10 ** 9, cpu_ns=10 ** 9)
+        self.assertEqual(stats.to_dict(), {
+            'count': 1, 'total': 2.0, 'cpu': 1.0, 'min': 2.0, 'max': 2.0,
+            'p50': 2.0, 'p95': 2.0})
+
+
+class TestProfiler(unittest.TestCase):
+    """Timers record durations by nested labels."""
+    def test_nesting(self):
+        profiler = Profiler()
+        with profiler.timer('outer') as outer:
+            with profiler.timer('inner'):
+                time.sleep(0.01)
+            with profiler.timer('inner'):
+                pass
+        self.assertEqual(outer.path, 'outer')
+        self.assertEqual(list(profiler.to_dict()),
+                         ['outer', 'outer/inner'])
+        self.assertEqual(profiler.stats['outer/inner'].count, 2)
+        self.assertGreaterEqual(profiler.stats['outer'].total_ns,
+                                profiler.stats['outer/inner'].total_ns)
+        self.assertGreaterEqual(profiler.stats['outer/inner'].max_ns,
+                                10 ** 7)
+
+    def test_decorator(self):
+        profiler = Profiler()
+
+        @profiler.timer('call')
+        def _double(num):
+            """doubles num."""
+            return 2 * num
+
+        with profiler.timer('caller'):
+            self.assertEqual([_double(1), _double(2)], [2, 4])
+        self.assertEqual(_double.__doc__, 'doubles num.')
+        self.assertEqual(profiler.stats['caller/call'].count, 2)
+
+    def test_exception(self):
+        profiler = Profiler()
+        with self.assertRaises(KeyError):
+            with profiler.timer('outer'):
+                with profiler.timer('failing'):
+                    raise KeyError('x')
+        with profiler.timer('next'):
+            pass
+        self.assertEqual(sorted(profiler.stats),
+                         ['next', 'outer', 'outer/failing'])
+
+    def test_threads(self):
+        profiler = Profiler()
+        barrier = threading.Barrier(4)
+
+        def _work():
+            with profiler.timer('thread'):
+                barrier.wait()
+                for _ in range(100):
+                    with profiler.timer('step'):
+                        pass
+
+        threads = [threading.Thread(target=_work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({label: stats.count
+                          for label, stats in profiler.stats.items()},
+                         {'thread': 4, 'thread/step': 400})
+
+    def test_disabled_and_reset(self):
+        profiler = Profiler(enabled=False)
+        with profiler.timer('off'):
+            pass
+        self.assertEqual(profiler.to_dict(), {})
+        profiler.enabled = True
+        with profiler.timer('on'):
+            pass
+        self.assertEqual(list(profiler.to_dict()), ['on'])
+        profiler.reset()
+        self.assertEqual(profiler.to_dict(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
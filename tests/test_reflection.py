@@ -0,0 +1,95 @@
+"""Tests of get_module and prefetching."""
+from pathlib import Path
+import sys
+import tempfile
+import time
+import unittest
+
+from miscutil.reflection import clear_cache
+from miscutil.reflection import get_module
+from miscutil.reflection import import_times
+from miscutil.reflection import prefetch
+from miscutil.reflection import prefetch_in_background
+from miscutil.reflection import resolved_names
+
+SLOW_MODULE = '''import time
+time.sleep(0.5)
+
+
+class Thing:
+    """Class defined after slow initialization."""
+    VALUE = 42
+'''
+
+
+class TestGetModule(unittest.TestCase):
+    """get_module resolves 'module:attr.path' names."""
+    def setUp(self):
+        clear_cache()
+        self.addCleanup(clear_cache)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+        sys.path.insert(0, tmp.name)
+        self.addCleanup(sys.path.remove, tmp.name)
+
+    def _module(self, name: str, source: str) -> str:
+        (self.directory / (name + '.py')).write_text(source)
+        self.addCleanup(sys.modules.pop, name, None)
+        return name
+
+    def test_module_and_attribute(self):
+        self.assertIs(get_module('os.path'), sys.modules['os.path'])
+        self.assertIs(get_module('os.path:join'), sys.modules['os.path'].join)
+        self.assertEqual(get_module('collections:OrderedDict.fromkeys')(
+            'ab'), {'a': None, 'b': None})
+        with self.assertRaises(AttributeError):
+            get_module('os:no_such_attribute')
+        with self.assertRaises(ImportError):
+            get_module('no_such_module_of_miscutil')
+
+    def test_resolver_cache(self):
+        name = self._module('cachedmod', 'VALUE = [1]\n')
+        value = get_module(name + ':VALUE')
+        sys.modules[name].VALUE = [2]
+        self.assertIs(get_module(name + ':VALUE'), value)
+        self.assertEqual(resolved_names(), [name + ':VALUE'])
+        clear_cache()
+        self.assertEqual(get_module(name + ':VALUE'), [2])
+
+    def test_concurrent_prefetch(self):
+        name = self._module('slowmod', SLOW_MODULE)
+        thread = prefetch_in_background([name])
+        deadline = time.monotonic() + 10
+        while name not in sys.modules and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(get_module(name + ':Thing.VALUE'), 42)
+        thread.join()
+
+    def test_failed_prefetch(self):
+        name = self._module('brokenmod', 'raise RuntimeError("broken")\n')
+        failures = prefetch([name, 'os:sep', name + ':attr',
+                             'os:no_such_attribute'])
+        self.assertEqual(sorted(failures), sorted(
+            [name, name + ':attr', 'os:no_such_attribute']))
+        self.assertIsInstance(failures[name], RuntimeError)
+        self.assertIsInstance(failures['os:no_such_attribute'],
+                              AttributeError)
+        self.assertEqual(resolved_names(), ['os:sep'])
+        with self.assertRaises(RuntimeError):
+            get_module(name)
+
+    def test_import_times(self):
+        slow = self._module('slowtimedmod', SLOW_MODULE)
+        fast = self._module('fasttimedmod', 'VALUE = 1\n')
+        get_module(fast)
+        get_module(slow + ':Thing')
+        get_module('os')
+        times = import_times()
+        self.assertEqual(list(times), [slow, fast])
+        self.assertGreaterEqual(times[slow], 0.5)
+        self.assertNotIn('os', times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Tests of running commands."""
+import asyncio
+import os
+import re
+import signal
+import sys
+import tempfile
+import time
+import unittest
+
+from miscutil.subprocess import Command
+from miscutil.subprocess import CommandOutput
+from miscutil.subprocess import OUTPUT_CHUNK_SIZE
+from miscutil.subprocess import run_command
+from miscutil.subprocess import run_commands
+from miscutil.subprocess import run_commands_async
+
+
+def _python(code: str):
+    return [sys.executable, '-c', code]
+
+
+class TestBoundedCapture(unittest.TestCase):
+    """max_kept_bytes keeps head and tail of output."""
+    def test_utf8_boundaries(self):
+        for char in ('é', '€', '\U0001f600'):
+            for max_kept_bytes in (1, 2, 3, 7, 100, 101):
+                with self.subTest(char=char, max_kept_bytes=max_kept_bytes):
+                    result = run_command(
+                        _python('print({!r} * 1000)'.format(char)),
+                        max_kept_bytes=max_kept_bytes)
+                    kept = re.sub(r'\n\.\.\. \d+ bytes omitted \.\.\.\n',
+                                  '', result.stdout)
+                    self.assertEqual(set(kept) - {char, '\n'}, set())
+                    self.assertTrue(kept.endswith('\n'))
+                    self.assertIn('stdout', repr(result))
+
+    def test_head_and_tail(self):
+        result = run_command(
+            _python('for num in range(30): print(num)'), max_kept_bytes=12)
+        self.assertTrue(result.stdout.startswith('0\n1\n2\n'))
+        self.assertTrue(result.stdout.endswith('28\n29\n'))
+        self.assertIn('bytes omitted', result.stdout)
+
+    def test_huge_line(self):
+        # Pieces of a line without line break are captured as they come.
+        code = ('import sys\n'
+                'for _ in range(64): sys.stdout.write("\u20ac" * 50000)\n')
+        pieces = []
+        result = run_command(_python(code), max_kept_bytes=1000,
+                             on_stdout=lambda piece: pieces.append(len(piece)))
+        self.assertTrue(result.normal_end)
+        self.assertLess(len(result.stdout_bytes), 1100)
+        self.assertEqual(sum(pieces), 64 * 50000)
+        self.assertLessEqual(max(pieces), OUTPUT_CHUNK_SIZE)
+        self.assertEqual(set(result.stdout) - set('\u20ac\n.0123456789 '
+                                                  'bytesomited'), set())
+
+    def test_huge_line_memory(self):
+        code = ('import resource, sys\n'
+                'from miscutil.subprocess import run_command\n'
+                'child = [sys.executable, "-c", "import sys\\n'
+                'for _ in range(256): sys.stdout.write(\'x\' * (1 << 20))"]\n'
+                'before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n'
+                'result = run_command(child, max_kept_bytes=1000)\n'
+                'after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n'
+                'print(len(result.stdout_bytes), (after - before) >> 10)\n')
+        kept, grown_in_mb = map(int, run_command(
+            _python(code), errors='replace').stdout.split())
+        self.assertLess(kept, 1100)
+        self.assertLess(grown_in_mb, 64)
+
+    def test_without_limit(self):
+        result = run_command(_python('print("a" * 10000)'),
+                             on_stdout=lambda line: None)
+        self.assertEqual(result.stdout, 'a' * 10000 + '\n')
+
+
+class TestCommandOutput(unittest.TestCase):
+    """CommandOutput streams lines with bounded queue."""
+    def test_lines_and_result(self):
+        output = CommandOutput(_python(
+            'import sys\nprint("out")\nprint("err", file=sys.stderr)'))
+        self.assertEqual(sorted(output), [('stderr', 'err\n'),
+                                          ('stdout', 'out\n')])
+        self.assertEqual(output.result.returncode, 0)
+
+    def test_slow_consumer(self):
+        output = CommandOutput(
+            _python('for num in range(5000): print(num)'),
+            max_queued_lines=8)
+        lines = []
+        for _, line in output:
+            if not lines:
+                time.sleep(0.2)
+            lines.append(line)
+        self.assertEqual(lines, ['{}\n'.format(num) for num in range(5000)])
+
+    def test_close_kills_command(self):
+        output = CommandOutput(_python(
+            'import time\nprint("ready", flush=True)\ntime.sleep(60)'))
+        lines = iter(output)
+        self.assertEqual(next(lines), ('stdout', 'ready\n'))
+        started = time.monotonic()
+        lines.close()  # type: ignore
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertNotEqual(output.result.returncode, 0)
+
+    def test_close_endless_command(self):
+        output = CommandOutput(_python('while True: print("y")'),
+                               max_queued_lines=4)
+        lines = iter(output)
+        for _ in range(10):
+            next(lines)
+        lines.close()  # type: ignore
+        self.assertFalse(output.result.normal_end)
+
+
+class TestRunCommands(unittest.TestCase):
+    """run_commands runs commands concurrently."""
+    def test_index_and_order(self):
+        delays = [0.6, 0.0, 0.3]
+        results = list(run_commands(
+            [_python('import time\ntime.sleep({})\nprint({})'.format(
+                delay, index)) for index, delay in enumerate(delays)],
+            max_workers=3))
+        self.assertEqual([index for index, _ in results], [1, 2, 0])
+        for index, result in results:
+            self.assertEqual(result.stdout, '{}\n'.format(index))
+
+    def test_concurrency_bound(self):
+        code = ('import time\nstart = time.monotonic()\ntime.sleep(0.3)\n'
+                'print(start, time.monotonic())')
+        spans = [tuple(map(float, result.stdout.split()))
+                 for _, result in run_commands([_python(code)] * 6,
+                                               max_workers=2)]
+        for start, _ in spans:
+            running = [span for span in spans if span[0] <= start < span[1]]
+            self.assertLessEqual(len(running), 2)
+
+    def test_command_settings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            code = 'import os\nprint(os.getcwd(), os.environ.get("MU_X"))'
+            results = dict(run_commands(
+                [Command(_python(code), cwd=directory,
+                         env=dict(os.environ, MU_X='own')),
+                 _python(code)],
+                cwd='/', env=dict(os.environ, MU_X='default')))
+        self.assertEqual(results[0].stdout.split(),
+                         [os.path.realpath(directory), 'own'])
+        self.assertEqual(results[1].stdout.split(), ['/', 'default'])
+
+    def test_timeout(self):
+        results = dict(run_commands(
+            [Command(_python('import time\ntime.sleep(30)'), timeout=0.2),
+             _python('pass')], timeout=10))
+        self.assertEqual(results[0].returncode, -signal.SIGKILL)
+        self.assertTrue(results[1].normal_end)
+
+    def test_early_close(self):
+        started = time.monotonic()
+        results = run_commands(
+            [_python('pass')] + [_python('import time\ntime.sleep(30)')] * 4,
+            max_workers=2)
+        index, result = next(results)
+        self.assertEqual((index, result.returncode), (0, 0))
+        results.close()  # type: ignore
+        self.assertLess(time.monotonic() - started, 10)
+
+    def test_async(self):
+        async def _collect():
+            return [pair async for pair in run_commands_async(
+                [_python('import time\ntime.sleep(0.3)\nprint("slow")'),
+                 Command(_python('print("fast")'), timeout=5)],
+                max_workers=2)]
+
+        results = asyncio.run(_collect())
+        self.assertEqual([(index, result.stdout)
+                          for index, result in results],
+                         [(1, 'fast\n'), (0, 'slow\n')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Tests of golden file utilities."""
+import os
+from pathlib import Path
+import tempfile
+import unittest
+
+from miscutil import testing
+from miscutil.testing import GoldenCache
+from miscutil.testing import discover_golden_cases
+from miscutil.testing import run_golden_cases
+from miscutil.testing import write_if_changed
+
+
+def _double(obj):
+    """convert of golden cases; module level to be picklable."""
+    return {key: 2 * value for key, value in obj.items()}
+
+
+class TCWithTmpDir(unittest.TestCase):
+    """Test case having temporary directory."""
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.top = Path(tmp.name)
+
+    def _write(self, rel_path: str, text: str) -> Path:
+        path = self.top / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        return path
+
+
+class TestGoldenCache(TCWithTmpDir):
+    """GoldenCache parses each golden once."""
+    def test_hit_and_invalidation(self):
+        cache = GoldenCache()
+        path = self._write('golden.yaml', 'a: 1\n')
+        self.assertEqual(cache.load(path), {'a': 1})
+        self.assertEqual(cache.load(path), {'a': 1})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # Same content with new mtime is still a hit by its hash.
+        os.utime(path, ns=(0, 10 ** 9))
+        self.assertEqual(cache.load(path), {'a': 1})
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        path.write_text('a: 22\n')
+        os.utime(path, ns=(0, 2 * 10 ** 9))
+        self.assertEqual(cache.load(path), {'a': 22})
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_text_golden(self):
+        cache = GoldenCache()
+        path = self._write('golden.txt', 'x\r\ny\r')
+        self.assertEqual(cache.load(path, convert_from_to_yaml=False),
+                         'x\ny\n')
+        self.assertEqual(cache.load(path), 'x y')
+
+    def test_callers_get_copies(self):
+        cache = GoldenCache()
+        path = self._write('golden.yaml', 'a: [1, 2]\nb: 3\n')
+        expected = cache.load(path)
+        expected.pop('b')
+        expected['a'].append(9)
+        self.assertEqual(cache.load(path), {'a': [1, 2], 'b': 3})
+
+
+class TestWriteIfChanged(TCWithTmpDir):
+    """write_if_changed keeps files having the text."""
+    def test_skip_unchanged(self):
+        path = self.top / 'out.yaml'
+        self.assertTrue(write_if_changed(path, 'a: 1\n'))
+        os.utime(path, ns=(0, 10 ** 9))
+        self.assertFalse(write_if_changed(path, 'a: 1\n'))
+        self.assertEqual(path.stat().st_mtime_ns, 10 ** 9)
+        self.assertTrue(write_if_changed(path, 'a: 2\n'))
+        self.assertEqual(path.read_text(), 'a: 2\n')
+
+
+class TestGoldenCases(TCWithTmpDir):
+    """run_golden_cases compares converted inputs with goldens."""
+    def setUp(self):
+        super().setUp()
+        self._write('input/one.yaml', 'a: 1\n')
+        self._write('input/sub/two.yaml', 'b: 2\n')
+        self._write('input/bad.yaml', 'c: 3\n')
+        self._write('input/nogolden.yaml', 'd: 4\n')
+        self._write('golden/one.double.yaml', 'a: 2\n')
+        self._write('golden/sub/two.double.yaml', 'b: 4\n')
+        self._write('golden/bad.double.yaml', 'c: 5\n')
+
+    def test_discovery(self):
+        self.assertEqual(discover_golden_cases(str(self.top), 'double'),
+                         ['bad', 'one', 'sub/two'])
+
+    def test_process_pool_with_failure(self):
+        report = run_golden_cases(str(self.top), 'double', _double,
+                                  max_workers=2, update_goldens=False)
+        self.assertEqual([(result.core, result.passed)
+                          for result in report.results],
+                         [('bad', False), ('one', True), ('sub/two', True)])
+        self.assertEqual([result.core for result in report.failures],
+                         ['bad'])
+        self.assertIn('c', report.failures[0].message)
+        self.assertEqual(len(report.timing_lines()), 3)
+        self.assertEqual(report.to_dict()['failures'], 1)
+        self.assertEqual((self.top / 'golden/bad.asis.double.yaml')
+                         .read_text(), 'c: 6\n\n')
+
+    def test_update_mode(self):
+        report = run_golden_cases(str(self.top), 'double', _double,
+                                  max_workers=1, update_goldens=True)
+        self.assertEqual(report.failures, [])
+        self.assertEqual(
+            (self.top / 'golden/bad.double.yaml').read_text(), 'c: 6\n\n')
+
+    def test_assert_golden_cases(self):
+        case = testing.TCWithGoldenFile(top_dir=str(self.top),
+                                        suffix_of_golden='double',
+                                        update_goldens=False)
+        with self.assertRaisesRegex(AssertionError, 'bad'):
+            case.assertGoldenCases(_double, max_workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
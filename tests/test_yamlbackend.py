@@ -0,0 +1,89 @@
+"""Tests of the YAML backend."""
+from typing import Any
+from unittest import mock
+import io
+import random
+import unittest
+
+import yaml
+
+from miscutil import yamlbackend
+
+
+def _random_scalar(rng: random.Random) -> Any:
+    """get scalar of a kind golden files hold."""
+    return rng.choice([
+        lambda: rng.randint(-10 ** 6, 10 ** 6),
+        lambda: rng.uniform(-1e6, 1e6),
+        lambda: rng.choice([True, False, None, float('nan'), float('inf'),
+                            -0.0]),
+        lambda: ''.join(rng.choice('ab :-#\'"\n\t\\é日\x00 ')
+                        for _ in range(rng.randint(0, 100))),
+        lambda: rng.choice(['', 'yes', 'null', '1', '1.0', '- a', 'a: b',
+                            '~', ' lead', 'trail ', '@at', '%']),
+    ])()
+
+
+def _random_obj(rng: random.Random, depth: int = 0) -> Any:
+    """get random nested lists and dicts."""
+    if depth > 3 or rng.random() < 0.3:
+        return _random_scalar(rng)
+    size = rng.randint(0, 5)
+    if rng.random() < 0.5:
+        return [_random_obj(rng, depth + 1) for _ in range(size)]
+    return {str(_random_scalar(rng)): _random_obj(rng, depth + 1)
+            for _ in range(size)}
+
+
+class TestYamlDump(unittest.TestCase):
+    """yaml_dump emits what the python Dumper emits."""
+    def test_same_as_python_dumper(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            obj = _random_obj(rng)
+            for sort_keys in (True, False):
+                self.assertEqual(
+                    yamlbackend.yaml_dump(obj, sort_keys=sort_keys),
+                    yaml.dump(obj, Dumper=yaml.Dumper, sort_keys=sort_keys),
+                    repr(obj))
+
+    @unittest.skipUnless(yamlbackend.WITH_LIBYAML, 'libyaml is unavailable')
+    def test_portable_input_by_libyaml(self):
+        obj = {'b': [1, 2.5, None, True], 'a': {'text': 'plain ascii'}}
+        with mock.patch('yaml.dump', wraps=yaml.dump) as dump:
+            text = yamlbackend.yaml_dump(obj)
+        self.assertIs(dump.call_args[1]['Dumper'], yaml.CDumper)
+        self.assertEqual(text, yaml.dump(obj, Dumper=yaml.Dumper))
+
+    def test_non_portable_input_by_python(self):
+        for obj in ({'key': 'non ascii 日本語'}, ['line\nbreak'], {'': 1},
+                    'top-level scalar', {'tuple': (1, 2)}):
+            with self.subTest(obj=obj):
+                with mock.patch('yaml.dump', wraps=yaml.dump) as dump:
+                    text = yamlbackend.yaml_dump(obj)
+                self.assertIs(dump.call_args[1]['Dumper'], yaml.Dumper)
+                self.assertEqual(text, yaml.dump(obj, Dumper=yaml.Dumper))
+
+
+class TestYamlLoad(unittest.TestCase):
+    """yaml_load reads what the python loader reads."""
+    def test_same_as_python_loader(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            text = yaml.dump(_random_obj(rng), Dumper=yaml.Dumper)
+            self.assertEqual(
+                yaml.dump(yamlbackend.yaml_load(text)),
+                yaml.dump(yaml.load(text, Loader=yaml.SafeLoader)), text)
+
+    def test_load_all(self):
+        documents = yamlbackend.yaml_load_all(io.StringIO('a: 1\n---\n- 2\n'))
+        self.assertEqual(next(documents), {'a': 1})
+        self.assertEqual(list(documents), [[2]])
+
+    def test_backend_name(self):
+        self.assertEqual(yamlbackend.backend_name(),
+                         'libyaml' if yaml.__with_libyaml__ else 'python')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,327 @@
+"""Tests of JSON and YAML conversion."""
+from typing import Any
+from typing import List
+from typing import Tuple
+from enum import Enum
+from pathlib import Path
+import io
+import json
+import tempfile
+import unittest
+
+import yaml
+
+from miscutil.yamljson import DIFF_LIMIT
+from miscutil.yamljson import JSONEncoder
+from miscutil.yamljson import MISSING
+from miscutil.yamljson import RECORD_FORMAT_BY_SUFFIX
+from miscutil.yamljson import format_json_differences
+from miscutil.yamljson import json_differences
+from miscutil.yamljson import read_records
+from miscutil.yamljson import same_json
+from miscutil.yamljson import write_records
+
+
+class Color(Enum):
+    """Enum serialized by its name."""
+    RED = 1
+
+
+class WithToJson:
+    """Object serialized by to_json."""
+    def __init__(self, value):
+        self.value = value
+
+    def to_json(self):
+        """get json of this object."""
+        return {'value': self.value}
+
+
+class WithToDict:
+    """Object serialized by to_dict."""
+    def to_dict(self):
+        """get dict of this object."""
+        return {'kind': 'dict'}
+
+
+class DerivedToJson(WithToJson):
+    """Subclass of WithToJson."""
+
+
+class TestJSONEncoderPlans(unittest.TestCase):
+    """JSONEncoder caches how to serialize each type."""
+    def setUp(self):
+        class Encoder(JSONEncoder):
+            """Encoder of this test only."""
+        self.encoder_class = Encoder
+
+    def test_plan_cached_per_type(self):
+        encoder = self.encoder_class(show_type=False)
+        # pylint: disable=protected-access
+        self.assertEqual(self.encoder_class._plans, {})
+        self.assertEqual(encoder.to_json([WithToJson(1), WithToJson(2)]),
+                         [{'value': 1}, {'value': 2}])
+        self.assertEqual(list(self.encoder_class._plans), [WithToJson])
+        self.assertIsNot(self.encoder_class._plans, JSONEncoder._plans)
+        self.assertEqual(encoder.to_json({'c': Color.RED, 's': {3}}),
+                         {'c': 'RED', 's': [3]})
+        self.assertEqual(encoder.to_json(WithToDict()), {'kind': 'dict'})
+
+    def test_treat_primitive_overridden(self):
+        class Encoder(JSONEncoder):
+            """Encoder serializing complex numbers."""
+            @staticmethod
+            def treat_primitive(obj: Any) -> Tuple[bool, Any]:
+                if isinstance(obj, complex):
+                    return True, [obj.real, obj.imag]
+                return JSONEncoder.treat_primitive(obj)
+
+        encoder = Encoder()
+        self.assertEqual(encoder.to_json([1 + 2j, Color.RED]),
+                         [[1.0, 2.0], 'RED'])
+        self.assertIn('TypeError', JSONEncoder().to_json(1 + 2j))
+
+    def test_handler_precedence(self):
+        self.encoder_class.register_handler(WithToJson, lambda obj: 'h')
+        self.encoder_class.register_handler(WithToDict, lambda obj: 'd')
+        encoder = self.encoder_class()
+        self.assertEqual(encoder.to_json(
+            [WithToJson(1), DerivedToJson(2), WithToDict()]),
+            ['h', 'h', 'd'])
+
+    def test_handler_scoped_to_class(self):
+        class SubEncoder(self.encoder_class):  # type: ignore
+            """Subclass of the encoder of this test."""
+        self.encoder_class.register_handler(WithToJson, lambda obj: 'base')
+        self.assertEqual(SubEncoder().to_json(WithToJson(1)), 'base')
+        SubEncoder.register_handler(WithToJson, lambda obj: 'sub')
+        self.assertEqual(SubEncoder().to_json(WithToJson(1)), 'sub')
+        self.assertEqual(self.encoder_class().to_json(WithToJson(1)), 'base')
+        self.assertEqual(JSONEncoder(show_type=False).to_json(WithToJson(1)),
+                         {'value': 1})
+
+    def test_plan_reset_by_registration(self):
+        class SubEncoder(self.encoder_class):  # type: ignore
+            """Subclass of the encoder of this test."""
+        self.assertEqual(SubEncoder().to_json(WithToJson(1)), {'value': 1})
+        self.assertEqual(self.encoder_class().to_json(WithToJson(1)),
+                         {'value': 1})
+        self.encoder_class.register_handler(WithToJson, lambda obj: 'new')
+        # pylint: disable=protected-access
+        self.assertEqual(SubEncoder._plans, {})
+        self.assertEqual(self.encoder_class._plans, {})
+        self.assertEqual(SubEncoder().to_json(WithToJson(1)), 'new')
+
+
+class WithTypeKey:
+    """Object serialized with its type and a zero value."""
+    def to_json(self):
+        """get json of this object."""
+        return {' type': 'WithTypeKey', 'zero': 0, 'name': 'x'}
+
+
+def _round_trip(encoder: JSONEncoder, obj: Any) -> Any:
+    """to_json of the old implementation."""
+    return json.loads(json.dumps(
+        obj, ensure_ascii=False, default=encoder.default, sort_keys=True))
+
+
+class TestToJsonEquivalence(unittest.TestCase):
+    """to_json equals the json.dumps and json.loads round trip."""
+    SAMPLES = [
+        {'b': {'d': (1, 2, [3, (4,)]), 'c': None}, 'a': [{'z': 1, 'y': 2}]},
+        ((), [], {}, ((),)),
+        {10: 'int', 2.5: 'float', 2: 'int'}, {True: 1, False: 0},
+        {None: 'none'}, {float('nan'): 'nan', -0.0: 'zero'},
+        {'nan': float('nan'), 'inf': float('inf'), '-inf': float('-inf'),
+         'zero': 0.0, '-zero': -0.0, 'big': 1e300, 'tiny': 5e-324},
+        [WithToJson(1), DerivedToJson((2, 3)), WithToDict(), WithTypeKey()],
+        {'text': 'ascii', 'ja': '日本語', 'emoji': '\U0001f600',
+         'ctrl': 'a\tb\n\x00', '日本': ['é']},
+        [Color.RED, {Color.RED.name: Color.RED}, {3}, 1 + 2j],
+        'scalar', 1, 1.5, True, None,
+    ]
+
+    def assert_same(self, actual: Any, expected: Any) -> None:
+        """compare including key order, nan and signed zeros."""
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+        self.assertTrue(same_json(actual, expected))
+
+    def test_samples(self):
+        for encoder in (JSONEncoder(), JSONEncoder(show_type=False),
+                        JSONEncoder(show_zero_value=True)):
+            for obj in self.SAMPLES:
+                with self.subTest(obj=obj):
+                    self.assert_same(encoder.to_json(obj),
+                                     _round_trip(encoder, obj))
+
+    def test_subclasses_of_scalars(self):
+        class Text(str):
+            """str subclass."""
+        class Number(int):
+            """int subclass."""
+        obj = {Text('k'): [Text('v'), Number(3), Color.RED]}
+        encoder = JSONEncoder()
+        actual = encoder.to_json(obj)
+        self.assert_same(actual, _round_trip(encoder, obj))
+        self.assertIs(type(actual['k'][0]), str)
+        self.assertIs(type(actual['k'][1]), int)
+
+    def test_yaml_str(self):
+        encoder = JSONEncoder()
+        for obj in self.SAMPLES:
+            with self.subTest(obj=obj):
+                self.assertEqual(
+                    encoder.to_yaml_str(obj),
+                    yaml.dump(_round_trip(encoder, obj), sort_keys=True))
+
+    def test_errors(self):
+        encoder = JSONEncoder()
+        loop: List[Any] = []
+        loop.append(loop)
+        for obj in (loop, {(1, 2): 'tuple key'}, {1: 'a', 'b': 'mixed'}):
+            with self.subTest(obj=obj):
+                with self.assertRaises((ValueError, TypeError)) as expected:
+                    _round_trip(encoder, obj)
+                with self.assertRaises(type(expected.exception)):
+                    encoder.to_json(obj)
+
+
+class TestSameJson(unittest.TestCase):
+    """same_json compares as YAML renders."""
+    def test_scalars(self):
+        self.assertTrue(same_json(1, 1))
+        self.assertFalse(same_json(1, 1.0))
+        self.assertFalse(same_json(1, True))
+        self.assertFalse(same_json(1.0, True))
+        self.assertFalse(same_json(0, False))
+        self.assertFalse(same_json(0.0, -0.0))
+        self.assertTrue(same_json(-0.0, -0.0))
+        self.assertTrue(same_json(float('nan'), float('nan')))
+        self.assertFalse(same_json(float('nan'), 1.0))
+        self.assertFalse(same_json(None, 0))
+        self.assertFalse(same_json('1', 1))
+
+    def test_containers(self):
+        self.assertTrue(same_json({'a': [1, {'b': None}]},
+                                  {'a': [1, {'b': None}]}))
+        self.assertFalse(same_json({'a': 1}, {'a': 1, 'b': 2}))
+        self.assertFalse(same_json({'a': 1}, {'b': 1}))
+        self.assertFalse(same_json([1, 2], [1, 2, 3]))
+        self.assertFalse(same_json([1], [1.0]))
+        self.assertTrue(same_json([float('nan')], [float('nan')]))
+
+
+class TestJsonDifferences(unittest.TestCase):
+    """json_differences reports paths of differing subtrees."""
+    def test_paths(self):
+        expected = {'a': {'b': [1, 2, 3]}, 'c': 1, 'key with space': 0,
+                    'gone': True}
+        actual = {'a': {'b': [1, 2.0]}, 'c': True, 'key with space': 0,
+                  'new': None}
+        self.assertEqual(json_differences(expected, actual), [
+            ('$.a.b[1]', 2, 2.0),
+            ('$.a.b[2]', 3, MISSING),
+            ('$.c', 1, True),
+            ('$.gone', True, MISSING),
+            ('$.new', MISSING, None)])
+        self.assertEqual(json_differences({'x y': 1}, {'x y': -0.0}),
+                         [("$['x y']", 1, -0.0)])
+        self.assertEqual(json_differences([1], [1]), [])
+
+    def test_list_length(self):
+        self.assertEqual(json_differences([1], [1, 2, 3]), [
+            ('$[1]', MISSING, 2), ('$[2]', MISSING, 3)])
+
+    def test_limit(self):
+        expected = {'k{:02}'.format(num): num for num in range(30)}
+        actual = {key: -value for key, value in expected.items()}
+        differences = json_differences(expected, actual)
+        self.assertEqual(len(differences), DIFF_LIMIT)
+        self.assertEqual(differences[0], ('$.k01', 1, -1))
+        self.assertEqual(len(json_differences(expected, actual, limit=3)),
+                         3)
+
+    def test_format(self):
+        text = format_json_differences([('$.a', {'b': 1}, MISSING)])
+        self.assertEqual(text, 'at $.a:\n  expected:\n    b: 1\n'
+                               '  actual:\n    (missing)')
+
+
+class TestAssertJsonEqualAsYaml(unittest.TestCase):
+    """assertJsonEqualAsYaml fails with differing subtrees."""
+    def test_equal(self):
+        JSONEncoder().assertJsonEqualAsYaml(self, {'a': (1, 2)}, {'a': [1, 2]})
+
+    def test_message(self):
+        with self.assertRaises(AssertionError) as raised:
+            JSONEncoder().assertJsonEqualAsYaml(
+                self, {'a': 1, 'b': [1]}, {'a': 1.0, 'b': [1]}, memo='memo')
+        self.assertEqual(str(raised.exception),
+                         'JSON objects differ:\nat $.a:\n  expected:\n'
+                         '    1.0\n  actual:\n    1\nmemo')
+
+    def test_truncated_message(self):
+        expected = {'k{:02}'.format(num): num for num in range(30)}
+        with self.assertRaisesRegex(
+                AssertionError,
+                r'^JSON objects differ \(first {}\):'.format(DIFF_LIMIT)):
+            JSONEncoder().assertJsonEqualAsYaml(self, {}, expected)
+
+
+class TestRecords(unittest.TestCase):
+    """write_records and read_records round trip records."""
+    RECORDS = [{'a': 1, 'b': [1.5, None]}, [Color.RED, 'x'], 'text', 0,
+               {'ja': '日本語', 'multi': 'line\nbreak'}, {}, []]
+    EXPECTED = [{'a': 1, 'b': [1.5, None]}, ['RED', 'x'], 'text', 0,
+                {'ja': '日本語', 'multi': 'line\nbreak'}, {}, []]
+
+    def test_round_trip(self):
+        for record_format in ('ndjson', 'yaml'):
+            with self.subTest(record_format=record_format):
+                stream = io.StringIO()
+                self.assertEqual(
+                    write_records(iter(self.RECORDS), stream, record_format),
+                    len(self.RECORDS))
+                stream.seek(0)
+                self.assertEqual(list(read_records(stream, record_format)),
+                                 self.EXPECTED)
+
+    def test_empty(self):
+        for record_format in ('ndjson', 'yaml'):
+            with self.subTest(record_format=record_format):
+                stream = io.StringIO()
+                self.assertEqual(write_records([], stream, record_format), 0)
+                self.assertEqual(stream.getvalue(), '')
+                self.assertEqual(
+                    list(read_records(io.StringIO(), record_format)), [])
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for suffix in RECORD_FORMAT_BY_SUFFIX:
+                with self.subTest(suffix=suffix):
+                    path = Path(temp_dir) / ('records' + suffix)
+                    write_records(self.RECORDS, path)
+                    self.assertEqual(list(read_records(str(path))),
+                                     self.EXPECTED)
+            with self.assertRaises(ValueError):
+                write_records([], Path(temp_dir) / 'records.txt')
+
+    def test_ndjson_lines(self):
+        stream = io.StringIO()
+        write_records([{'b': 1, 'a': WithToJson(2)}, 'x'], stream, 'ndjson')
+        self.assertEqual(stream.getvalue(),
+                         '{"a": {"value": 2}, "b": 1}\n"x"\n')
+        self.assertEqual(
+            list(read_records(io.StringIO('1\n\n2\n'), 'ndjson')), [1, 2])
+
+    def test_lazy_read(self):
+        stream = io.StringIO('1\n{broken\n')
+        records = read_records(stream, 'ndjson')
+        self.assertEqual(next(records), 1)
+        with self.assertRaises(ValueError):
+            next(records)
+
+
+if __name__ == '__main__':
+    unittest.main()